@@ -1,11 +1,18 @@
+import argparse
+import itertools
 import os
 import re
 import sys
-import json
 import unicodedata
 import pandas as pd
+from openpyxl import load_workbook
+from pandas.io.parsers import TextParser
 from typing import List, Dict
 
+# Statistiche per colonna condivise con la webapp (analyze-headers)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "webapp", "backend"))
+from app.header_scan import CHUNK_ROWS, ColumnScan  # noqa: E402
+
 # Percorso del file merge nella stessa cartella dello script
 FILENAME = "merged_results.xlsx"
 
@@ -36,24 +43,56 @@ def normalize_name(s: str) -> str:
     return s
 
 
+def excel_cell(v):
+    # come read_excel: i numeri interi memorizzati come float diventano int, le stringhe vuote mancanti
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    if v == "":
+        return None
+    return v
+
+
+def read_columns(path: str) -> List[str]:
+    """Intestazioni come le restituisce read_excel (duplicati con suffisso .1, ...), dalla sola prima riga"""
+    return [str(c) for c in pd.read_excel(path, nrows=0).columns]
+
+
+def iter_chunks(path: str, columns: List[str]):
+    """Righe del primo foglio a blocchi di CHUNK_ROWS, con il workbook aperto in sola lettura"""
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(min_row=2, values_only=True)
+        while True:
+            block = list(itertools.islice(rows, CHUNK_ROWS))
+            if not block:
+                break
+            block = [[excel_cell(v) for v in r[:len(columns)]] + [None] * (len(columns) - len(r)) for r in block]
+            # stesso parser di read_excel: testo numerico convertito, celle vuote come mancanti
+            yield TextParser(block, header=None, names=columns).read()
+    finally:
+        wb.close()
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Analisi delle intestazioni del file unito")
+    parser.add_argument("file", nargs="?", default=FILENAME, help=f"workbook da analizzare (default {FILENAME})")
+    parser.add_argument("--header-only", action="store_true",
+                        help="solo nomi, nomi normalizzati e duplicati, leggendo la prima riga")
+    args = parser.parse_args()
+
     folder = os.path.dirname(os.path.abspath(__file__))
-    path = os.path.join(folder, FILENAME)
+    path = args.file if os.path.isabs(args.file) else os.path.join(folder, args.file)
 
     if not os.path.exists(path):
         print(f"File non trovato: {path}", file=sys.stderr)
         sys.exit(1)
 
-    # Leggi solo l'intestazione rapidamente per lista colonne
     try:
-        # Carico tutto per statistiche successive
-        df = pd.read_excel(path)
+        columns = read_columns(path)
     except Exception as e:
-        print(f"Errore leggendo {FILENAME}: {e}", file=sys.stderr)
+        print(f"Errore leggendo {os.path.basename(path)}: {e}", file=sys.stderr)
         sys.exit(1)
 
-    columns = list(df.columns)
-
     # Costruisci analisi intestazioni
     norm_map: Dict[str, List[str]] = {}
     normalized_list: List[str] = []
@@ -64,69 +103,58 @@ def main():
 
     duplicates_groups = {k: v for k, v in norm_map.items() if len(v) > 1 and k != ""}
 
-    # Statistiche per colonna
     analysis_rows = []
-    total_rows = len(df)
-    for col, norm in zip(columns, normalized_list):
-        s = df[col]
-        non_null = int(s.notna().sum())
-        nulls = int(s.isna().sum())
-        non_null_pct = (non_null / total_rows * 100.0) if total_rows > 0 else 0.0
-        dtype = str(s.dtype)
-        # numero di valori unici non nulli (limitato a evitare costi eccessivi)
-        try:
-            unique_count = int(s.dropna().nunique())
-        except Exception:
-            unique_count = -1
-        # esempi: primi 3 valori non nulli distinti
-        try:
-            examples = s.dropna().astype(str).unique().tolist()[:3]
-        except Exception:
-            examples = []
-
-        analysis_rows.append({
-            "original_name": str(col),
-            "normalized_name": norm,
-            "is_duplicate_normalized": norm in duplicates_groups,
-            "dtype": dtype,
-            "row_count": total_rows,
-            "non_null_count": non_null,
-            "null_count": nulls,
-            "non_null_pct": round(non_null_pct, 2),
-            "unique_count_non_null": unique_count,
-            "sample_values": ", ".join(examples),
-        })
+    coverage_csv = None
+    total_rows = 0
+    if args.header_only:
+        for col, norm in zip(columns, normalized_list):
+            analysis_rows.append({
+                "original_name": str(col),
+                "normalized_name": norm,
+                "is_duplicate_normalized": norm in duplicates_groups,
+            })
+    else:
+        # Un solo passaggio a blocchi: statistiche per colonna e copertura per file insieme
+        scans = [ColumnScan(c) for c in columns]
+        by_file = "file_number" in columns
+        coverage = None
+        file_rows = None
+        for chunk in iter_chunks(path, columns):
+            total_rows += len(chunk)
+            for scan, (_, s) in zip(scans, chunk.items()):
+                scan.update(s)
+            if by_file:
+                keys = chunk["file_number"]
+                counts = chunk.drop(columns="file_number").notna().groupby(keys, dropna=False).sum()
+                sizes = keys.value_counts(dropna=False)
+                coverage = counts if coverage is None else coverage.add(counts, fill_value=0)
+                file_rows = sizes if file_rows is None else file_rows.add(sizes, fill_value=0)
+
+        for scan, norm in zip(scans, normalized_list):
+            analysis_rows.append(scan.row(norm, norm in duplicates_groups))
+
+        # Copertura per file, se presente colonna file_number
+        if coverage is not None:
+            rows_in_file = file_rows.reindex(coverage.index).astype(int)
+            long_df = coverage.astype(int).rename_axis("file_number").reset_index().melt(
+                id_vars="file_number", var_name="column", value_name="non_null_count")
+            long_df["rows_in_file"] = long_df["file_number"].map(rows_in_file).to_numpy()
+            long_df["non_null_pct"] = (long_df["non_null_count"] / long_df["rows_in_file"] * 100.0).round(2)
+            coverage_df = long_df.sort_values("file_number", kind="stable")[
+                ["file_number", "column", "non_null_pct", "non_null_count", "rows_in_file"]]
+            coverage_csv = os.path.join(folder, "header_coverage_by_file.csv")
+            coverage_df.to_csv(coverage_csv, index=False)
 
     analysis_df = pd.DataFrame(analysis_rows)
     analysis_csv = os.path.join(folder, "header_analysis.csv")
     analysis_df.to_csv(analysis_csv, index=False)
 
-    # Copertura per file, se presente colonna file_number
-    coverage_csv = None
-    if "file_number" in df.columns:
-        long_rows = []
-        for file_num, g in df.groupby("file_number", dropna=False):
-            g_count = len(g)
-            for col in columns:
-                if col == "file_number":
-                    continue
-                non_null = int(g[col].notna().sum())
-                pct = (non_null / g_count * 100.0) if g_count > 0 else 0.0
-                long_rows.append({
-                    "file_number": file_num,
-                    "column": str(col),
-                    "non_null_pct": round(pct, 2),
-                    "non_null_count": non_null,
-                    "rows_in_file": g_count,
-                })
-        coverage_df = pd.DataFrame(long_rows)
-        coverage_csv = os.path.join(folder, "header_coverage_by_file.csv")
-        coverage_df.to_csv(coverage_csv, index=False)
-
     # Stampa sommario leggibile
     print("Analisi intestazioni completata")
-    print(f"- File sorgente: {FILENAME}")
+    print(f"- File sorgente: {os.path.basename(path)}")
     print(f"- Numero colonne: {len(columns)}")
+    if not args.header_only:
+        print(f"- Numero righe: {total_rows}")
     if duplicates_groups:
         print(f"- Duplicati (normalizzati) trovati: {len(duplicates_groups)} gruppi")
         for k, v in list(duplicates_groups.items())[:10]:
@@ -1,28 +1,60 @@
 import os
 import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
+from openpyxl import Workbook
 
 # Directory containing the Excel files
 folder = os.path.dirname(os.path.abspath(__file__))
 
 # Regex to extract the numeric part from the filename
-pattern = re.compile(r'results-survey(\d+)\.xlsx')
-
-# List to hold DataFrames
-dfs = []
-
-for filename in os.listdir(folder):
-    match = pattern.match(filename)
-    if match:
-        number = match.group(1)
-        filepath = os.path.join(folder, filename)
-        df = pd.read_excel(filepath)
-        df['file_number'] = number
-        dfs.append(df)
-
-if dfs:
-    merged_df = pd.concat(dfs, ignore_index=True)
-    merged_df.to_excel('merged_results.xlsx', index=False)
-    print('File unito salvato come merged_results.xlsx')
-else:
-    print('Nessun file Excel trovato.')
+pattern = re.compile(r'results-survey(\d+)\.xlsx$')
+
+# Rows written per batch to the output workbook
+BATCH_ROWS = 5000
+
+
+def parse_export(filepath, number, tmpdir):
+    """Parse one export in a worker process and park it in a temporary pickle,
+    returning only its columns so the parent never holds all exports at once."""
+    df = pd.read_excel(filepath)
+    df['file_number'] = number
+    # one pickle per export file: two exports may carry the same number
+    parked = os.path.join(tmpdir, f'{os.path.basename(filepath)}.pkl')
+    df.to_pickle(parked)
+    return parked, list(df.columns)
+
+
+if __name__ == '__main__':
+    exports = []
+    for filename in os.listdir(folder):
+        match = pattern.match(filename)
+        if match:
+            exports.append((os.path.join(folder, filename), match.group(1)))
+
+    if exports:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1)) as pool:
+                parsed = list(pool.map(parse_export, *zip(*exports), [tmpdir] * len(exports)))
+
+            # Union schema, in the same column order pd.concat would produce
+            columns = []
+            for _, cols in parsed:
+                columns.extend(c for c in cols if c not in columns)
+
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet('Sheet1')
+            ws.append(columns)
+            for parked, _ in parsed:
+                df = pd.read_pickle(parked).reindex(columns=columns)
+                for start in range(0, len(df), BATCH_ROWS):
+                    block = df.iloc[start:start + BATCH_ROWS].astype(object)
+                    for row in block.where(block.notna(), None).itertuples(index=False, name=None):
+                        ws.append(row)
+                os.remove(parked)
+            wb.save('merged_results.xlsx')
+        print('File unito salvato come merged_results.xlsx')
+    else:
+        print('Nessun file Excel trovato.')
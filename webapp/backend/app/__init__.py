@@ -1,5 +1,14 @@
 # Inizializzazione del package
-from .main import app
-from .survey_analyzer import SurveyAnalyzer
-
+# `app` e `SurveyAnalyzer` sono caricati al primo accesso: i moduli senza dipendenze
+# dal server (es. `app.header_scan`, usato da analyze_header.py) si importano senza FastAPI
 __all__ = ["app", "SurveyAnalyzer"]
+
+
+def __getattr__(name):
+    if name == "app":
+        from .main import app
+        return app
+    if name == "SurveyAnalyzer":
+        from .survey_analyzer import SurveyAnalyzer
+        return SurveyAnalyzer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,86 @@
+"""
+Pool degli analyzer caricati, con budget di memoria globale ed eviction LRU.
+
+Ogni progetto materializza il proprio `SurveyAnalyzer` solo quando serve; il
+pool tiene in memoria quelli usati più di recente finché la somma della memoria
+dei loro DataFrame resta entro `SURVEY_ANALYZER_BUDGET_MB` (default 1024).
+Un progetto rimosso dal pool viene ricaricato dal suo ultimo dataset alla
+richiesta successiva.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DEFAULT_BUDGET_BYTES = int(float(os.environ.get("SURVEY_ANALYZER_BUDGET_MB", "1024")) * 1024 * 1024)
+
+
+def analyzer_size(analyzer) -> int:
+    """Memoria stimata di un analyzer: il suo DataFrame (dopo la codifica in Categorical)"""
+    data = getattr(analyzer, "data", None)
+    if data is None:
+        return 0
+    report = getattr(analyzer, "memory_report", None) or {}
+    if report.get("after_bytes") is not None:
+        return int(report["after_bytes"])
+    return int(data.memory_usage(deep=True).sum())
+
+
+class AnalyzerPool:
+    """Mappa LRU progetto -> analyzer, limitata nella memoria complessiva"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = DEFAULT_BUDGET_BYTES if max_bytes is None else max_bytes
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, project_id: str) -> Optional[Any]:
+        with self._lock:
+            item = self._items.get(project_id)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(project_id)
+            self.hits += 1
+            return item[0]
+
+    def peek(self, project_id: str) -> Optional[Any]:
+        """Analyzer in memoria, senza aggiornare l'ordine LRU né i contatori"""
+        with self._lock:
+            item = self._items.get(project_id)
+            return item[0] if item is not None else None
+
+    def put(self, project_id: str, analyzer):
+        size = analyzer_size(analyzer)
+        with self._lock:
+            old = self._items.pop(project_id, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._items[project_id] = (analyzer, size)
+            self.bytes += size
+            # l'ultimo inserito resta sempre, anche se da solo supera il budget
+            while len(self._items) > 1 and self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def discard(self, project_id: str):
+        with self._lock:
+            old = self._items.pop(project_id, None)
+            if old is not None:
+                self.bytes -= old[1]
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "projects": list(self._items.keys()),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
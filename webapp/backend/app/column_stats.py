@@ -0,0 +1,200 @@
+"""
+Statistiche sufficienti per colonna, calcolate una sola volta al caricamento
+del dataset. Da queste si ricavano conteggi, distribuzioni e statistiche
+Likert di ogni tipo di grafico senza riscandire le risposte.
+
+Le statistiche sono componibili: `merge` somma quelle di un blocco di righe
+accodato e dà lo stesso risultato del ricalcolo sulla colonna intera. I
+momenti Likert sono somme intere dei codici, quindi si sommano in modo esatto
+(è il caso discreto dell'aggiornamento di Chan per media e varianza).
+"""
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .likert_encoder import LikertEncoder
+
+
+class ColumnStats:
+    """Conteggi per valore, mancanti e istogramma dei codici Likert (1..K) di una colonna"""
+
+    def __init__(self, column: str, n_rows: int, na_count: int, counts: Dict[Any, int],
+                 na_position: Optional[int] = None, likert_family: Optional[str] = None,
+                 likert_hist: Optional[np.ndarray] = None):
+        self.column = column
+        self.n_rows = n_rows
+        self.na_count = na_count
+        # valori non nulli nell'ordine di prima comparsa (come Counter(series)) o delle categorie
+        self.counts = counts
+        # posizione del primo mancante tra le chiavi, per ricostruire l'ordine con include_na
+        self.na_position = na_position
+        self.likert_family = likert_family
+        self.likert_hist = likert_hist
+        if likert_hist is not None:
+            codes = np.arange(1, len(likert_hist) + 1, dtype=np.int64)
+            self.code_sum = int((codes * likert_hist).sum())
+            self.code_sumsq = int((codes * codes * likert_hist).sum())
+        else:
+            self.code_sum = 0
+            self.code_sumsq = 0
+
+    @classmethod
+    def from_series(cls, series: pd.Series, likert_encoder: Optional[LikertEncoder] = None,
+                    likert_family: Optional[str] = None) -> "ColumnStats":
+        """Calcola le statistiche con un solo passaggio vettoriale.
+        Per le colonne Categorical i conteggi sono un bincount dei codici interi.
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = series.cat.categories.tolist()
+            codes = series.cat.codes.to_numpy().astype(np.int64)
+            binc = np.bincount(codes + 1, minlength=len(categories) + 1)
+            if series.cat.ordered:
+                # categorie nell'ordine della scala Likert: l'ordine di comparsa va ricavato dai codici
+                seen = pd.unique(codes[codes >= 0])
+            else:
+                # categorie già in ordine di comparsa
+                seen = np.flatnonzero(binc[1:])
+            counts = {categories[i]: int(binc[i + 1]) for i in seen}
+            hist = likert_encoder.histogram_from_counts(counts) if likert_encoder is not None else None
+            na_position = None
+            if binc[0]:
+                # i valori distinti visti prima del primo mancante
+                first_na = int(np.argmax(codes < 0))
+                na_position = len(pd.unique(codes[:first_na]))
+            return cls(str(series.name), int(len(series)), int(binc[0]), counts, na_position, likert_family, hist)
+
+        vc = series.value_counts(sort=False, dropna=False)
+        counts: Dict[Any, int] = {}
+        na_count = 0
+        na_position = None
+        for value, count in vc.items():
+            if pd.isna(value):
+                na_count += int(count)
+                if na_position is None:
+                    na_position = len(counts)
+                continue
+            counts[value] = int(count)
+        hist = likert_encoder.histogram_from_counts(counts) if likert_encoder is not None else None
+        return cls(str(series.name), int(len(series)), na_count, counts, na_position, likert_family, hist)
+
+    def merge(self, other: "ColumnStats", key_order: Optional[Sequence[Any]] = None) -> "ColumnStats":
+        """Statistiche delle righe di `self` seguite da quelle di `other`, in O(valori distinti).
+        I valori nuovi seguono quelli già visti, nell'ordine di comparsa in `other`; per le
+        colonne Categorical non ordinate `key_order` dà l'ordine delle categorie.
+        """
+        counts = dict(self.counts)
+        new_before_na = 0
+        for i, (value, count) in enumerate(other.counts.items()):
+            if value in counts:
+                counts[value] += count
+            else:
+                counts[value] = count
+                if other.na_position is not None and i < other.na_position:
+                    new_before_na += 1
+        if key_order is not None:
+            counts = {k: counts[k] for k in key_order if k in counts}
+
+        na_position = self.na_position
+        if na_position is None and other.na_position is not None:
+            na_position = len(self.counts) + new_before_na
+
+        hist = None
+        if self.likert_hist is not None and other.likert_hist is not None:
+            hist = self.likert_hist + other.likert_hist
+        return ColumnStats(self.column, self.n_rows + other.n_rows, self.na_count + other.na_count,
+                           counts, na_position, self.likert_family, hist)
+
+    @property
+    def valid_count(self) -> int:
+        return self.n_rows - self.na_count
+
+    def counter(self, include_na: bool = False) -> Counter:
+        """Counter dei valori, con i mancanti come unica chiave NaN se richiesti"""
+        if not include_na or not self.na_count:
+            return Counter(self.counts)
+        items = list(self.counts.items())
+        pos = self.na_position if self.na_position is not None else len(items)
+        items.insert(pos, (np.nan, self.na_count))
+        return Counter(dict(items))
+
+    # ---- Statistiche Likert dai codici ----
+    @property
+    def likert_n(self) -> int:
+        return int(self.likert_hist.sum()) if self.likert_hist is not None else 0
+
+    def likert_mean(self) -> float:
+        n = self.likert_n
+        return self.code_sum / n if n else float("nan")
+
+    def likert_m2(self) -> float:
+        """Somma dei quadrati degli scarti dalla media"""
+        n = self.likert_n
+        if not n:
+            return 0.0
+        codes = np.arange(1, len(self.likert_hist) + 1, dtype=np.float64)
+        return float((self.likert_hist * (codes - self.likert_mean()) ** 2).sum())
+
+    def likert_std(self, ddof: int = 0) -> float:
+        n = self.likert_n
+        if n - ddof <= 0:
+            return float("nan")
+        return float(np.sqrt(self.likert_m2() / (n - ddof)))
+
+    def likert_median(self) -> float:
+        n = self.likert_n
+        if not n:
+            return float("nan")
+        cum = np.cumsum(self.likert_hist)
+        lo = int(np.searchsorted(cum, (n - 1) // 2, side="right")) + 1
+        hi = int(np.searchsorted(cum, n // 2, side="right")) + 1
+        return (lo + hi) / 2
+
+
+
+def likert_quantile(hist: np.ndarray, q: float) -> float:
+    """Quantile dei codici 1..k con interpolazione lineare (come `np.percentile`), dal solo istogramma"""
+    n = int(hist.sum())
+    if not n:
+        return float("nan")
+    pos = q * (n - 1)
+    lo = int(np.floor(pos))
+    cum = np.cumsum(hist)
+    a = int(np.searchsorted(cum, lo, side="right")) + 1
+    b = int(np.searchsorted(cum, min(lo + 1, n - 1), side="right")) + 1
+    return a + (b - a) * (pos - lo)
+
+
+def likert_box(hist: np.ndarray) -> Optional[Dict[str, Any]]:
+    """Riassunto del box plot dei codici 1..k in O(categorie): quartili, baffi di Tukey
+    (1,5 IQR), media e codici fuori dai baffi; None se non ci sono risposte valide"""
+    n = int(hist.sum())
+    if not n:
+        return None
+    q1, median, q3 = (likert_quantile(hist, q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    present = np.flatnonzero(hist) + 1
+    lower = int(present[present >= q1 - 1.5 * iqr].min())
+    upper = int(present[present <= q3 + 1.5 * iqr].max())
+    codes = np.arange(1, len(hist) + 1)
+    return {
+        "n": n,
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "lowerfence": lower,
+        "upperfence": upper,
+        "mean": float((codes * hist).sum() / n),
+        "outliers": [int(c) for c in present if c < lower or c > upper],
+    }
+
+
+def compute_column_stats(df: pd.DataFrame, likert_encoders: Optional[Dict[str, tuple]] = None) -> Dict[str, ColumnStats]:
+    """Statistiche di tutte le colonne; `likert_encoders` mappa colonna -> (famiglia, encoder)"""
+    likert_encoders = likert_encoders or {}
+    table = {}
+    for col in df.columns:
+        family, encoder = likert_encoders.get(col, (None, None))
+        table[col] = ColumnStats.from_series(df[col], encoder, family)
+    return table
@@ -0,0 +1,651 @@
+"""
+Cache colonnare su disco per i workbook caricati e derivati.
+
+Ogni file sorgente (.xlsx/.xls, o export CSV/CSV.gz: vedi `csv_source`)
+viene convertito una sola volta in un file Parquet salvato in
+`<cartella>/.cache/`; le sole colonne con tipi misti, che Arrow non
+rappresenta, finiscono in un pickle affiancato (tutto il frame se pyarrow non
+è installato). Il file sorgente resta l'unica sorgente di verità:
+la cache è sempre ricostruibile.
+
+Regola di invalidazione:
+- se mtime e dimensione del sorgente coincidono con quelli registrati, la cache
+  è valida senza rileggere il file;
+- altrimenti si ricalcola l'hash SHA-1 del contenuto: se è invariato (file solo
+  "toccato") si aggiornano mtime/dimensione, altrimenti il sorgente viene
+  riletto e le voci obsolete vengono eliminate.
+
+Ogni voce si costruisce sotto un lock sul file `<sorgente>.lock` della cartella
+di cache, valido anche tra i worker di `uvicorn --workers N`; i file `.tmp`
+ancora in scrittura (anche di altri processi) non vengono mai eliminati.
+
+Un dataset unito aggiornato in modalità append (`append_entry`) è la voce del
+dataset di partenza più una parte con le sole righe nuove o modificate: i file
+delle parti precedenti sono collegati (hard link), non copiati, e il sorgente
+Excel non viene scritto finché non serve (`materialize`). Fino ad allora la voce
+è "in attesa" e vale come sorgente: il suo SHA-1 identifica il contenuto
+(quello della base più la parte aggiunta) e resta lo stesso quando l'Excel
+viene scritto.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from .csv_source import is_csv, read_csv_table
+from .shared_state import file_lock
+
+CACHE_DIRNAME = ".cache"
+CACHE_VERSION = 2
+# Parti oltre le quali una voce accodata viene riscritta in un'unica parte
+CACHE_MAX_PARTS = int(os.environ.get("SURVEY_CACHE_MAX_PARTS", "16"))
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    key = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def _entry_lock(source_path: str):
+    """Lock della voce di cache del sorgente, tra i thread e tra i processi"""
+    with _lock_for(source_path), file_lock(os.path.join(cache_dir_for(source_path),
+                                                        os.path.basename(source_path) + ".lock")):
+        yield
+
+
+def cache_dir_for(source_path: str) -> str:
+    """Cartella di cache associata al file sorgente"""
+    return os.path.join(os.path.dirname(os.path.abspath(source_path)), CACHE_DIRNAME)
+
+
+def _meta_path(source_path: str) -> str:
+    return os.path.join(cache_dir_for(source_path), os.path.basename(source_path) + ".json")
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hash SHA-1 del contenuto del file"""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_meta(source_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_meta_path(source_path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    return meta
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _entry_files(source_path: str, meta: Dict[str, Any]) -> List[str]:
+    cdir = cache_dir_for(source_path)
+    entries = [meta] + list(meta.get("parts") or [])
+    return [os.path.join(cdir, e[k]) for e in entries for k in ("data_file", "sidecar_file") if e.get(k)]
+
+
+def _entry_exists(source_path: str, meta: Dict[str, Any]) -> bool:
+    return all(os.path.exists(p) for p in _entry_files(source_path, meta))
+
+
+def _is_fresh(meta: Optional[Dict[str, Any]], st: os.stat_result) -> bool:
+    return bool(meta) and meta.get("mtime_ns") == st.st_mtime_ns and meta.get("size") == st.st_size
+
+
+def _parse_source(source_path: str) -> pd.DataFrame:
+    if is_csv(source_path):
+        return read_csv_table(source_path)
+    return pd.read_excel(source_path)
+
+
+def _excel_scalar(v):
+    # read_excel restituisce come int i numeri interi memorizzati nelle celle
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Allinea un frame in memoria a quello che si otterrebbe rileggendo l'Excel"""
+    df = df.reset_index(drop=True).infer_objects()
+    for c in df.columns:
+        s = df[c]
+        if s.dtype == object:
+            if s.isna().all():
+                df[c] = s.astype("float64")
+            else:
+                try:
+                    # Come il parser di read_excel: colonne interamente numeriche diventano numeri
+                    df[c] = pd.to_numeric(s)
+                except (ValueError, TypeError):
+                    # solo testo: nessun numero da convertire
+                    if pd.api.types.infer_dtype(s, skipna=True) != "string":
+                        df[c] = s.map(_excel_scalar, na_action="ignore").infer_objects()
+        elif s.dtype.kind == "f" and s.notna().all() and (s % 1 == 0).all():
+            df[c] = s.astype("int64")
+    return df
+
+
+def _remove_stale(source_path: str, keep: Optional[Set[Optional[str]]] = None):
+    cdir = cache_dir_for(source_path)
+    prefix = os.path.basename(source_path) + "."
+    try:
+        names = os.listdir(cdir)
+    except OSError:
+        return
+    for name in names:
+        if not name.startswith(prefix) or (keep and name in keep) or name.endswith((".json", ".lock", ".tmp")):
+            # i .tmp sono scritture in corso, forse di un altro worker
+            continue
+        try:
+            os.remove(os.path.join(cdir, name))
+        except OSError:
+            pass
+
+
+def _arrow_incompatible(df: pd.DataFrame) -> List[str]:
+    """Colonne object con tipi misti (es. int e str) che Arrow non sa rappresentare"""
+    if pa is None:
+        return list(df.columns)
+    bad = []
+    for c in df.columns:
+        if df[c].dtype != object:
+            continue
+        try:
+            pa.array(df[c], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            bad.append(c)
+    return bad
+
+
+def _write_frame(cdir: str, stem: str, df: pd.DataFrame):
+    """Scrive `df` in `<stem>.parquet` e/o `<stem>.pickle`: (data_file, sidecar_file, colonne del pickle)"""
+    os.makedirs(cdir, exist_ok=True)
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+
+    # Le colonne rappresentabili in Arrow vanno in Parquet; le poche con tipi
+    # misti (risposte aperte numeriche/testuali) in un pickle affiancato.
+    mixed = _arrow_incompatible(df) if all(isinstance(c, str) for c in df.columns) else list(df.columns)
+    columnar = [c for c in df.columns if c not in set(mixed)]
+    data_file = sidecar_file = None
+    if columnar:
+        data_file = f"{stem}.parquet"
+        df[columnar].to_parquet(os.path.join(cdir, data_file) + suffix, index=False)
+        os.replace(os.path.join(cdir, data_file) + suffix, os.path.join(cdir, data_file))
+    if mixed or not columnar:
+        sidecar_file = f"{stem}.pickle"
+        df[mixed].to_pickle(os.path.join(cdir, sidecar_file) + suffix)
+        os.replace(os.path.join(cdir, sidecar_file) + suffix, os.path.join(cdir, sidecar_file))
+    return data_file, sidecar_file, mixed
+
+
+def _write_entry(source_path: str, df: pd.DataFrame, st: Optional[os.stat_result], digest: str) -> Dict[str, Any]:
+    stem = f"{os.path.basename(source_path)}.{digest[:16]}"
+    data_file, sidecar_file, mixed = _write_frame(cache_dir_for(source_path), stem, df)
+    return _commit_entry(source_path, st, digest, data_file, sidecar_file, len(df), list(df.columns), mixed)
+
+
+def _commit_entry(source_path: str, st: Optional[os.stat_result], digest: str, data_file: Optional[str],
+                  sidecar_file: Optional[str], rows: int, columns: List[Any], mixed: List[Any],
+                  parts: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Registra la voce; senza `st` il sorgente non è ancora scritto (voce in attesa, vedi `append_entry`)"""
+    meta = {
+        "version": CACHE_VERSION,
+        "source": os.path.basename(source_path),
+        "sha1": digest,
+        "mtime_ns": st.st_mtime_ns if st is not None else None,
+        "size": st.st_size if st is not None else None,
+        "pending": st is None,
+        "data_file": data_file,
+        "sidecar_file": sidecar_file,
+        "rows": int(rows),
+        "columns": [str(c) for c in columns],
+        "sidecar_columns": [str(c) for c in mixed],
+    }
+    if parts:
+        meta["parts"] = parts
+    _write_json_atomic(_meta_path(source_path), meta)
+    _remove_stale(source_path, keep={os.path.basename(p) for p in _entry_files(source_path, meta)})
+    return meta
+
+
+def _ensure_entry(source_path: str) -> Dict[str, Any]:
+    meta = _read_meta(source_path)
+    try:
+        st = os.stat(source_path)
+    except FileNotFoundError:
+        if meta and meta.get("pending") and _entry_exists(source_path, meta):
+            return meta
+        raise
+    if _is_fresh(meta, st) and _entry_exists(source_path, meta):
+        return meta
+
+    digest = file_digest(source_path)
+    # una voce accodata, poi scritta su disco, ha anche lo SHA-1 del file (`file_sha1`)
+    if meta and digest in (meta.get("sha1"), meta.get("file_sha1")) and _entry_exists(source_path, meta):
+        meta.update({"mtime_ns": st.st_mtime_ns, "size": st.st_size})
+        _write_json_atomic(_meta_path(source_path), meta)
+        return meta
+
+    df = _parse_source(source_path)
+    return _write_entry(source_path, df, st, digest)
+
+
+def ensure_cached(source_path: str) -> Dict[str, Any]:
+    """Garantisce che il sorgente sia in cache e ne restituisce i metadati"""
+    with _entry_lock(source_path):
+        return _ensure_entry(source_path)
+
+
+def _restore_missing(df: pd.DataFrame) -> pd.DataFrame:
+    """Riporta i mancanti delle colonne object a np.nan, come li restituisce read_excel"""
+    for c in df.columns:
+        if df[c].dtype == object:
+            values = df[c].to_numpy(copy=True)
+            mask = pd.isna(values)
+            if mask.any():
+                values[mask] = np.nan
+                df[c] = values
+    return df
+
+
+def _read_files(cdir: str, entry: Dict[str, Any], wanted: List[str], everything: bool) -> pd.DataFrame:
+    """Colonne `wanted` dal Parquet e dal pickle di una voce (o di una sua parte)"""
+    sidecar_cols = set(entry.get("sidecar_columns", []))
+    parts = []
+    parquet_cols = [c for c in wanted if c not in sidecar_cols]
+    if entry.get("data_file") and (parquet_cols or everything):
+        parts.append(pd.read_parquet(os.path.join(cdir, entry["data_file"]), columns=parquet_cols))
+    if entry.get("sidecar_file") and (sidecar_cols.intersection(wanted) or everything):
+        side = pd.read_pickle(os.path.join(cdir, entry["sidecar_file"]))
+        parts.append(side[[c for c in side.columns if c in set(wanted)]])
+
+    if not parts:
+        return pd.DataFrame(index=pd.RangeIndex(entry.get("rows", 0)))
+    df = parts[0] if len(parts) == 1 else pd.concat(parts, axis=1)
+    if list(df.columns) != wanted and all(isinstance(c, str) for c in df.columns):
+        df = df[wanted]
+    return _restore_missing(df)
+
+
+def _read_parts(cdir: str, parts: List[Dict[str, Any]], wanted: List[str]) -> pd.DataFrame:
+    """Ricompone una voce accodata: le prime righe di ogni parte sostituiscono quelle nelle
+    posizioni `updated`, le altre sono accodate. Come rileggere l'Excel del dataset unito."""
+    order = np.empty(0, dtype=np.int64)
+    offset = 0
+    for part in parts:
+        rows = offset + np.arange(part["rows"], dtype=np.int64)
+        updated = np.asarray(part.get("updated", []), dtype=np.int64)
+        order[updated] = rows[:len(updated)]
+        order = np.concatenate([order, rows[len(updated):]])
+        offset += part["rows"]
+    kept = np.zeros(offset, dtype=bool)
+    kept[order] = True
+
+    frames = []
+    offset = 0
+    for part in parts:
+        present = set(part["columns"])
+        df = _read_files(cdir, part, [c for c in wanted if c in present], False)
+        frames.append(df[kept[offset:offset + part["rows"]]])
+        offset += part["rows"]
+    df = pd.concat(frames, ignore_index=True)
+    df = df.iloc[np.searchsorted(np.flatnonzero(kept), order)].reindex(columns=wanted)
+    return normalize_frame(df)
+
+
+def read_table(source_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Legge un workbook passando dalla cache colonnare.
+    Se `columns` è indicato legge solo quelle colonne (quelle assenti vengono ignorate).
+    """
+    meta = ensure_cached(source_path)
+    cdir = cache_dir_for(source_path)
+    wanted = meta["columns"] if columns is None else [c for c in columns if c in set(meta["columns"])]
+    if meta.get("parts"):
+        return _read_parts(cdir, meta["parts"], wanted)
+    return _read_files(cdir, meta, wanted, columns is None)
+
+
+def _parquet_null_counts(pf, columns: List[str]) -> Dict[str, int]:
+    """Mancanti per colonna dalle statistiche dei row group (letti dai dati se mancano)"""
+    md = pf.metadata
+    index = {pf.schema_arrow.field(j).name: j for j in range(md.num_columns)}
+    counts: Dict[str, int] = {}
+    missing = []
+    for c in columns:
+        total = 0
+        for rg in range(md.num_row_groups):
+            stats = md.row_group(rg).column(index[c]).statistics
+            if stats is None or not stats.has_null_count:
+                missing.append(c)
+                break
+            total += stats.null_count
+        else:
+            counts[c] = total
+    if missing:
+        table = pf.read(columns=missing)
+        counts.update({c: table.column(c).null_count for c in missing})
+    return counts
+
+
+def iter_table(source_path: str, columns: Optional[List[str]] = None,
+               chunk_rows: int = 5000) -> Iterator[pd.DataFrame]:
+    """Come `read_table`, ma a blocchi di al più `chunk_rows` righe letti dal Parquet uno alla volta.
+    Ogni blocco ha gli stessi tipi che avrebbe la colonna letta per intero (es. interi con
+    mancanti come float64); le colonne del pickle affiancato, di solito poche, sono lette una volta.
+    """
+    meta = ensure_cached(source_path)
+    cdir = cache_dir_for(source_path)
+    wanted = meta["columns"] if columns is None else [c for c in columns if c in set(meta["columns"])]
+    sidecar_cols = set(meta.get("sidecar_columns", []))
+    parquet_cols = [c for c in wanted if c not in sidecar_cols]
+    if pq is None or not meta.get("data_file") or not parquet_cols or not meta.get("rows"):
+        df = read_table(source_path, columns)
+        for start in range(0, max(len(df), 1), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+        return
+
+    side = None
+    if meta.get("sidecar_file") and sidecar_cols.intersection(wanted):
+        side = pd.read_pickle(os.path.join(cdir, meta["sidecar_file"]))
+        side = side[[c for c in side.columns if c in set(wanted)]]
+
+    pf = pq.ParquetFile(os.path.join(cdir, meta["data_file"]))
+    schema = pf.schema_arrow
+    nullable = [c for c in parquet_cols
+                if pa.types.is_integer(schema.field(c).type) or pa.types.is_boolean(schema.field(c).type)]
+    with_nulls = {c for c, n in _parquet_null_counts(pf, nullable).items() if n}
+    casts = {c: "float64" if pa.types.is_integer(schema.field(c).type) else object for c in with_nulls}
+
+    offset = 0
+    for batch in pf.iter_batches(batch_size=chunk_rows, columns=parquet_cols):
+        df = pa.Table.from_batches([batch]).to_pandas()
+        for c, dtype in casts.items():
+            if df[c].dtype != dtype:
+                df[c] = df[c].astype(dtype)
+        if side is not None:
+            part = side.iloc[offset:offset + len(df)].reset_index(drop=True)
+            df = pd.concat([df, part], axis=1)
+        if list(df.columns) != wanted:
+            df = df[wanted]
+        df.index = pd.RangeIndex(offset, offset + len(df))
+        offset += len(df)
+        yield _restore_missing(df)
+
+
+def cached_columns(source_path: str) -> Optional[List[str]]:
+    """Colonne del sorgente se la sua voce di cache è valida, senza leggere il file (altrimenti None)"""
+    meta = _read_meta(source_path)
+    try:
+        st = os.stat(source_path)
+    except OSError:
+        return list(meta["columns"]) if pending_entry(source_path) else None
+    if not _is_fresh(meta, st) or not _entry_exists(source_path, meta):
+        return None
+    return list(meta["columns"])
+
+
+def store_table(source_path: str, df: pd.DataFrame) -> Dict[str, Any]:
+    """Registra in cache un frame appena scritto su `source_path`, evitando di rileggerlo"""
+    with _entry_lock(source_path):
+        st = os.stat(source_path)
+        return _write_entry(source_path, normalize_frame(df), st, file_digest(source_path))
+
+
+def _link(src: str, dst: str):
+    # un hard link non copia i dati; dove il file system non li supporta si copia
+    tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def _frame_digest(base_sha1: str, df: pd.DataFrame, updated: np.ndarray) -> str:
+    h = hashlib.sha1(base_sha1.encode())
+    h.update(json.dumps([str(c) for c in df.columns], ensure_ascii=False).encode("utf-8"))
+    h.update(updated.astype(np.int64).tobytes())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def append_entry(base_path: str, source_path: str, df: pd.DataFrame, updated: Sequence[int]) -> Dict[str, Any]:
+    """
+    Registra in cache `source_path` come il dataset `base_path` aggiornato con le righe di `df`:
+    le prime `len(updated)` sostituiscono le righe in quelle posizioni, le altre sono accodate.
+
+    Si scrivono solo le righe di `df`; `source_path` resta da scrivere (`materialize`).
+    Con più di `CACHE_MAX_PARTS` parti la voce viene riscritta in un'unica parte.
+    """
+    updated = np.asarray(updated, dtype=np.int64)
+    df = df.reset_index(drop=True)
+    cdir = cache_dir_for(source_path)
+    with _entry_lock(base_path), _entry_lock(source_path):
+        base = _ensure_entry(base_path)
+        digest = _frame_digest(base["sha1"], df, updated)
+        stem = f"{os.path.basename(source_path)}.{digest[:16]}"
+        parts = []
+        for i, part in enumerate(base.get("parts") or [dict(base, updated=[])]):
+            linked = {k: part[k] for k in ("rows", "columns", "sidecar_columns", "updated")}
+            for key in ("data_file", "sidecar_file"):
+                linked[key] = None
+                if part.get(key):
+                    linked[key] = f"{stem}.{i}{os.path.splitext(part[key])[1]}"
+                    _link(os.path.join(cache_dir_for(base_path), part[key]), os.path.join(cdir, linked[key]))
+            parts.append(linked)
+        data_file, sidecar_file, mixed = _write_frame(cdir, f"{stem}.{len(parts)}", df)
+        parts.append({"data_file": data_file, "sidecar_file": sidecar_file, "rows": len(df),
+                      "columns": [str(c) for c in df.columns], "sidecar_columns": [str(c) for c in mixed],
+                      "updated": updated.tolist()})
+        columns = list(base["columns"]) + [str(c) for c in df.columns if str(c) not in set(base["columns"])]
+        if len(parts) > CACHE_MAX_PARTS:
+            return _write_entry(source_path, _read_parts(cdir, parts, columns), None, digest)
+        rows = int(base["rows"]) + len(df) - len(updated)
+        return _commit_entry(source_path, None, digest, None, None, rows, columns, [], parts)
+
+
+def pending_entry(source_path: str) -> Optional[Dict[str, Any]]:
+    """Metadati della voce se il sorgente esiste solo in cache, in attesa di `materialize`; altrimenti None"""
+    if os.path.exists(source_path):
+        return None
+    meta = _read_meta(source_path)
+    if meta and meta.get("pending") and _entry_exists(source_path, meta):
+        return meta
+    return None
+
+
+def source_exists(source_path: str) -> bool:
+    """Vero se il sorgente esiste su disco o come voce in attesa di essere scritta"""
+    return os.path.isfile(source_path) or pending_entry(source_path) is not None
+
+
+def materialize(source_path: str, write: Callable[[pd.DataFrame, str], None]) -> Dict[str, Any]:
+    """
+    Scrive con `write(frame, percorso)` il sorgente di una voce in attesa; se esiste già non fa nulla.
+    La voce non cambia: il sorgente ne riceve solo mtime, dimensione e `file_sha1`.
+    """
+    meta = ensure_cached(source_path)
+    if not meta.get("pending"):
+        return meta
+    tmp = f"{source_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(read_table(source_path), tmp)
+        with _entry_lock(source_path):
+            current = _read_meta(source_path)
+            if current and current.get("pending") and current["sha1"] == meta["sha1"]:
+                os.replace(tmp, source_path)
+                st = os.stat(source_path)
+                current.update({"pending": False, "mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                                "file_sha1": file_digest(source_path)})
+                _write_json_atomic(_meta_path(source_path), current)
+                return current
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return ensure_cached(source_path)
+
+
+def source_digest(source_path: str) -> str:
+    """SHA-1 del sorgente: quello della voce di cache se valida, altrimenti dal file (senza analizzarlo)"""
+    meta = _read_meta(source_path)
+    try:
+        st = os.stat(source_path)
+    except FileNotFoundError:
+        if pending_entry(source_path):
+            return meta["sha1"]
+        raise
+    if _is_fresh(meta, st):
+        return meta["sha1"]
+    digest = file_digest(source_path)
+    return meta["sha1"] if meta and digest == meta.get("file_sha1") else digest
+
+
+def fingerprint(source_path: str) -> str:
+    """Impronta del contenuto del sorgente (SHA-1), riusando quella in cache se valida"""
+    return ensure_cached(source_path)["sha1"]
+
+
+def invalidate(source_path: str):
+    """Elimina la voce di cache associata al sorgente"""
+    with _entry_lock(source_path):
+        _remove_stale(source_path)
+        try:
+            os.remove(_meta_path(source_path))
+        except OSError:
+            pass
+
+
+def prune(directory: str) -> int:
+    """Rimuove le voci di cache i cui sorgenti non esistono più. Ritorna il numero di file eliminati."""
+    cdir = os.path.join(directory, CACHE_DIRNAME)
+    if not os.path.isdir(cdir):
+        return 0
+    removed = 0
+    for name in os.listdir(cdir):
+        if not name.endswith(".json"):
+            continue
+        source = os.path.join(directory, name[: -len(".json")])
+        if source_exists(source):
+            continue
+        _remove_stale(source)
+        try:
+            os.remove(os.path.join(cdir, name))
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class CacheWriter:
+    """Costruisce la voce di cache di un file scritto a blocchi di righe (es. merge in streaming).
+
+    `dtypes` fissa in anticipo il tipo finale di ogni colonna (`int64`, `float64`,
+    `object`, `datetime64[ns]`, `bool`), così ogni blocco può andare subito nel
+    Parquet; le colonne `mixed` vengono accumulate e salvate nel pickle affiancato.
+    `commit()` va chiamato dopo aver completato il file sorgente.
+    """
+
+    def __init__(self, source_path: str, dtypes: Dict[str, str]):
+        self.source_path = source_path
+        self.columns = list(dtypes)
+        self.dtypes = dict(dtypes) if pa is not None else {c: "mixed" for c in dtypes}
+        self.mixed = [c for c in self.columns if self.dtypes[c] == "mixed"]
+        self.columnar = [c for c in self.columns if self.dtypes[c] != "mixed"]
+        self.rows = 0
+        self._sidecar: List[pd.DataFrame] = []
+        self._writer = None
+        self._schema = None
+        if self.columnar:
+            arrow_types = {"int64": pa.int64(), "float64": pa.float64(), "object": pa.string(),
+                           "datetime64[ns]": pa.timestamp("ns"), "bool": pa.bool_()}
+            self._schema = pa.schema([(c, arrow_types[self.dtypes[c]]) for c in self.columnar])
+        self._cdir = cache_dir_for(source_path)
+        self._suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        self._parquet_tmp = os.path.join(self._cdir, os.path.basename(source_path) + ".parquet" + self._suffix)
+
+    def append(self, df: pd.DataFrame):
+        """Aggiunge un blocco di righe con (almeno) le colonne dichiarate"""
+        if self.columnar:
+            # colonna per colonna con lo schema fisso: un blocco con una colonna
+            # tutta vuota resta del tipo dichiarato
+            series = dict(df.items())
+            arrays = []
+            for field in self._schema:
+                col = series[field.name]
+                target = self.dtypes[field.name]
+                if col.dtype != target:
+                    col = col.astype(target)
+                arrays.append(pa.array(col, type=field.type, from_pandas=True))
+            table = pa.Table.from_arrays(arrays, schema=self._schema)
+            if self._writer is None:
+                os.makedirs(self._cdir, exist_ok=True)
+                self._writer = pq.ParquetWriter(self._parquet_tmp, table.schema)
+            self._writer.write_table(table)
+        if self.mixed:
+            self._sidecar.append(df[self.mixed].astype(object).reset_index(drop=True))
+        self.rows += len(df)
+
+    def commit(self) -> Dict[str, Any]:
+        with _entry_lock(self.source_path):
+            st = os.stat(self.source_path)
+            digest = file_digest(self.source_path)
+            stem = os.path.join(self._cdir, f"{os.path.basename(self.source_path)}.{digest[:16]}")
+            data_file = sidecar_file = None
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+                data_file = os.path.basename(stem) + ".parquet"
+                os.replace(self._parquet_tmp, stem + ".parquet")
+            if self.mixed or data_file is None:
+                os.makedirs(self._cdir, exist_ok=True)
+                side = (pd.concat(self._sidecar, ignore_index=True) if self._sidecar
+                        else pd.DataFrame(columns=self.mixed))
+                self._sidecar = []
+                sidecar_file = os.path.basename(stem) + ".pickle"
+                side.to_pickle(stem + ".pickle" + self._suffix)
+                os.replace(stem + ".pickle" + self._suffix, stem + ".pickle")
+            return _commit_entry(self.source_path, st, digest, data_file, sidecar_file,
+                                 self.rows, self.columns, self.mixed)
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._sidecar = []
+        try:
+            os.remove(self._parquet_tmp)
+        except OSError:
+            pass
@@ -0,0 +1,171 @@
+"""
+Copertura per file di un dataset unito: per ogni `file_number` (ondata/export
+di origine) e ogni colonna, quante risposte non sono vuote.
+
+La matrice file × colonna si calcola in un passaggio sui blocchi di righe del
+Parquet in cache: per ogni blocco la maschera dei valori validi viene dalle
+bitmap di validità di Arrow (senza convertire le stringhe in oggetti Python)
+e i conteggi per file sono un'unica somma per gruppi (`np.add.reduceat`) sulle
+righe ordinate per file. Il risultato è salvato accanto alla voce di cache del
+file unito (`<file>.<sha1>.coverage.pickle`) e viene eliminato con essa quando
+il file cambia. Il merge in streaming lo prepara già durante la scrittura
+(`CoverageCounter`), così la prima richiesta non rilegge il file unito.
+"""
+import os
+import pickle
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .columnar_cache import cache_dir_for, ensure_cached, iter_table, pq, read_table
+from .dataset_manifest import resolve
+
+FILE_COLUMN = "file_number"
+CHUNK_ROWS = 50000
+
+
+def _coverage_path(source_path: str, meta: Dict[str, Any]) -> str:
+    return os.path.join(cache_dir_for(source_path),
+                        f"{os.path.basename(source_path)}.{meta['sha1'][:16]}.coverage.pickle")
+
+
+def _save(source_path: str, meta: Dict[str, Any], result: Dict[str, Any]):
+    path = _coverage_path(source_path, meta)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+class CoverageCounter:
+    """Conteggi per file accumulati mentre si scrive un file unito, un frame per file di origine"""
+
+    def __init__(self, columns: List[str]):
+        self.columns = [c for c in columns if c != FILE_COLUMN]
+        self.counts: Dict[Any, np.ndarray] = {}
+        self.rows: Dict[Any, int] = {}
+
+    def add(self, file_number: Any, df: pd.DataFrame):
+        if len(df) == 0:
+            return
+        counts = df[self.columns].notna().sum().to_numpy(dtype=np.int64)
+        self.counts[file_number] = self.counts.get(file_number, 0) + counts
+        self.rows[file_number] = self.rows.get(file_number, 0) + len(df)
+
+    def save(self, source_path: str, meta: Dict[str, Any]):
+        """Salva i conteggi per la voce di cache `meta` appena scritta per `source_path`"""
+        files = sorted(self.counts)
+        counts = (np.vstack([self.counts[f] for f in files]) if files
+                  else np.zeros((0, len(self.columns)), dtype=np.int64))
+        _save(source_path, meta, {
+            "files": files,
+            "rows_in_file": [self.rows[f] for f in files],
+            "columns": self.columns,
+            "counts": counts,
+        })
+
+
+def _group_sums(mask: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """Somma delle righe di `mask` per codice di gruppo: (n_groups, colonne)"""
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sums = np.zeros((n_groups, mask.shape[1]), dtype=np.int64)
+    if len(order):
+        sums[sorted_codes[starts]] = np.add.reduceat(mask[order], starts, axis=0, dtype=np.int64)
+    return sums
+
+
+def _mask_blocks(source_path: str, meta: Dict[str, Any], columns: List[str]):
+    """Maschere (righe del blocco × colonne) dei valori non nulli, blocco per blocco"""
+    cdir = cache_dir_for(source_path)
+    sidecar = set(meta.get("sidecar_columns", []))
+    parquet_cols = [c for c in columns if c not in sidecar]
+    if pq is None or not meta.get("data_file") or not parquet_cols:
+        for chunk in iter_table(source_path, columns, CHUNK_ROWS):
+            yield chunk[columns].notna().to_numpy()
+        return
+
+    side_mask = None
+    if sidecar.intersection(columns):
+        side = pd.read_pickle(os.path.join(cdir, meta["sidecar_file"]))
+        side_mask = side[[c for c in columns if c in sidecar]].notna().to_numpy()
+    position = {c: i for i, c in enumerate(columns)}
+    side_positions = [position[c] for c in columns if c in sidecar]
+    parquet_positions = [position[c] for c in parquet_cols]
+
+    pf = pq.ParquetFile(os.path.join(cdir, meta["data_file"]))
+    offset = 0
+    for batch in pf.iter_batches(batch_size=CHUNK_ROWS, columns=parquet_cols):
+        n = batch.num_rows
+        mask = np.empty((n, len(columns)), dtype=np.uint8)
+        for j, array in zip(parquet_positions, batch.columns):
+            if array.null_count == 0:
+                mask[:, j] = 1
+            elif array.null_count == n:
+                mask[:, j] = 0
+            else:
+                mask[:, j] = array.is_valid().to_numpy(zero_copy_only=False)
+        if side_mask is not None:
+            mask[:, side_positions] = side_mask[offset:offset + n]
+        offset += n
+        yield mask
+
+
+def compute_coverage(source_path: str) -> Dict[str, Any]:
+    """Conteggi dei non nulli per file e colonna del file unito (dalla cache se già calcolati)"""
+    meta = ensure_cached(source_path)
+    path = _coverage_path(source_path, meta)
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+
+    if FILE_COLUMN not in meta["columns"]:
+        raise ValueError(f"Dataset has no {FILE_COLUMN} column")
+    files = read_table(source_path, [FILE_COLUMN])[FILE_COLUMN]
+    codes, uniques = pd.factorize(files, sort=True, use_na_sentinel=False)
+    columns = [c for c in meta["columns"] if c != FILE_COLUMN]
+
+    counts = np.zeros((len(uniques), len(columns)), dtype=np.int64)
+    offset = 0
+    for mask in _mask_blocks(source_path, meta, columns):
+        counts += _group_sums(mask, codes[offset:offset + len(mask)], len(uniques))
+        offset += len(mask)
+
+    result = {
+        "files": [None if pd.isna(v) else v.item() if hasattr(v, "item") else v for v in uniques],
+        "rows_in_file": np.bincount(codes, minlength=len(uniques)).tolist(),
+        "columns": columns,
+        "counts": counts,
+    }
+    _save(source_path, meta, result)
+    return result
+
+
+def coverage_matrix(file_path: str, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Matrice file × colonna di un dataset (file unito o manifest), limitata a `columns` se indicato"""
+    source, selected = resolve(file_path)
+    coverage = compute_coverage(source)
+    wanted = coverage["columns"]
+    if selected is not None:
+        wanted = [c for c in selected if c != FILE_COLUMN]
+    if columns is not None:
+        keep = set(columns)
+        wanted = [c for c in wanted if c in keep]
+    index = {c: i for i, c in enumerate(coverage["columns"])}
+    wanted = [c for c in wanted if c in index]
+    counts = coverage["counts"][:, [index[c] for c in wanted]]
+    rows = np.asarray(coverage["rows_in_file"], dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(rows[:, None] > 0, np.round(100.0 * counts / rows[:, None], 2), 0.0)
+    return {
+        "files": coverage["files"],
+        "rows_in_file": coverage["rows_in_file"],
+        "columns": wanted,
+        "non_null_count": counts.tolist(),
+        "non_null_pct": pct.tolist(),
+    }
@@ -0,0 +1,127 @@
+"""
+Lettura degli export LimeSurvey in CSV (anche compressi .csv.gz).
+
+Separatore (`,` `;` tab `|`) e codifica (UTF-8 con o senza BOM, altrimenti
+cp1252) vengono ricavati dai primi KB del file; il parsing usa il lettore
+colonnare multithread di pyarrow, che inferisce i tipi in un solo passaggio
+(senza pyarrow si ripiega su `pandas.read_csv`). Il frame risultante segue le
+stesse convenzioni di `read_excel` (celle vuote e segnaposto come "NA", "N/A" o
+"null" = mancanti NaN, numeri interi come int64, intestazioni ripetute
+rinominate in `nome.1`, `nome.2`, ...), così i CSV
+e gli Excel passano indistintamente da cache, merge e analisi.
+"""
+import csv
+import gzip
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa_csv = None
+
+CSV_EXTENSIONS = (".csv", ".csv.gz")
+SNIFF_BYTES = 64 * 1024
+DELIMITERS = ",;\t|"
+# valori letti come mancanti da pyarrow: l'insieme predefinito di read_excel e read_csv
+# (STR_NA_VALUES di pandas)
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+def is_csv(path: str) -> bool:
+    return path.lower().endswith(CSV_EXTENSIONS)
+
+
+def _head(path: str) -> bytes:
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    with opener(path, "rb") as f:
+        return f.read(SNIFF_BYTES)
+
+
+def detect_format(path: str) -> Tuple[str, str]:
+    """(separatore, codifica) del file"""
+    head = _head(path)
+    if head.startswith(b"\xef\xbb\xbf"):
+        encoding = "utf-8-sig"
+    else:
+        try:
+            head.decode("utf-8")
+            encoding = "utf-8"
+        except UnicodeDecodeError as e:
+            # il campione può troncare un carattere multibyte proprio alla fine
+            encoding = "utf-8" if e.start >= len(head) - 3 else "cp1252"
+    text = head.decode(encoding, errors="ignore")
+    # l'intestazione degli export LimeSurvey basta a riconoscere il separatore
+    sample = "\n".join(text.splitlines()[:20])
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        first = text.splitlines()[0] if text else ""
+        delimiter = max(DELIMITERS, key=first.count) if any(d in first for d in DELIMITERS) else ","
+    return delimiter, encoding
+
+
+def dedupe_columns(names: List[str]) -> List[str]:
+    """
+    Nomi di colonna come li restituisce read_excel: le intestazioni vuote diventano
+    "Unnamed: i" e le ripetizioni `nome.1`, `nome.2`, ... (saltando i nomi già
+    presenti nell'intestazione).
+    """
+    names = [str(n) if n is not None and str(n) != "" else f"Unnamed: {i}" for i, n in enumerate(names)]
+    present = set(names)
+    counts = {}
+    out = []
+    for name in names:
+        base, count = name, counts.get(name, 0)
+        while count > 0:
+            counts[base] = count + 1
+            name = f"{base}.{count}"
+            count = count + 1 if name in present else counts.get(name, 0)
+        out.append(name)
+        counts[name] = count + 1
+    return out
+
+
+def _excel_like(df: pd.DataFrame) -> pd.DataFrame:
+    # come read_excel: mancanti come NaN (pyarrow dà None nelle colonne di testo) e
+    # colonne float senza mancanti e tutte intere come int64
+    for c in df.columns:
+        s = df[c]
+        if s.dtype == object and s.isna().any():
+            df[c] = s.where(s.notna(), np.nan)
+        elif s.dtype.kind == "f" and len(s) and s.notna().all() and np.all(np.mod(s.to_numpy(), 1) == 0):
+            df[c] = s.astype("int64")
+    return df
+
+
+def read_csv_table(path: str) -> pd.DataFrame:
+    """Legge un export CSV/CSV.gz in un DataFrame"""
+    delimiter, encoding = detect_format(path)
+    if pa_csv is None:
+        df = pd.read_csv(path, sep=delimiter, encoding=encoding, compression="infer")
+        return _excel_like(df)
+    table = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=True, encoding="utf8" if encoding.startswith("utf-8") else encoding),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter, newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(null_values=NA_VALUES, strings_can_be_null=True,
+                                              quoted_strings_can_be_null=True),
+    )
+    # pyarrow tiene le intestazioni ripetute: con nomi doppi df[c] sarebbe un DataFrame
+    table = table.rename_columns(dedupe_columns(table.column_names))
+    df = table.to_pandas(coerce_temporal_nanoseconds=True)
+    return _excel_like(df)
+
+
+def read_csv_header(path: str) -> List[str]:
+    """Nomi delle colonne dalla sola prima riga del file"""
+    delimiter, encoding = detect_format(path)
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    with opener(path, "rt", encoding=encoding, newline="") as f:
+        header = next(csv.reader(f, delimiter=delimiter), [])
+    return dedupe_columns(header)
@@ -0,0 +1,146 @@
+"""
+Dataset virtuali: un `dataset_<timestamp>.json` descrive una selezione di
+colonne invece di copiarla in un nuovo workbook.
+
+Il manifest registra il file sorgente (di solito il merged, nella stessa
+cartella), le colonne selezionate nell'ordine di analisi e gli input
+dell'analisi degli header da cui è nata la selezione. I dati vengono
+materializzati solo al caricamento, come proiezione colonnare della cache del
+sorgente (vedi `columnar_cache.read_table`): provare selezioni diverse non
+aggiunge altro che qualche KB di JSON.
+
+Come la copia fisica che sostituisce, un manifest fotografa il sorgente al
+momento della selezione: ne registra lo SHA-1 e, se il sorgente cambia dopo
+(un merge in append, un file sovrascritto), il dataset risulta obsoleto
+(`StaleDatasetError`) invece di seguirne il nuovo contenuto.
+
+Le funzioni accettano indifferentemente un manifest o un workbook/CSV, così i
+vecchi `dataset_*.xlsx` continuano a funzionare.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .columnar_cache import ensure_cached, fingerprint, normalize_frame, read_table, source_digest, source_exists
+
+MANIFEST_VERSION = 1
+MANIFEST_PREFIX = "dataset_"
+MANIFEST_SUFFIX = ".json"
+# campi dell'analisi degli header usati da `SurveyAnalyzer.select_useful_columns`
+HEADER_INPUT_FIELDS = ("original_name", "non_null_count", "unique_count_non_null")
+
+
+class StaleDatasetError(ValueError):
+    """Il sorgente del manifest è cambiato dopo la selezione delle colonne"""
+
+
+def is_manifest(path: str) -> bool:
+    name = os.path.basename(path).lower()
+    return name.startswith(MANIFEST_PREFIX) and name.endswith(MANIFEST_SUFFIX)
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION or not manifest.get("source"):
+        raise ValueError(f"Invalid dataset manifest: {os.path.basename(path)}")
+    return manifest
+
+
+def resolve(path: str, verify: bool = True) -> Tuple[str, Optional[List[str]]]:
+    """(file sorgente, colonne da leggere) del dataset; le colonne sono None per un workbook.
+    Con `verify` un manifest il cui sorgente non ha più lo SHA-1 registrato solleva `StaleDatasetError`.
+    """
+    if not is_manifest(path):
+        return path, None
+    manifest = read_manifest(path)
+    source = os.path.join(os.path.dirname(os.path.abspath(path)), os.path.basename(manifest["source"]))
+    expected = manifest.get("source_sha1")
+    if verify and expected and source_exists(source) and source_digest(source) != expected:
+        raise StaleDatasetError(
+            f"Dataset {os.path.basename(path)} is stale: {os.path.basename(source)} changed after the "
+            f"columns were selected; select the columns again"
+        )
+    return source, list(manifest["columns"])
+
+
+def dataset_exists(path: str) -> bool:
+    """Vero se il dataset e, per un manifest, il suo sorgente esistono ancora (anche se obsoleto)"""
+    if not source_exists(path):
+        return False
+    try:
+        return source_exists(resolve(path, verify=False)[0])
+    except (OSError, ValueError):
+        return False
+
+
+def available_columns(path: str) -> List[str]:
+    """Colonne del dataset, senza leggerne i dati"""
+    source, columns = resolve(path)
+    present = ensure_cached(source)["columns"]
+    if columns is None:
+        return present
+    present = set(present)
+    return [c for c in columns if c in present]
+
+
+def dataset_rows(path: str) -> int:
+    return int(ensure_cached(resolve(path)[0])["rows"])
+
+
+def read_dataset(path: str) -> pd.DataFrame:
+    """Legge il dataset: per un manifest solo le sue colonne del sorgente"""
+    source, columns = resolve(path)
+    if columns is None:
+        return read_table(source)
+    if not source_exists(source):
+        raise FileNotFoundError(f"Source of dataset {os.path.basename(path)} not found: {os.path.basename(source)}")
+    # stessi valori che darebbe la rilettura di un workbook con le sole colonne selezionate
+    return normalize_frame(read_table(source, columns))
+
+
+def dataset_fingerprint(path: str) -> str:
+    """Impronta del contenuto: per un manifest combina quella del sorgente e le colonne"""
+    source, columns = resolve(path)
+    if columns is None:
+        return fingerprint(source)
+    h = hashlib.sha1(fingerprint(source).encode())
+    h.update(json.dumps(columns, ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()
+
+
+def write_manifest(folder: str, source_path: str, columns: List[str],
+                   headers_analysis: Optional[List[dict]] = None) -> str:
+    """Scrive `dataset_<timestamp>.json` in `folder` e ne restituisce il percorso"""
+    source, parent_columns = resolve(source_path)
+    if parent_columns is not None:
+        # selezione a partire da un altro dataset virtuale: si punta direttamente al suo sorgente
+        columns = [c for c in columns if c in set(parent_columns)]
+    meta = ensure_cached(source)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "source": os.path.basename(source),
+        "source_sha1": meta["sha1"],
+        "rows": meta["rows"],
+        "columns": list(columns),
+        "headers_analysis": [
+            {k: row.get(k) for k in HEADER_INPUT_FIELDS} for row in (headers_analysis or [])
+        ],
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(folder, f"{MANIFEST_PREFIX}{timestamp}{MANIFEST_SUFFIX}")
+    n = 1
+    while os.path.exists(path):
+        path = os.path.join(folder, f"{MANIFEST_PREFIX}{timestamp}_{n}{MANIFEST_SUFFIX}")
+        n += 1
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
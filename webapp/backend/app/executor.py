@@ -0,0 +1,167 @@
+"""
+Esecuzione del lavoro bloccante (pandas, openpyxl, I/O su file) fuori
+dall'event loop di FastAPI.
+
+- `SURVEY_EXECUTOR`: `thread` (default) o `process`. In modalità `process`
+  solo le funzioni marcate come `stateless` (funzioni di modulo con argomenti
+  serializzabili) e non `read_only` vanno nel pool di processi; il resto usa i thread,
+  perché lavora sugli analyzer in memoria del progetto.
+- `SURVEY_EXECUTOR_WORKERS`: dimensione dei pool (default: min(8, CPU)).
+  Le letture (`read_only`) hanno un proprio pool di thread della stessa
+  dimensione, così non restano senza worker finché durano merge e caricamenti.
+- `SURVEY_PROJECT_CONCURRENCY`: operazioni che modificano il progetto
+  (upload, merge, selezione, caricamento, job) simultanee per progetto
+  (default 1), così due caricamenti dello stesso progetto non si sovrappongono
+  su `proj.analyzer`.
+- `SURVEY_PROJECT_READ_CONCURRENCY`: letture simultanee per progetto (analisi
+  di una domanda, copertura, ricerca nel testo, ...; default 4). Le letture
+  (`read_only`) hanno un limite separato e non aspettano in coda dietro a un
+  merge o a un caricamento lungo dello stesso progetto.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+EXECUTOR_KIND = os.environ.get("SURVEY_EXECUTOR", "thread").strip().lower()
+EXECUTOR_WORKERS = int(os.environ.get("SURVEY_EXECUTOR_WORKERS", str(min(8, os.cpu_count() or 1))))
+PROJECT_CONCURRENCY = int(os.environ.get("SURVEY_PROJECT_CONCURRENCY", "1"))
+PROJECT_READ_CONCURRENCY = int(os.environ.get("SURVEY_PROJECT_READ_CONCURRENCY", "4"))
+
+
+class BlockingExecutor:
+    """Pool di thread/processi con limite di concorrenza per progetto e metriche di coda"""
+
+    def __init__(self, kind: str = EXECUTOR_KIND, workers: int = EXECUTOR_WORKERS,
+                 per_project: int = PROJECT_CONCURRENCY, per_project_reads: int = PROJECT_READ_CONCURRENCY):
+        self.kind = kind if kind in ("thread", "process") else "thread"
+        self.workers = max(1, workers)
+        self.per_project = max(1, per_project)
+        self.per_project_reads = max(1, per_project_reads)
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._read_threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        # (progetto, read_only) -> semaforo: scritture e letture hanno code separate
+        self._project_slots: Dict[Tuple[str, bool], asyncio.Semaphore] = {}
+        self._guard = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.waiting = 0  # in attesa dello slot di progetto o di un worker libero
+        self.running = 0
+        self.max_queue_depth = 0
+
+    def _pool(self, stateless: bool, read_only: bool = False) -> Executor:
+        with self._guard:
+            if read_only:
+                if self._read_threads is None:
+                    self._read_threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="survey-read")
+                return self._read_threads
+            if stateless and self.kind == "process":
+                if self._processes is None:
+                    self._processes = ProcessPoolExecutor(max_workers=self.workers)
+                return self._processes
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="survey-worker")
+            return self._threads
+
+    def _slot(self, project_id: str, read_only: bool) -> asyncio.Semaphore:
+        key = (project_id, read_only)
+        slot = self._project_slots.get(key)
+        if slot is None:
+            limit = self.per_project_reads if read_only else self.per_project
+            slot = self._project_slots[key] = asyncio.Semaphore(limit)
+        return slot
+
+    def _mark_started(self, state: Dict[str, bool]) -> bool:
+        with self._guard:
+            if state["started"]:
+                return False
+            state["started"] = True
+            self.waiting -= 1
+            self.running += 1
+            return True
+
+    def _mark_finished(self):
+        with self._guard:
+            self.running -= 1
+            self.completed += 1
+
+    async def _submit(self, call: Callable[[], Any], stateless: bool, read_only: bool,
+                      state: Dict[str, bool]) -> Any:
+        loop = asyncio.get_running_loop()
+        pool = self._pool(stateless, read_only)
+        if isinstance(pool, ProcessPoolExecutor):
+            # la funzione deve restare serializzabile: niente wrapper, si conta all'invio
+            self._mark_started(state)
+            future = loop.run_in_executor(pool, call)
+            future.add_done_callback(lambda _f: self._mark_finished())
+            return await future
+
+        def tracked():
+            if not self._mark_started(state):
+                return None  # richiesta già abbandonata prima di partire
+            try:
+                return call()
+            finally:
+                self._mark_finished()
+        # il contesto segue la chiamata nel thread (es. i tempi della richiesta in `metrics`)
+        return await loop.run_in_executor(pool, contextvars.copy_context().run, tracked)
+
+    async def run(self, fn: Callable[..., Any], *args, project_id: Optional[str] = None,
+                  stateless: bool = False, read_only: bool = False, **kwargs) -> Any:
+        """
+        Esegue `fn(*args, **kwargs)` nel pool e ne attende il risultato senza bloccare il loop.
+        Con `read_only` la chiamata non modifica il progetto e usa gli slot e il pool di lettura.
+        """
+        with self._guard:
+            self.submitted += 1
+            self.waiting += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.waiting)
+        call = functools.partial(fn, *args, **kwargs)
+        state = {"started": False}
+        try:
+            if project_id is None:
+                return await self._submit(call, stateless, read_only, state)
+            async with self._slot(project_id, read_only):
+                return await self._submit(call, stateless, read_only, state)
+        except BaseException:
+            with self._guard:
+                self.failed += 1
+            raise
+        finally:
+            with self._guard:
+                # annullata prima di partire: esce dalla coda senza essere mai eseguita
+                if not state["started"]:
+                    state["started"] = True
+                    self.waiting -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._guard:
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "per_project_limit": self.per_project,
+                "per_project_read_limit": self.per_project_reads,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "queue_depth": self.waiting,
+                "running": self.running,
+                "max_queue_depth": self.max_queue_depth,
+            }
+
+    def shutdown(self):
+        with self._guard:
+            if self._threads is not None:
+                self._threads.shutdown(wait=False, cancel_futures=True)
+                self._threads = None
+            if self._read_threads is not None:
+                self._read_threads.shutdown(wait=False, cancel_futures=True)
+                self._read_threads = None
+            if self._processes is not None:
+                self._processes.shutdown(wait=False, cancel_futures=True)
+                self._processes = None
@@ -0,0 +1,184 @@
+"""
+Analisi delle intestazioni in due modalità.
+
+- `header_columns`/`header_only`: nomi delle colonne, nome normalizzato e
+  gruppi di duplicati logici leggendo al più la prima riga del file (o
+  nessuna, se il sorgente è già nella cache colonnare o il dataset è un
+  manifest).
+- `scan_headers`: statistiche complete in un solo passaggio a blocchi di righe
+  (vedi `columnar_cache.iter_table`). Per ogni colonna restano in memoria solo
+  contatori, al più tre esempi e uno sketch KMV (k minimum values) degli hash
+  dei valori distinti: il conteggio è esatto fino a `DISTINCT_SKETCH_SIZE`
+  valori distinti, poi è una stima con errore relativo di circa 1/sqrt(k).
+  Le soglie usate da `SurveyAnalyzer.select_useful_columns` (poche decine di
+  valori) cadono quindi sempre nel caso esatto.
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .columnar_cache import cached_columns, iter_table
+from .csv_source import is_csv, read_csv_header
+from .dataset_manifest import resolve
+
+CHUNK_ROWS = 5000
+DISTINCT_SKETCH_SIZE = 1024
+SAMPLE_VALUES = 3
+
+
+def _combine_dtype(current: Optional[np.dtype], new: np.dtype):
+    """Tipo della colonna intera a partire da quelli dei blocchi"""
+    if current is None or current == new:
+        return new
+    if current.kind in "iuf" and new.kind in "iuf":
+        return np.dtype("float64")
+    return np.dtype(object)
+
+
+def _value_key(v) -> str:
+    # chiave testuale con l'uguaglianza di `nunique`: 10 e 10.0 coincidono, 10 e "10" no
+    if isinstance(v, str):
+        return "s" + v
+    if isinstance(v, (int, float, np.number)):
+        v = float(v)
+        return "n" + repr(int(v) if v.is_integer() else v)
+    return "o" + str(v)
+
+
+def _hash_values(values: pd.Series) -> np.ndarray:
+    """Hash a 64 bit dei valori non nulli di un blocco"""
+    if values.dtype.kind in "iuf":
+        return pd.util.hash_array(values.to_numpy(dtype=np.float64))
+    array = values.to_numpy()
+    if values.dtype == object and pd.api.types.infer_dtype(array, skipna=False) != "string":
+        # colonne a tipi misti: gli hash di pandas confonderebbero 10 e "10"
+        array = np.array([_value_key(v) for v in array], dtype=object)
+    return pd.util.hash_array(array)
+
+
+class ColumnScan:
+    """Statistiche di una colonna aggiornate blocco per blocco, in memoria costante"""
+
+    def __init__(self, name: str, k: int = DISTINCT_SKETCH_SIZE):
+        self.name = name
+        self.k = k
+        self.rows = 0
+        self.non_null = 0
+        self.dtype = None
+        self.integral = True
+        # i k hash più piccoli tra quelli dei valori visti, ordinati
+        self.sketch = np.empty(0, dtype=np.uint64)
+        self.samples: List[Any] = []
+        self._sample_keys = set()
+
+    def update(self, s: pd.Series):
+        self.rows += len(s)
+        self.dtype = _combine_dtype(self.dtype, s.dtype)
+        values = s[s.notna()]
+        if values.empty:
+            return
+        self.non_null += len(values)
+        if self.integral and values.dtype.kind == "f":
+            self.integral = bool(np.all(np.mod(values.to_numpy(), 1) == 0))
+        hashes = _hash_values(values)
+        self.sketch = np.union1d(self.sketch, np.unique(hashes)[:self.k])[:self.k]
+        if len(self.samples) < SAMPLE_VALUES:
+            # primi valori distinti come testo, nell'ordine di comparsa
+            for v in values.unique():
+                key = str(v)
+                if key not in self._sample_keys:
+                    self._sample_keys.add(key)
+                    self.samples.append(v)
+                    if len(self.samples) == SAMPLE_VALUES:
+                        break
+
+    def distinct(self):
+        """(valori distinti non nulli, True se il conteggio è esatto)"""
+        if len(self.sketch) < self.k:
+            return len(self.sketch), True
+        estimate = (self.k - 1) * 2.0 ** 64 / float(self.sketch[-1])
+        return min(int(round(estimate)), self.non_null), False
+
+    def row(self, normalized: str, duplicate: bool, normalize_values: bool = False) -> Dict[str, Any]:
+        dtype = self.dtype if self.dtype is not None else np.dtype(object)
+        samples = self.samples
+        if self.non_null == 0:
+            # come read_excel per una colonna senza valori
+            dtype = np.dtype("float64")
+        elif normalize_values:
+            # valori come li restituisce `normalize_frame` per i dataset virtuali
+            if dtype.kind == "f" and self.non_null == self.rows and self.integral:
+                dtype = np.dtype("int64")
+                samples = [int(v) for v in samples]
+            elif dtype == object:
+                samples = [int(v) if isinstance(v, float) and v.is_integer() else v for v in samples]
+        unique, exact = self.distinct()
+        return {
+            'original_name': self.name,
+            'normalized_name': normalized,
+            'is_duplicate_normalized': duplicate,
+            'dtype': str(dtype),
+            'row_count': self.rows,
+            'non_null_count': self.non_null,
+            'null_count': self.rows - self.non_null,
+            # np.round (metà al pari), come `round` sul risultato di `Series.mean()`
+            'non_null_pct': float(np.round(100 * (self.non_null / self.rows), 2)) if self.rows else 0.0,
+            'unique_count_non_null': unique,
+            'unique_count_exact': exact,
+            'sample_values': ', '.join(str(v) for v in samples),
+        }
+
+
+def duplicate_groups(columns: List[str], normalize: Callable[[str], str]) -> Dict[str, List[str]]:
+    """Nomi normalizzati condivisi da più colonne"""
+    groups: Dict[str, List[str]] = {}
+    for c in columns:
+        groups.setdefault(normalize(c), []).append(str(c))
+    return {k: v for k, v in groups.items() if len(v) > 1 and k != ""}
+
+
+def header_columns(file_path: str) -> List[str]:
+    """Colonne del dataset leggendo al più la prima riga del file"""
+    source, columns = resolve(file_path)
+    if columns is not None:
+        return columns
+    cached = cached_columns(source)
+    if cached is not None:
+        return cached
+    if is_csv(source):
+        return read_csv_header(source)
+    return [str(c) for c in pd.read_excel(source, nrows=0).columns]
+
+
+def header_only(file_path: str, normalize: Callable[[str], str]) -> Dict[str, Any]:
+    columns = header_columns(file_path)
+    groups = duplicate_groups(columns, normalize)
+    rows = []
+    for c in columns:
+        n = normalize(c)
+        rows.append({'original_name': c, 'normalized_name': n, 'is_duplicate_normalized': n in groups})
+    return {"mode": "header", "headers": rows, "duplicate_groups": groups,
+            "total_rows": None, "total_columns": len(columns)}
+
+
+def scan_headers(file_path: str, normalize: Callable[[str], str], chunk_rows: int = CHUNK_ROWS) -> Dict[str, Any]:
+    """Statistiche di tutte le colonne in un passaggio a blocchi di `chunk_rows` righe"""
+    source, columns = resolve(file_path)
+    scans: Optional[List[ColumnScan]] = None
+    for chunk in iter_table(source, columns, chunk_rows):
+        if scans is None:
+            scans = [ColumnScan(c) for c in chunk.columns]
+        for scan, (_, s) in zip(scans, chunk.items()):
+            scan.update(s)
+    scans = scans or []
+
+    names = [scan.name for scan in scans]
+    groups = duplicate_groups(names, normalize)
+    rows = []
+    for scan in scans:
+        n = normalize(scan.name)
+        rows.append(scan.row(n, n in groups, normalize_values=columns is not None))
+    total_rows = scans[0].rows if scans else 0
+    return {"mode": "full", "headers": rows, "duplicate_groups": groups,
+            "total_rows": total_rows, "total_columns": len(rows)}
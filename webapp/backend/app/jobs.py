@@ -0,0 +1,256 @@
+"""
+Job in background per le operazioni lunghe (merge, selezione colonne,
+caricamento dataset).
+
+Ogni job ha un ID, uno stato, una fase corrente e contatori di avanzamento
+(file letti, righe scritte, gruppi analizzati). La cancellazione è
+cooperativa: la funzione del job riceve `job.report` come callback di
+avanzamento, che solleva `JobCancelled` alla prima occasione utile.
+
+I record vengono salvati in `jobs.json` accanto a `metadata.json`; dopo un
+riavvio i job rimasti in coda o in esecuzione risultano `interrupted`, mentre
+quelli conclusi conservano il loro risultato (es. il file prodotto).
+
+Con più worker il file è condiviso: ogni job registra il processo che lo esegue
+(`worker`), gli altri worker lo rileggono quando cambia e una cancellazione
+richiesta altrove arriva al job al salvataggio successivo del suo worker.
+"""
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from .columnar_cache import cache_dir_for
+from .shared_state import file_lock, file_stamp, read_json, worker_alive, worker_id, write_json_atomic
+
+JOBS_FILENAME = "jobs.json"
+MAX_JOBS_PER_PROJECT = 50
+FINISHED_STATES = {"succeeded", "failed", "cancelled", "interrupted"}
+
+
+class JobCancelled(Exception):
+    """Sollevata dentro il job quando ne è stata richiesta la cancellazione"""
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class Job:
+    def __init__(self, project_id: str, kind: str, params: Optional[Dict[str, Any]] = None,
+                 job_id: Optional[str] = None):
+        self.id = job_id or uuid4().hex[:12]
+        self.project_id = project_id
+        self.kind = kind
+        self.params = params or {}
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        self.progress: Dict[str, Any] = {}
+        self.created_at = _now()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.result: Optional[Any] = None
+        self.error: Optional[str] = None
+        self.worker = worker_id()
+        self._cancel = threading.Event()
+        self._on_change: Optional[Callable[["Job", bool], None]] = None
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def request_cancel(self):
+        self._cancel.set()
+
+    def report(self, stage: Optional[str] = None, **progress):
+        """Callback di avanzamento per le funzioni del job; interrompe il job se cancellato"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        stage_changed = stage is not None and stage != self.stage
+        if stage is not None:
+            self.stage = stage
+        self.progress.update(progress)
+        if self._on_change is not None:
+            self._on_change(self, stage_changed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "project_id": self.project_id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": dict(self.progress),
+            "cancel_requested": self.cancel_requested,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+            "worker": self.worker,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        job = cls(data.get("project_id", ""), data.get("kind", ""), data.get("params"), data.get("id"))
+        job.status = data.get("status", "failed")
+        job.stage = data.get("stage")
+        job.progress = data.get("progress") or {}
+        job.created_at = data.get("created_at", job.created_at)
+        job.started_at = data.get("started_at")
+        job.finished_at = data.get("finished_at")
+        job.result = data.get("result")
+        job.error = data.get("error")
+        job.worker = data.get("worker")
+        if data.get("cancel_requested"):
+            job.request_cancel()
+        return job
+
+
+class JobManager:
+    """Registro dei job per progetto, con esecuzione tramite l'executor condiviso"""
+
+    def __init__(self, executor, save_interval: float = 1.0):
+        self.executor = executor
+        self.save_interval = save_interval
+        self._jobs: Dict[str, Dict[str, Job]] = {}
+        self._dirs: Dict[str, str] = {}
+        self._stamps: Dict[str, Any] = {}
+        self._last_save: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._tasks: set = set()
+
+    # ---- Persistenza ----
+    def _path(self, project_id: str) -> str:
+        return os.path.join(self._dirs[project_id], JOBS_FILENAME)
+
+    def _lock_path(self, project_id: str) -> str:
+        return os.path.join(cache_dir_for(self._path(project_id)), "jobs.lock")
+
+    def _ensure_loaded(self, project_id: str, upload_dir: str) -> Dict[str, Job]:
+        with self._lock:
+            self._dirs[project_id] = upload_dir
+            jobs = self._jobs.setdefault(project_id, {})
+            stamp = file_stamp(self._path(project_id))
+            if project_id not in self._stamps or self._stamps[project_id] != stamp:
+                self._merge_from_disk(project_id)
+                self._stamps[project_id] = stamp
+            return self._jobs[project_id]
+
+    def _merge_from_disk(self, project_id: str):
+        """Fonde i job in memoria con quelli di `jobs.json`, scritti anche da altri worker"""
+        local = self._jobs.get(project_id, {})
+        me = worker_id()
+        jobs: Dict[str, Job] = {}
+        for item in (read_json(self._path(project_id)) or {}).get("jobs", []):
+            job = Job.from_dict(item)
+            mine = local.get(job.id)
+            if mine is not None and mine.worker == me:
+                # eseguito qui: lo stato in memoria è quello aggiornato, dagli altri arriva solo la cancellazione
+                if job.cancel_requested:
+                    mine.request_cancel()
+                jobs[job.id] = mine
+                continue
+            if mine is not None and mine.cancel_requested:
+                job.request_cancel()  # cancellazione chiesta qui, non ancora salvata
+            if job.status not in FINISHED_STATES and not worker_alive(job.worker):
+                # il processo che lo eseguiva non esiste più
+                job.status = "interrupted"
+                job.finished_at = job.finished_at or _now()
+            jobs[job.id] = job
+        for job in local.values():
+            if job.id not in jobs and job.worker == me:
+                jobs[job.id] = job
+        self._jobs[project_id] = jobs
+
+    def _save(self, project_id: str):
+        with self._lock:
+            path = self._path(project_id)
+            if not os.path.isdir(os.path.dirname(path)):
+                return
+            with file_lock(self._lock_path(project_id)):
+                self._merge_from_disk(project_id)
+                jobs = sorted(self._jobs[project_id].values(), key=lambda j: j.created_at)
+                jobs = jobs[-MAX_JOBS_PER_PROJECT:]
+                self._jobs[project_id] = {j.id: j for j in jobs}
+                write_json_atomic(path, {"jobs": [j.to_dict() for j in jobs]}, indent=2, default=str)
+                self._stamps[project_id] = file_stamp(path)
+            self._last_save[project_id] = time.monotonic()
+
+    def _changed(self, job: Job, force: bool):
+        # salvataggi limitati: a ogni cambio di fase o al massimo ogni save_interval secondi
+        if force or time.monotonic() - self._last_save.get(job.project_id, 0.0) >= self.save_interval:
+            self._save(job.project_id)
+
+    # ---- API ----
+    def submit(self, project_id: str, upload_dir: str, kind: str, fn: Callable[..., Any], *args,
+               params: Optional[Dict[str, Any]] = None) -> Job:
+        """Crea un job e ne avvia l'esecuzione in background.
+        `fn(*args, progress=job.report)` viene eseguita nell'executor, serializzata per progetto.
+        """
+        jobs = self._ensure_loaded(project_id, upload_dir)
+        job = Job(project_id, kind, params)
+        job._on_change = self._changed
+        with self._lock:
+            jobs[job.id] = job
+        self._save(project_id)
+        task = asyncio.get_running_loop().create_task(self._run(job, fn, args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: Job, fn: Callable[..., Any], args: tuple):
+        def body():
+            job.report()  # cancellato mentre era in coda
+            job.status = "running"
+            job.started_at = _now()
+            self._save(job.project_id)
+            return fn(*args, progress=job.report)
+
+        try:
+            job.result = await self.executor.run(body, project_id=job.project_id)
+            job.status = "succeeded"
+            job.stage = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(getattr(e, "detail", None) or e)
+        finally:
+            job.finished_at = _now()
+            self._save(job.project_id)
+
+    def list(self, project_id: str, upload_dir: str) -> List[Dict[str, Any]]:
+        jobs = self._ensure_loaded(project_id, upload_dir)
+        with self._lock:
+            return [j.to_dict() for j in sorted(jobs.values(), key=lambda j: j.created_at, reverse=True)]
+
+    def get(self, project_id: str, upload_dir: str, job_id: str) -> Optional[Job]:
+        return self._ensure_loaded(project_id, upload_dir).get(job_id)
+
+    def cancel(self, project_id: str, upload_dir: str, job_id: str) -> Optional[Job]:
+        job = self.get(project_id, upload_dir, job_id)
+        if job is not None and job.status not in FINISHED_STATES:
+            job.request_cancel()
+            self._save(project_id)
+        return job
+
+    def active_count(self) -> int:
+        """Job in coda o in esecuzione in questo processo"""
+        me = worker_id()
+        with self._lock:
+            return sum(1 for jobs in self._jobs.values() for j in jobs.values()
+                       if j.worker == me and j.status in ("queued", "running"))
+
+    def forget(self, project_id: str):
+        """Dimentica i job di un progetto (es. dopo cleanup o eliminazione)"""
+        with self._lock:
+            for job in self._jobs.pop(project_id, {}).values():
+                job.request_cancel()
+            self._dirs.pop(project_id, None)
+            self._stamps.pop(project_id, None)
+            self._last_save.pop(project_id, None)
@@ -0,0 +1,82 @@
+"""
+Codifica vettoriale delle risposte Likert.
+
+Un `LikertEncoder` per famiglia traduce intere colonne (o gruppi di colonne)
+in punteggi int8 1..K, con 0 per mancanti e valori fuori scala. Sinonimi e
+normalizzazione (accenti, maiuscole, spazi) vengono applicati una sola volta
+per valore distinto, mai per cella.
+"""
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class LikertEncoder:
+    """Mappa le risposte di una famiglia Likert sui punteggi 1..K"""
+
+    def __init__(self, order: Sequence[str], tokens: Dict[str, str], normalize: Callable[[str], str]):
+        self.order = list(order)
+        self._normalize = normalize
+        self._lookup: Dict[str, int] = {}
+        for i, label in enumerate(self.order, 1):
+            self._lookup[normalize(label)] = i
+        for token, label in tokens.items():
+            if label in self.order:
+                self._lookup.setdefault(normalize(token), self.order.index(label) + 1)
+        # memo valore grezzo -> codice, condiviso tra colonne della stessa famiglia
+        self._memo: Dict[Any, int] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.order)
+
+    def code_of(self, value: Any) -> int:
+        """Codice 1..K di un singolo valore (0 se mancante o non riconosciuto)"""
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return 0
+        try:
+            return self._memo[value]
+        except KeyError:
+            pass
+        except TypeError:
+            return self._lookup.get(self._normalize(str(value)), 0)
+        code = self._lookup.get(self._normalize(str(value)), 0)
+        self._memo[value] = code
+        return code
+
+    def encode_values(self, values: Sequence[Any]) -> np.ndarray:
+        """Codici int8 per una sequenza di valori distinti"""
+        return np.fromiter((self.code_of(v) for v in values), dtype=np.int8, count=len(values))
+
+    def encode(self, series: pd.Series) -> np.ndarray:
+        """Codifica un'intera colonna in un vettore int8 passando per i valori distinti"""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            uniques = series.cat.categories
+            inverse = series.cat.codes.to_numpy()
+        else:
+            inverse, uniques = pd.factorize(series, use_na_sentinel=True)
+        lut = np.concatenate([np.zeros(1, dtype=np.int8), self.encode_values(list(uniques))])
+        return lut[inverse.astype(np.int64) + 1]
+
+    def encode_frame(self, df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        """Matrice int8 (rispondenti x colonne) di un gruppo di domande"""
+        out = np.zeros((len(df), len(columns)), dtype=np.int8)
+        for j, col in enumerate(columns):
+            out[:, j] = self.encode(df[col])
+        return out
+
+    def histogram_from_counts(self, counts: Dict[Any, int]) -> np.ndarray:
+        """Istogramma dei punteggi 1..K a partire da conteggi per valore, in O(categorie)"""
+        if not counts:
+            return np.zeros(self.size, dtype=np.int64)
+        codes = self.encode_values(list(counts.keys())).astype(np.int64)
+        weights = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+        return np.bincount(codes, weights=weights, minlength=self.size + 1)[1:].astype(np.int64)
+
+    @staticmethod
+    def to_scores(codes: np.ndarray) -> np.ndarray:
+        """Converte i codici int8 in float con NaN al posto di 0"""
+        scores = codes.astype(np.float64)
+        scores[codes == 0] = np.nan
+        return scores
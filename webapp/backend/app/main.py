@@ -1,20 +1,52 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Path
 from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional, Dict
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from typing import List, Literal, Optional, Dict
+import copy
 import os
 import shutil
 import json
+import threading
 from datetime import datetime
-import pandas as pd
 from pydantic import BaseModel
 
 from .survey_analyzer import SurveyAnalyzer
+from .analyzer_pool import AnalyzerPool
+from .columnar_cache import (read_table, invalidate, cache_dir_for, normalize_frame, pending_entry, source_exists,
+                             prune as prune_cache)
+from .coverage import coverage_matrix
+from .csv_source import CSV_EXTENSIONS
+from .dataset_manifest import (available_columns, dataset_exists, dataset_fingerprint, dataset_rows, is_manifest,
+                               read_manifest, resolve, write_manifest)
+from .executor import BlockingExecutor
+from .jobs import JOBS_FILENAME, JobCancelled, JobManager
+from .result_cache import SharedResultCache
+from .shared_state import SHARED_STATE, file_lock, file_stamp, merge_fields, read_json, write_json_atomic
+from .streaming_merge import export_merged
+from . import metrics
 
 # Base directory of backend (absolute)
 BACKEND_BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Uploads root, overridable (e.g. for benchmarks) with SURVEY_UPLOADS_DIR
+UPLOADS_DIR = os.path.abspath(os.environ.get("SURVEY_UPLOADS_DIR") or os.path.join(BACKEND_BASE_DIR, "uploads"))
+PROJECTS_ROOT = os.path.join(UPLOADS_DIR, "projects")
+# Survey exports accepted by upload (LimeSurvey can export Excel or CSV)
+EXPORT_EXTENSIONS = (".xlsx", ".xls") + CSV_EXTENSIONS
+# Bookkeeping files in a project folder, left out of the file index
+INTERNAL_FILES = {"metadata.json", JOBS_FILENAME}
+
+# Blocking pandas/openpyxl work runs here, never on the event loop
+executor = BlockingExecutor()
+# Long-running merge/select/load operations submitted as pollable jobs
+jobs = JobManager(executor)
+# Loaded analyzers, LRU-evicted under a global memory budget
+analyzer_pool = AnalyzerPool()
 
 app = FastAPI(title="Survey Analysis API", version="1.1.0")
+# Every route below records its latency (see metrics.TimedRoute)
+app.router.route_class = metrics.TimedRoute
+app.add_middleware(metrics.ServerTimingMiddleware)
 
 # CORS
 app.add_middleware(
@@ -30,9 +62,18 @@ class Project:
     def __init__(self, project_id: str, name: Optional[str] = None):
         self.id = project_id
         # Ensure absolute upload dir independent of current working directory
-        self.upload_dir = os.path.join(BACKEND_BASE_DIR, "uploads", "projects", project_id)
+        self.upload_dir = os.path.join(PROJECTS_ROOT, project_id)
         os.makedirs(self.upload_dir, exist_ok=True)
         self.metadata_path = os.path.join(self.upload_dir, "metadata.json")
+        # cross-process lock for metadata.json read-modify-write (several uvicorn workers)
+        self.metadata_lock_path = os.path.join(cache_dir_for(self.metadata_path), "metadata.lock")
+        # pickled analyzer state of loaded_dataset, for warm restarts
+        self.snapshot_path = os.path.join(cache_dir_for(self.metadata_path), "analyzer.pickle")
+        # with SURVEY_SHARED_STATE, analysis results are shared by all workers through SQLite
+        self.result_cache = (
+            SharedResultCache(os.path.join(cache_dir_for(self.metadata_path), "results.sqlite"))
+            if SHARED_STATE else None
+        )
         self.name = name or f"Project {project_id}"
         self.files = []  # basenames only
         self.merged_file = None  # basename
@@ -40,23 +81,93 @@ class Project:
         self.last_updated_at: Optional[str] = None
         self.last_loaded_at: Optional[str] = None
         self.records_count: Optional[int] = None
-        self.analyzer = SurveyAnalyzer()
+        # name -> {"size", "mtime_ns"} of the user files in upload_dir (no .cache/ or internal files)
+        self.file_index: Dict[str, dict] = {}
+        # upload_dir mtime and merged file stamp when file_index was built
+        self.file_index_stamp: Optional[dict] = None
+        # row count of merged_file, valid while its size/mtime match
+        self.merged_records: Optional[dict] = None
+        # dataset last loaded into the analyzer, used to rehydrate it after eviction
+        self.loaded_dataset: Optional[str] = None
+        # metadata as last read/written by this process, and the file's (mtime_ns, size) then
+        self._synced: Optional[dict] = None
+        self._metadata_stamp = None
+        # _analyzer_lock guards every swap or discard of the pooled analyzer together with
+        # loaded_dataset; _analyzer_generation counts them, so a rebuild that raced a swap
+        # is not put back. _rebuild_lock keeps concurrent requests from rebuilding twice.
+        self._analyzer_lock = threading.RLock()
+        self._analyzer_generation = 0
+        self._rebuild_lock = threading.Lock()
         self._load_or_init_metadata()
 
+    @property
+    def analyzer(self) -> SurveyAnalyzer:
+        """The project's analyzer, materialized on first use and kept in the shared pool.
+        If the pool evicted it (or after a restart), the last loaded dataset is restored
+        from its snapshot, or reloaded when the snapshot is missing or stale (blocking).
+        """
+        analyzer = analyzer_pool.get(self.id)
+        if analyzer is not None:
+            return analyzer
+        with self._rebuild_lock:
+            while True:
+                with self._analyzer_lock:
+                    analyzer = analyzer_pool.peek(self.id)
+                    if analyzer is not None:
+                        return analyzer
+                    generation, dataset = self._analyzer_generation, self.loaded_dataset
+                # Rebuilt outside _analyzer_lock: loads and swaps of other requests are not held up
+                analyzer = self.new_analyzer()
+                dataset_path = os.path.join(self.upload_dir, dataset) if dataset else None
+                restored = True
+                if dataset_path and dataset_exists(dataset_path):
+                    restored = analyzer.load_snapshot(self.snapshot_path, dataset_path)
+                    if not restored:
+                        analyzer.load_data(dataset_path)
+                with self._analyzer_lock:
+                    # a load, append or cleanup swapped the dataset meanwhile: rebuild the current one
+                    if generation != self._analyzer_generation or dataset != self.loaded_dataset:
+                        continue
+                    if not restored:
+                        self.save_snapshot(analyzer, dataset_path)
+                    analyzer_pool.put(self.id, analyzer)
+                    return analyzer
+
+    def replace_analyzer(self, analyzer: Optional[SurveyAnalyzer], dataset_path: Optional[str]):
+        """Swap in the analyzer of `dataset_path` (saving its snapshot), or drop the analyzer
+        when it is None, and make `dataset_path` the loaded dataset."""
+        with self._analyzer_lock:
+            if analyzer is not None:
+                self.save_snapshot(analyzer, dataset_path)
+                analyzer_pool.put(self.id, analyzer)
+            else:
+                analyzer_pool.discard(self.id)
+            self.loaded_dataset = os.path.basename(dataset_path) if dataset_path else None
+            self._analyzer_generation += 1
+
+    def discard_analyzer(self):
+        """Drop the analyzer in memory; the next request restores the loaded dataset"""
+        with self._analyzer_lock:
+            analyzer_pool.discard(self.id)
+            self._analyzer_generation += 1
+
+    def new_analyzer(self) -> SurveyAnalyzer:
+        return SurveyAnalyzer(result_cache=self.result_cache)
+
+    def save_snapshot(self, analyzer: SurveyAnalyzer, dataset_path: str):
+        # Best effort: a missing snapshot only means a slower first request after restart
+        try:
+            analyzer.save_snapshot(self.snapshot_path, dataset_path)
+        except Exception:
+            pass
+
     def _load_or_init_metadata(self):
-        if os.path.exists(self.metadata_path):
-            try:
-                with open(self.metadata_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                self.name = data.get("name", self.name)
-                self.files = data.get("files", [])
-                self.merged_file = data.get("merged_file")
-                self.created_at = data.get("created_at", self.created_at)
-                self.last_updated_at = data.get("last_updated_at") or data.get("updated_at")
-                self.last_loaded_at = data.get("last_loaded_at")
-                self.records_count = data.get("records_count")
-            except Exception:
-                self._save_metadata()
+        stamp = file_stamp(self.metadata_path)
+        data = read_json(self.metadata_path)
+        if data is not None:
+            self._apply_metadata(data)
+            self._synced = copy.deepcopy(self._metadata_dict())
+            self._metadata_stamp = stamp
         else:
             self._save_metadata()
         if not self.last_updated_at:
@@ -67,8 +178,44 @@ class Project:
             except (TypeError, ValueError):
                 self.records_count = None
 
-    def _save_metadata(self):
-        data = {
+    def _apply_metadata(self, data: dict):
+        # copied, so in-place edits (e.g. files.append) never alter the synced baseline
+        data = copy.deepcopy(data)
+        self.name = data.get("name", self.name)
+        self.files = data.get("files", [])
+        self.merged_file = data.get("merged_file")
+        self.created_at = data.get("created_at", self.created_at)
+        self.last_updated_at = data.get("last_updated_at") or data.get("updated_at")
+        self.last_loaded_at = data.get("last_loaded_at")
+        self.records_count = data.get("records_count")
+        self.file_index = data.get("file_index") or {}
+        self.file_index_stamp = data.get("file_index_stamp")
+        self.merged_records = data.get("merged_records")
+        self.loaded_dataset = data.get("loaded_dataset")
+
+    def _adopt_metadata(self, data: dict):
+        with self._analyzer_lock:
+            loaded = (self.loaded_dataset, self.last_loaded_at)
+            self._apply_metadata(data)
+            if (self.loaded_dataset, self.last_loaded_at) != loaded:
+                # Another worker loaded a dataset: drop ours, the next request restores it from the snapshot
+                self.discard_analyzer()
+
+    def refresh(self):
+        """Pick up metadata.json changes written by other workers, keeping unsaved local changes."""
+        stamp = file_stamp(self.metadata_path)
+        if stamp is None or stamp == self._metadata_stamp:
+            return
+        data = read_json(self.metadata_path)
+        if data is None:
+            return
+        mine = self._metadata_dict()
+        self._adopt_metadata(merge_fields(self._synced or mine, mine, data, list_fields=("files",)))
+        self._synced = data
+        self._metadata_stamp = stamp
+
+    def _metadata_dict(self) -> dict:
+        return {
             "id": self.id,
             "name": self.name,
             "files": self.files,
@@ -77,9 +224,24 @@ class Project:
             "last_updated_at": self.last_updated_at,
             "last_loaded_at": self.last_loaded_at,
             "records_count": self.records_count,
+            "file_index": self.file_index,
+            "file_index_stamp": self.file_index_stamp,
+            "merged_records": self.merged_records,
+            "loaded_dataset": self.loaded_dataset,
         }
-        with open(self.metadata_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def _save_metadata(self):
+        # Read-modify-write under a cross-process lock: fields this process did not
+        # change keep whatever another worker wrote since our last sync
+        with file_lock(self.metadata_lock_path):
+            data = self._metadata_dict()
+            on_disk = read_json(self.metadata_path)
+            if on_disk is not None and self._synced is not None:
+                data = merge_fields(self._synced, data, on_disk, list_fields=("files",))
+                self._adopt_metadata(data)
+            write_json_atomic(self.metadata_path, data, indent=2)
+            self._synced = copy.deepcopy(data)
+            self._metadata_stamp = file_stamp(self.metadata_path)
 
     def update_records(self, count: Optional[int], *, mark_loaded: bool = False):
         if count is not None:
@@ -93,24 +255,49 @@ class Project:
             self.last_loaded_at = timestamp
         self._save_metadata()
 
-    def compute_records_from_merged(self, persist: bool = False) -> Optional[int]:
-        """Return respondent count by inspecting the merged dataset (excludes header)."""
+    def _merged_stamp(self) -> Optional[dict]:
         if not self.merged_file:
-            return self.records_count
-        merged_path = os.path.join(self.upload_dir, self.merged_file)
-        if not os.path.isfile(merged_path):
+            return None
+        path = os.path.join(self.upload_dir, self.merged_file)
+        try:
+            st = os.stat(path)
+        except OSError:
+            # an append result whose Excel is not written yet: its cache entry is the content
+            meta = pending_entry(path)
+            return {"file": self.merged_file, "sha1": meta["sha1"]} if meta else None
+        return {"file": self.merged_file, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def remember_merged_rows(self, rows: Optional[int]):
+        """Record the row count of a freshly written merged file, so listings never parse it."""
+        stamp = self._merged_stamp()
+        if stamp is not None and rows is not None:
+            self.merged_records = dict(stamp, rows=int(rows))
+
+    def compute_records_from_merged(self, persist: bool = False) -> Optional[int]:
+        """Return respondent count of the merged dataset (excludes header).
+        The file is parsed only when its size/mtime differ from the cached count.
+        """
+        stamp = self._merged_stamp()
+        if stamp is None:
             return self.records_count
 
-        try:
-            df = pd.read_excel(merged_path)
-            count = max(len(df.index), 0)
-        except Exception:
-            count = None
+        cached = self.merged_records or {}
+        stamp_changed = any(cached.get(k) != v for k, v in stamp.items())
+        if not stamp_changed:
+            count = cached.get("rows")
+        else:
+            try:
+                df = read_table(os.path.join(self.upload_dir, self.merged_file))
+                count = max(len(df.index), 0)
+            except Exception:
+                count = None
+            if count is not None:
+                self.merged_records = dict(stamp, rows=count)
 
         if count is None:
             return self.records_count
 
-        if persist and count != self.records_count:
+        if persist and (count != self.records_count or stamp_changed):
             original_last_updated = self.last_updated_at
             original_last_loaded = self.last_loaded_at
             self.records_count = count
@@ -123,11 +310,71 @@ class Project:
 
         return self.records_count
 
+    def _refresh_file_index(self) -> bool:
+        """Re-stat the user files in upload_dir, unless the folder and the merged file are unchanged.
+        Returns True if the index changed.
+        """
+        try:
+            dir_mtime_ns = os.stat(self.upload_dir).st_mtime_ns
+        except OSError:
+            dir_mtime_ns = None
+        # adding, removing or renaming a file bumps the folder mtime; the merged file is
+        # the only one rewritten in place (a merge saved twice within the same second)
+        stamp = {"dir_mtime_ns": dir_mtime_ns, "merged": self._merged_stamp()}
+        if stamp == self.file_index_stamp:
+            return False
+        index: Dict[str, dict] = {}
+        if dir_mtime_ns is not None:
+            with os.scandir(self.upload_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith(".") or name.endswith(".tmp") or name in INTERNAL_FILES:
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    cached = self.file_index.get(name)
+                    if cached is None or cached.get("mtime_ns") != st.st_mtime_ns or cached.get("size") != st.st_size:
+                        cached = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+                    index[name] = cached
+        changed = index != self.file_index
+        self.file_index = index
+        self.file_index_stamp = stamp
+        return changed
+
+    def storage_summary(self) -> dict:
+        """Record count, dataset count and disk usage, from the cached index when files are unchanged."""
+        # records first: parsing a changed merged file may add entries to .cache/
+        records_count = self.compute_records_from_merged(persist=True)
+        if self._refresh_file_index():
+            self._save_metadata()
+            # writing metadata.json bumped the folder mtime: stamp it again (a cheap rescan)
+            self._refresh_file_index()
+        total_size = sum(entry["size"] for entry in self.file_index.values())
+        try:
+            total_size += os.path.getsize(self.metadata_path)
+        except OSError:
+            pass
+        # only top-level dataset sources and manifests: .cache/ holds derived files named after them
+        datasets_count = sum(
+            1 for name in self.file_index
+            if os.path.dirname(name) == "" and name.lower().startswith("dataset_")
+            and name.lower().endswith((".xlsx", ".xls", ".json"))
+        )
+        return {
+            "records_count": records_count,
+            "datasets_count": datasets_count,
+            "total_size_bytes": total_size,
+        }
+
 class ProjectManager:
     def __init__(self):
         self.projects: Dict[str, Project] = {}
         self._ignored_ids = {"default"}
-        root = os.path.join(BACKEND_BASE_DIR, "uploads", "projects")
+        root = PROJECTS_ROOT
         if os.path.isdir(root):
             for pid in os.listdir(root):
                 pdir = os.path.join(root, pid)
@@ -138,10 +385,13 @@ class ProjectManager:
                         pass
 
     def refresh_from_disk(self):
-        """Ensure in-memory projects include any directories present on disk.
-        Keeps existing Project instances and adds any missing ones.
+        """Ensure in-memory projects match the directories present on disk.
+        Keeps existing Project instances, adds missing ones and drops those deleted
+        (e.g. by another worker).
         """
-        root = os.path.join(BACKEND_BASE_DIR, "uploads", "projects")
+        for pid in [pid for pid, p in self.projects.items() if not os.path.isdir(p.upload_dir)]:
+            self.projects.pop(pid).discard_analyzer()
+        root = PROJECTS_ROOT
         if os.path.isdir(root):
             for pid in os.listdir(root):
                 pdir = os.path.join(root, pid)
@@ -167,32 +417,21 @@ class ProjectManager:
         for p in sorted(self.projects.values(), key=lambda obj: obj.created_at or "", reverse=True):
             if p.id in self._ignored_ids:
                 continue
-            total_size = 0
-            datasets_count = 0
-            records_count = p.compute_records_from_merged(persist=True)
-            if os.path.isdir(p.upload_dir):
-                for root, _, files in os.walk(p.upload_dir):
-                    for fname in files:
-                        fpath = os.path.join(root, fname)
-                        try:
-                            total_size += os.path.getsize(fpath)
-                        except OSError:
-                            continue
-                        if fname.lower().startswith("dataset_") and fname.lower().endswith((".xlsx", ".xls")):
-                            datasets_count += 1
+            p.refresh()
+            summary = p.storage_summary()
             project_list.append(
                 {
                     "id": p.id,
                     "name": p.name,
                     "upload_dir": p.upload_dir,
                     "files_count": len(p.files),
-                    "datasets_count": datasets_count,
+                    "datasets_count": summary["datasets_count"],
                     "merged_file": p.merged_file,
-                    "records_count": records_count,
+                    "records_count": summary["records_count"],
                     "last_loaded_at": p.last_loaded_at,
                     "last_updated_at": p.last_updated_at,
                     "created_at": p.created_at,
-                    "total_size_bytes": total_size,
+                    "total_size_bytes": summary["total_size_bytes"],
                 }
             )
         return project_list
@@ -202,15 +441,22 @@ class ProjectManager:
             raise HTTPException(status_code=400, detail="Project ID required")
         if project_id in self._ignored_ids:
             raise HTTPException(status_code=404, detail="Project not found")
-        if project_id not in self.projects:
+        proj = self.projects.get(project_id)
+        if proj is None or not os.path.isdir(proj.upload_dir):
+            # Created or deleted by another worker since we last looked
+            self.refresh_from_disk()
+            proj = self.projects.get(project_id)
+        if proj is None:
             raise HTTPException(status_code=404, detail="Project not found")
-        return self.projects[project_id]
+        proj.refresh()
+        return proj
 
     def delete(self, project_id: str):
         proj = self.get(project_id)
         if os.path.exists(proj.upload_dir):
             shutil.rmtree(proj.upload_dir)
-        del self.projects[project_id]
+        proj.discard_analyzer()
+        self.projects.pop(project_id, None)
 
 pm = ProjectManager()
 
@@ -232,7 +478,7 @@ def _resolve_uploaded_paths(proj: Project, items: List[str]):
         # project dir + basename
         candidates.append(os.path.join(proj.upload_dir, base))
 
-        found = next((c for c in candidates if os.path.exists(c)), None)
+        found = next((c for c in candidates if source_exists(c)), None)
         if found:
             resolved.append(os.path.abspath(found))
         else:
@@ -242,9 +488,12 @@ def _resolve_uploaded_paths(proj: Project, items: List[str]):
 # ---- Models ----
 class MergeFilesRequest(BaseModel):
     file_paths: List[str]
+    append: bool = False  # update the current merged dataset with new/changed rows only
 
 class AnalyzeHeadersRequest(BaseModel):
     file_path: str
+    # "header": only column names, normalized names and duplicate groups (reads the first row)
+    mode: Literal["full", "header"] = "full"
 
 class SelectColumnsRequest(BaseModel):
     file_path: str
@@ -253,6 +502,12 @@ class SelectColumnsRequest(BaseModel):
 class LoadDatasetRequest(BaseModel):
     file_path: str
 
+class AnalyzeAllRequest(BaseModel):
+    groups: Optional[List[str]] = None  # None or empty = all groups
+    chart_type: str = "bar"
+    show_percentages: bool = True
+    include_na: bool = False
+
 class CreateProjectRequest(BaseModel):
     name: Optional[str] = None
 
@@ -313,6 +568,7 @@ async def get_chart_types():
             {"value": "stacked_100", "label": "Barre impilate 100% (gruppo)", "description": "Confronto tra sotto-domande normalizzato al 100%"},
             {"value": "heatmap_corr", "label": "Heatmap correlazioni (gruppo)", "description": "Matrice di correlazione tra sotto-domande Likert"},
             {"value": "small_multiples", "label": "Small multiples", "description": "Più grafici piccoli per ogni sotto-domanda"},
+            {"value": "multi_select", "label": "Scelta multipla (gruppo)", "description": "Frequenze delle opzioni, combinazioni e co-occorrenze"},
         ]
     }
 
@@ -332,24 +588,10 @@ async def create_project(req: CreateProjectRequest):
 
 @app.get("/projects")
 async def list_projects():
-    return {"projects": pm.list_projects()}
+    return {"projects": await executor.run(pm.list_projects, read_only=True)}
 
-@app.get("/projects/{project_id}")
-async def get_project_details(project_id: str = Path(...)):
-    proj = pm.get(project_id)
-    total_size = 0
-    datasets_count = 0
-    records_count = proj.compute_records_from_merged(persist=True)
-    if os.path.isdir(proj.upload_dir):
-        for root, _, files in os.walk(proj.upload_dir):
-            for fname in files:
-                fpath = os.path.join(root, fname)
-                try:
-                    total_size += os.path.getsize(fpath)
-                except OSError:
-                    continue
-                if fname.lower().startswith("dataset_") and fname.lower().endswith((".xlsx", ".xls")):
-                    datasets_count += 1
+def _project_details(proj: Project) -> dict:
+    summary = proj.storage_summary()
     return {
         "id": proj.id,
         "name": proj.name,
@@ -357,17 +599,24 @@ async def get_project_details(project_id: str = Path(...)):
         "files": proj.files,
         "merged_file": proj.merged_file,
         "created_at": proj.created_at,
-        "records_count": records_count,
+        "records_count": summary["records_count"],
         "last_updated_at": proj.last_updated_at,
         "last_loaded_at": proj.last_loaded_at,
         "files_count": len(proj.files),
-        "datasets_count": datasets_count,
-        "total_size_bytes": total_size,
+        "datasets_count": summary["datasets_count"],
+        "total_size_bytes": summary["total_size_bytes"],
     }
 
+@app.get("/projects/{project_id}")
+async def get_project_details(project_id: str = Path(...)):
+    proj = pm.get(project_id)
+    return await executor.run(_project_details, proj, project_id=proj.id, read_only=True)
+
 @app.delete("/projects/{project_id}")
 async def delete_project(project_id: str = Path(...)):
-    pm.delete(project_id)
+    pm.get(project_id)
+    await executor.run(pm.delete, project_id, project_id=project_id)
+    jobs.forget(project_id)
     return {"success": True}
 
 @app.patch("/projects/{project_id}")
@@ -389,9 +638,7 @@ async def update_project(project_id: str, req: UpdateProjectRequest):
         "created_at": proj.created_at,
     }
 
-@app.post("/projects/{project_id}/keep-only-merges")
-async def keep_only_merges(project_id: str):
-    proj = pm.get(project_id)
+def _keep_only_merges(proj: Project) -> dict:
     if not os.path.isdir(proj.upload_dir):
         return {"success": True, "deleted": 0}
     deleted = 0
@@ -402,40 +649,232 @@ async def keep_only_merges(project_id: str):
         # Keep only merged_*.xlsx
         if fname.startswith("merged_") and fname.lower().endswith((".xlsx", ".xls")):
             continue
-        # If it is an Excel file, delete it
-        if fname.lower().endswith((".xlsx", ".xls")):
+        # If it is an export (Excel or CSV), delete it
+        if fname.lower().endswith(EXPORT_EXTENSIONS):
             try:
                 os.remove(fpath)
                 deleted += 1
             except Exception:
                 pass
+    # Dataset manifests whose source file was just deleted can no longer be loaded
+    for fname in list(os.listdir(proj.upload_dir)):
+        fpath = os.path.join(proj.upload_dir, fname)
+        if is_manifest(fname) and os.path.isfile(fpath) and not dataset_exists(fpath):
+            try:
+                os.remove(fpath)
+                deleted += 1
+            except Exception:
+                pass
+    prune_cache(proj.upload_dir)
     # Recompute files list: keep only basenames of remaining files
     remaining_files = [f for f in os.listdir(proj.upload_dir) if os.path.isfile(os.path.join(proj.upload_dir, f))]
     proj.files = remaining_files
     proj._save_metadata()
     return {"success": True, "deleted": deleted, "files": proj.files, "merged_file": proj.merged_file}
 
+@app.post("/projects/{project_id}/keep-only-merges")
+async def keep_only_merges(project_id: str):
+    proj = pm.get(project_id)
+    return await executor.run(_keep_only_merges, proj, project_id=proj.id)
+
+# ---- Blocking work, executed through the executor ----
+def _save_uploads(proj: Project, files: List[UploadFile]) -> List[str]:
+    uploaded_files: List[str] = []
+    for file in files:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{timestamp}_{file.filename}"
+        file_path = os.path.join(proj.upload_dir, filename)
+        with open(file_path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        uploaded_files.append(file_path)
+        bname = os.path.basename(file_path)
+        if bname not in proj.files:
+            proj.files.append(bname)
+    proj._save_metadata()
+    return uploaded_files
+
+def _analyze_headers_task(file_path: str, mode: str = "full") -> dict:
+    return SurveyAnalyzer().analyze_headers(file_path, mode)
+
+def _coverage_task(file_path: str, group_key: Optional[str] = None) -> dict:
+    columns = None
+    if group_key:
+        columns = SurveyAnalyzer.group_columns(available_columns(file_path)).get(group_key)
+        if columns is None:
+            raise KeyError(group_key)
+    return coverage_matrix(file_path, columns)
+
+def _merge_into_project(proj: Project, file_paths: List[str], output_path: str,
+                        append: bool = False, progress=None) -> dict:
+    # Merge, record and follow-up run as one call in the project's write slot, so no other merge
+    # or load can change proj.merged_file in between (the parsing itself uses a process pool)
+    append_to = _append_base(proj, append, file_paths)
+    try:
+        result = SurveyAnalyzer().merge_excel_files(file_paths, output_path, progress=progress, append_to=append_to)
+    except JobCancelled:
+        _discard_output(output_path)
+        raise
+    return _follow_append(proj, append_to, _record_merge(proj, result, output_path))
+
+def _follow_append(proj: Project, base_path: Optional[str], result: dict) -> dict:
+    """Move the loaded dataset (the merged file or a selection over it) onto the merged file an
+    append just wrote. When rows were only added, the analyzer in memory receives just those rows
+    (SurveyAnalyzer.append_rows); otherwise it is dropped and reloaded on the next request."""
+    if not base_path or result.get("mode") != "append" or result.get("unchanged") or not proj.loaded_dataset:
+        return result
+    loaded_path = os.path.join(proj.upload_dir, proj.loaded_dataset)
+    output_path = os.path.join(proj.upload_dir, result["merged_file"])
+    # the append has just changed the base: a selection over it is stale until it is moved below
+    if not dataset_exists(loaded_path) or \
+            os.path.basename(resolve(loaded_path, verify=False)[0]) != os.path.basename(base_path):
+        return result
+    if is_manifest(loaded_path):
+        manifest = read_manifest(loaded_path)
+        dataset_path = write_manifest(proj.upload_dir, output_path, manifest["columns"],
+                                      manifest.get("headers_analysis"))
+    else:
+        dataset_path = output_path
+
+    analyzer = analyzer_pool.peek(proj.id)
+    if analyzer is not None and analyzer.data is not None and not result.get("updated"):
+        # appended on a copy and swapped in, like _load_dataset: concurrent reads keep the old state
+        fresh = copy.copy(analyzer)
+        fresh.column_stats = dict(analyzer.column_stats)
+        fresh.memory_report = dict(analyzer.memory_report or {})
+        fresh.text_index = copy.deepcopy(analyzer.text_index)
+        added = int(result.get("added", 0))
+        if added:
+            columns = list(analyzer.data.columns)
+            if fresh.text_index is not None:
+                columns += fresh.text_index.columns + [fresh.text_index.id_column]
+            batch = read_table(output_path, list(dict.fromkeys(c for c in columns if c)))
+            batch = batch.iloc[len(batch) - added:]
+            if is_manifest(dataset_path):
+                batch = normalize_frame(batch)
+            result["loaded_dataset_append"] = fresh.append_rows(batch)
+        fresh.dataset_fingerprint = dataset_fingerprint(dataset_path)
+        proj.replace_analyzer(fresh, dataset_path)
+    else:
+        proj.replace_analyzer(None, dataset_path)
+    proj._save_metadata()
+    result["loaded_dataset"] = proj.loaded_dataset
+    return result
+
+def _discard_output(path: str):
+    # Drop a file written by a job that was cancelled before it was recorded
+    invalidate(path)
+    if os.path.exists(path):
+        os.remove(path)
+
+def _append_base(proj: Project, append: bool, full_paths: List[str]) -> Optional[str]:
+    # Merged dataset an append request builds on; without one the merge starts from scratch
+    if not append or not proj.merged_file:
+        return None
+    base = os.path.join(proj.upload_dir, proj.merged_file)
+    if not source_exists(base):
+        return None
+    if base in full_paths:
+        full_paths.remove(base)
+    return base
+
+def _record_merge(proj: Project, result: dict, output_path: str) -> dict:
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    if result.get("unchanged"):
+        # Nothing new to append: the current merged file stays as it is
+        result["merged_file"] = proj.merged_file
+        return result
+    result["merged_file"] = os.path.basename(output_path)
+    proj.merged_file = result["merged_file"]
+    proj.remember_merged_rows(result.get("rows"))
+    proj.update_records(result.get("rows"))
+    return result
+
+def _select_columns(proj: Project, full_path: str, headers_analysis: List[dict], progress=None) -> dict:
+    progress = progress or (lambda *args, **kwargs: None)
+    # Column selection only needs the analyzer's configuration, not the loaded dataset
+    useful_columns = SurveyAnalyzer().select_useful_columns(headers_analysis)
+    progress("reading")
+    # Only the column names are needed: the dataset is a manifest over the source,
+    # projected from its columnar cache when loaded
+    present = set(available_columns(full_path))
+    existing_columns = [c for c in useful_columns if c in present]
+    if not existing_columns:
+        raise HTTPException(status_code=400, detail="No useful columns found")
+    rows = dataset_rows(full_path)
+    progress("writing", rows_written=0, rows_total=rows)
+    output_path = write_manifest(proj.upload_dir, full_path, existing_columns, headers_analysis)
+    try:
+        progress(rows_written=rows)
+    except JobCancelled:
+        _discard_output(output_path)
+        raise
+    proj.update_records(rows)
+    return {
+        "success": True,
+        "selected_columns": len(existing_columns),
+        "total_questions": len(useful_columns),
+        "dataset_file": os.path.basename(output_path),
+        "columns": existing_columns,
+    }
+
+def _load_dataset(proj: Project, full_path: str, progress=None) -> dict:
+    # Load into a fresh analyzer and swap it in only once complete, so a failed
+    # or cancelled load leaves the current dataset usable. The result cache is
+    # carried over; load_data clears it if the file changed.
+    analyzer = proj.new_analyzer()
+    previous = analyzer_pool.peek(proj.id)
+    if previous is not None:
+        analyzer.dataset_fingerprint = previous.dataset_fingerprint
+        analyzer.result_cache = previous.result_cache
+    analyzer.load_data(full_path, progress)
+    proj.replace_analyzer(analyzer, full_path)
+    groups_data = analyzer.get_question_groups()
+    data_rows = len(analyzer.data) if getattr(analyzer, 'data', None) is not None else 0
+    data_columns = len(analyzer.data.columns) if getattr(analyzer, 'data', None) is not None else 0
+    proj.update_records(data_rows, mark_loaded=True)
+    return {
+        "success": True,
+        "message": "Dataset loaded successfully",
+        "groups": groups_data["groups"],
+        "labels": groups_data["labels"],
+        "likert_families": groups_data["likert_families"],
+        "total_groups": len(groups_data["groups"]),
+        "total_rows": data_rows,
+        "total_columns": data_columns,
+        "memory": analyzer.memory_report,
+    }
+
+def _analyzer_of(proj: Project) -> SurveyAnalyzer:
+    # Materializing may reload an evicted dataset, so it always runs in the executor
+    return proj.analyzer
+
+def _cleanup(proj: Project):
+    if os.path.exists(proj.upload_dir):
+        shutil.rmtree(proj.upload_dir)
+    os.makedirs(proj.upload_dir, exist_ok=True)
+    proj.replace_analyzer(None, None)
+    proj.files = []
+    proj.merged_file = None
+    proj.records_count = None
+    proj.file_index = {}
+    proj.file_index_stamp = None
+    proj.merged_records = None
+    proj.last_loaded_at = None
+    proj.last_updated_at = datetime.now().isoformat(timespec="seconds")
+    proj._save_metadata()
+
 # Project-scoped variants
 @app.post("/projects/{project_id}/upload-files")
 async def upload_files_project(project_id: str, files: List[UploadFile] = File(...)):
     if not files:
         raise HTTPException(status_code=400, detail="No files uploaded")
     proj = pm.get(project_id)
-    uploaded_files: List[str] = []
     try:
         for file in files:
-            if not file.filename.endswith((".xlsx", ".xls")):
-                raise HTTPException(status_code=400, detail=f"File {file.filename} is not an Excel file")
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{timestamp}_{file.filename}"
-            file_path = os.path.join(proj.upload_dir, filename)
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            uploaded_files.append(file_path)
-            bname = os.path.basename(file_path)
-            if bname not in proj.files:
-                proj.files.append(bname)
-        proj._save_metadata()
+            if not file.filename.lower().endswith(EXPORT_EXTENSIONS):
+                raise HTTPException(status_code=400, detail=f"File {file.filename} is not an Excel or CSV file")
+        uploaded_files = await executor.run(_save_uploads, proj, files, project_id=proj.id)
         return {
             "success": True,
             "message": f"Uploaded {len(uploaded_files)} files",
@@ -454,13 +893,8 @@ async def merge_files_project(project_id: str, req: MergeFilesRequest):
             raise HTTPException(status_code=404, detail=f"Files not found: {missing}")
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_path = os.path.join(proj.upload_dir, f"merged_{timestamp}.xlsx")
-        result = proj.analyzer.merge_excel_files(full_paths, output_path)
-        if "error" in result:
-            raise HTTPException(status_code=400, detail=result["error"])
-        result["merged_file"] = os.path.basename(output_path)
-        proj.merged_file = result["merged_file"]
-        proj.update_records(result.get("rows"))
-        return result
+        return await executor.run(_merge_into_project, proj, full_paths, output_path, req.append,
+                                  project_id=proj.id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error merging files: {str(e)}")
 
@@ -469,9 +903,10 @@ async def analyze_headers_project(project_id: str, req: AnalyzeHeadersRequest):
     proj = pm.get(project_id)
     try:
         full_path = os.path.join(proj.upload_dir, os.path.basename(req.file_path))
-        if not os.path.exists(full_path):
+        if not source_exists(full_path):
             raise HTTPException(status_code=404, detail="File not found")
-        return proj.analyzer.analyze_headers(full_path)
+        return await executor.run(_analyze_headers_task, full_path, req.mode, project_id=proj.id, stateless=True,
+                                  read_only=True)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing headers: {str(e)}")
 
@@ -480,25 +915,9 @@ async def select_columns_project(project_id: str, req: SelectColumnsRequest):
     proj = pm.get(project_id)
     try:
         full_path = os.path.join(proj.upload_dir, os.path.basename(req.file_path))
-        if not os.path.exists(full_path):
+        if not source_exists(full_path):
             raise HTTPException(status_code=404, detail="File not found")
-        useful_columns = proj.analyzer.select_useful_columns(req.headers_analysis)
-        df = pd.read_excel(full_path)
-        existing_columns = [c for c in useful_columns if c in df.columns]
-        if not existing_columns:
-            raise HTTPException(status_code=400, detail="No useful columns found")
-        subset = df[existing_columns]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = os.path.join(proj.upload_dir, f"dataset_{timestamp}.xlsx")
-        subset.to_excel(output_path, index=False)
-        proj.update_records(len(subset))
-        return {
-            "success": True,
-            "selected_columns": len(existing_columns),
-            "total_questions": len(useful_columns),
-            "dataset_file": os.path.basename(output_path),
-            "columns": existing_columns,
-        }
+        return await executor.run(_select_columns, proj, full_path, req.headers_analysis, project_id=proj.id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error selecting columns: {str(e)}")
 
@@ -507,23 +926,9 @@ async def load_dataset_project(project_id: str, req: LoadDatasetRequest):
     proj = pm.get(project_id)
     try:
         full_path = os.path.join(proj.upload_dir, os.path.basename(req.file_path))
-        if not os.path.exists(full_path):
+        if not source_exists(full_path):
             raise HTTPException(status_code=404, detail="File not found")
-        proj.analyzer.load_data(full_path)
-        groups_data = proj.analyzer.get_question_groups()
-        data_rows = len(proj.analyzer.data) if getattr(proj.analyzer, 'data', None) is not None else 0
-        data_columns = len(proj.analyzer.data.columns) if getattr(proj.analyzer, 'data', None) is not None else 0
-        proj.update_records(data_rows, mark_loaded=True)
-        return {
-            "success": True,
-            "message": "Dataset loaded successfully",
-            "groups": groups_data["groups"],
-            "labels": groups_data["labels"],
-            "likert_families": groups_data["likert_families"],
-            "total_groups": len(groups_data["groups"]),
-            "total_rows": data_rows,
-            "total_columns": data_columns,
-        }
+        return await executor.run(_load_dataset, proj, full_path, project_id=proj.id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading dataset: {str(e)}")
 
@@ -531,7 +936,8 @@ async def load_dataset_project(project_id: str, req: LoadDatasetRequest):
 async def get_question_groups_project(project_id: str):
     proj = pm.get(project_id)
     try:
-        groups_data = proj.analyzer.get_question_groups()
+        analyzer = await executor.run(_analyzer_of, proj, project_id=proj.id, read_only=True)
+        groups_data = analyzer.get_question_groups()
         if not groups_data["groups"]:
             raise HTTPException(status_code=400, detail="No dataset loaded")
         return groups_data
@@ -548,32 +954,239 @@ async def analyze_question_project(
 ):
     proj = pm.get(project_id)
     try:
-        result = proj.analyzer.analyze_question_group(
+        analyzer = await executor.run(_analyzer_of, proj, project_id=proj.id, read_only=True)
+        result = await executor.run(
+            analyzer.analyze_question_group,
             group_key=group_key,
             chart_type=chart_type,
             show_percentages=show_percentages,
             include_na=include_na,
+            project_id=proj.id,
+            read_only=True,
         )
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
-        return jsonable_encoder(result)
+        with metrics.stage("jsonable_encoder"):
+            return jsonable_encoder(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing question: {str(e)}")
 
+@app.post("/projects/{project_id}/analyze-all")
+async def analyze_all_project(project_id: str, req: AnalyzeAllRequest):
+    """Stream one NDJSON line per question group as soon as it is computed."""
+    proj = pm.get(project_id)
+    analyzer = await executor.run(_analyzer_of, proj, project_id=proj.id, read_only=True)
+    if analyzer.data is None:
+        raise HTTPException(status_code=400, detail="No dataset loaded")
+    if req.groups:
+        unknown = [g for g in req.groups if g not in analyzer.question_groups]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Groups not found: {unknown}")
+
+    async def ndjson_lines():
+        for key in req.groups or analyzer.group_keys():
+            result = await executor.run(
+                analyzer.analyze_question_group,
+                key,
+                req.chart_type,
+                req.show_percentages,
+                req.include_na,
+                project_id=proj.id,
+                read_only=True,
+            )
+            with metrics.stage("jsonable_encoder"):
+                line = json.dumps(jsonable_encoder(result), ensure_ascii=False)
+            yield line + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+def _text_columns(analyzer: SurveyAnalyzer, column: Optional[str], group_key: Optional[str]) -> Optional[List[str]]:
+    # Open-text columns a text query is restricted to (None = all indexed columns)
+    if analyzer.data is None or analyzer.text_index is None:
+        raise HTTPException(status_code=400, detail="No dataset loaded")
+    indexed = analyzer.text_index.columns
+    if column is not None:
+        if column not in indexed:
+            raise HTTPException(status_code=404, detail=f"Open-text column not found: {column}")
+        return [column]
+    if group_key is not None:
+        columns = SurveyAnalyzer.group_columns(indexed).get(group_key)
+        if columns is None:
+            raise HTTPException(status_code=404, detail=f"No open-text columns in group: {group_key}")
+        return columns
+    return None
+
+@app.get("/projects/{project_id}/text-search")
+async def text_search_project(project_id: str, q: str, column: Optional[str] = None, group_key: Optional[str] = None,
+                              phrase: bool = False, limit: int = 50, offset: int = 0):
+    """Open-text answers containing every word of `q` (consecutive words with `phrase`), from the inverted index."""
+    proj = pm.get(project_id)
+    analyzer = await executor.run(_analyzer_of, proj, project_id=proj.id, read_only=True)
+    columns = _text_columns(analyzer, column, group_key)
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Empty query")
+    result = await executor.run(analyzer.search_text, q, columns, phrase, max(0, min(limit, 500)), max(0, offset),
+                                project_id=proj.id, read_only=True)
+    return jsonable_encoder(result)
+
+@app.get("/projects/{project_id}/text-terms")
+async def text_terms_project(project_id: str, column: Optional[str] = None, group_key: Optional[str] = None,
+                             top: int = 30, bigrams: bool = False):
+    """Most frequent words (or word pairs with `bigrams`) of each open-text column, stopwords excluded."""
+    proj = pm.get(project_id)
+    analyzer = await executor.run(_analyzer_of, proj, project_id=proj.id, read_only=True)
+    columns = _text_columns(analyzer, column, group_key)
+    result = await executor.run(analyzer.text_term_frequencies, columns, max(1, min(top, 500)), bigrams,
+                                project_id=proj.id, read_only=True)
+    return {"columns": result}
+
+@app.get("/projects/{project_id}/coverage")
+async def coverage_project(project_id: str, file_path: Optional[str] = None, group_key: Optional[str] = None):
+    """Non-null counts per source file (file_number) and column of a merged dataset.
+    Defaults to the project's merged file; `group_key` restricts the columns to one question group."""
+    proj = pm.get(project_id)
+    name = os.path.basename(file_path) if file_path else proj.merged_file
+    if not name:
+        raise HTTPException(status_code=404, detail="No merged dataset")
+    full_path = os.path.join(proj.upload_dir, name)
+    if not dataset_exists(full_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    try:
+        result = await executor.run(_coverage_task, full_path, group_key, project_id=proj.id, stateless=True,
+                                    read_only=True)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Group not found: {group_key}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return dict(result, file=name, group_key=group_key)
+
+@app.get("/projects/{project_id}/merged-file")
+async def download_merged_file(project_id: str, file_path: Optional[str] = None):
+    """The merged dataset as Excel (defaults to the project's merged file). After an append
+    the workbook is written here, on the first download, not by the merge itself."""
+    proj = pm.get(project_id)
+    name = os.path.basename(file_path) if file_path else proj.merged_file
+    if not name or not name.startswith("merged_"):
+        raise HTTPException(status_code=404, detail="No merged dataset")
+    full_path = os.path.join(proj.upload_dir, name)
+    if not source_exists(full_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    await executor.run(export_merged, full_path, project_id=proj.id, stateless=True)
+    return FileResponse(full_path, filename=name,
+                        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+@app.get("/projects/{project_id}/cache-stats")
+async def cache_stats_project(project_id: str):
+    proj = pm.get(project_id)
+    # Read-only: never reload an evicted analyzer just to report on it
+    analyzer = analyzer_pool.peek(proj.id)
+    if analyzer is None:
+        return {"in_memory": False}
+    return dict(analyzer.cache_info(), in_memory=True)
+
+@app.get("/executor-stats")
+async def executor_stats():
+    return executor.stats()
+
+@app.get("/analyzer-stats")
+async def analyzer_stats():
+    return analyzer_pool.info()
+
+# Gauges and counters read at scrape time from the executor, job manager and analyzer pool
+metrics.register(metrics.Callback("survey_active_jobs", "Job in coda o in esecuzione", jobs.active_count))
+metrics.register(metrics.Callback(
+    "survey_executor_tasks", "Operazioni bloccanti per stato",
+    lambda: {(k,): v for k, v in executor.stats().items() if k in ("queue_depth", "running")},
+    labels=("state",),
+))
+metrics.register(metrics.Callback(
+    "survey_loaded_dataset_bytes", "Memoria stimata dei dataset caricati", lambda: analyzer_pool.info()["bytes"],
+))
+metrics.register(metrics.Callback(
+    "survey_loaded_datasets", "Progetti con dataset in memoria", lambda: len(analyzer_pool.info()["projects"]),
+))
+metrics.register(metrics.Callback(
+    "survey_analyzer_pool_events_total", "Accessi al pool degli analyzer (hit, miss, eviction)",
+    lambda: {(k,): v for k, v in analyzer_pool.info().items() if k in ("hits", "misses", "evictions")},
+    kind="counter", labels=("event",),
+))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.delete("/projects/{project_id}/cleanup")
 async def cleanup_files_project(project_id: str):
     proj = pm.get(project_id)
     try:
-        if os.path.exists(proj.upload_dir):
-            shutil.rmtree(proj.upload_dir)
-        os.makedirs(proj.upload_dir, exist_ok=True)
-        proj.analyzer = SurveyAnalyzer()
-        proj.files = []
-        proj.merged_file = None
-        proj.records_count = None
-        proj.last_loaded_at = None
-        proj.last_updated_at = datetime.now().isoformat(timespec="seconds")
-        proj._save_metadata()
+        await executor.run(_cleanup, proj, project_id=proj.id)
+        jobs.forget(proj.id)
         return {"success": True, "message": "Files cleaned up"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error cleaning up: {str(e)}")
+
+# ---- Background jobs: submit, then poll status/progress ----
+def _existing_project_file(proj: Project, file_path: str) -> str:
+    full_path = os.path.join(proj.upload_dir, os.path.basename(file_path))
+    if not source_exists(full_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    return full_path
+
+@app.post("/projects/{project_id}/jobs/merge-files", status_code=202)
+async def merge_files_job(project_id: str, req: MergeFilesRequest):
+    proj = pm.get(project_id)
+    full_paths, missing = _resolve_uploaded_paths(proj, req.file_paths)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Files not found: {missing}")
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_path = os.path.join(proj.upload_dir, f"merged_{timestamp}.xlsx")
+    job = jobs.submit(
+        proj.id, proj.upload_dir, "merge-files", _merge_into_project, proj, full_paths, output_path, req.append,
+        params={"file_paths": [os.path.basename(p) for p in full_paths], "append": req.append},
+    )
+    return job.to_dict()
+
+@app.post("/projects/{project_id}/jobs/select-columns", status_code=202)
+async def select_columns_job(project_id: str, req: SelectColumnsRequest):
+    proj = pm.get(project_id)
+    full_path = _existing_project_file(proj, req.file_path)
+    job = jobs.submit(
+        proj.id, proj.upload_dir, "select-columns", _select_columns, proj, full_path, req.headers_analysis,
+        params={"file_path": os.path.basename(full_path)},
+    )
+    return job.to_dict()
+
+@app.post("/projects/{project_id}/jobs/load-dataset", status_code=202)
+async def load_dataset_job(project_id: str, req: LoadDatasetRequest):
+    proj = pm.get(project_id)
+    full_path = _existing_project_file(proj, req.file_path)
+    job = jobs.submit(
+        proj.id, proj.upload_dir, "load-dataset", _load_dataset, proj, full_path,
+        params={"file_path": os.path.basename(full_path)},
+    )
+    return job.to_dict()
+
+@app.get("/projects/{project_id}/jobs")
+async def list_jobs(project_id: str):
+    proj = pm.get(project_id)
+    return {"jobs": jobs.list(proj.id, proj.upload_dir)}
+
+@app.get("/projects/{project_id}/jobs/{job_id}")
+async def get_job(project_id: str, job_id: str):
+    proj = pm.get(project_id)
+    job = jobs.get(proj.id, proj.upload_dir, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.post("/projects/{project_id}/jobs/{job_id}/cancel")
+async def cancel_job(project_id: str, job_id: str):
+    proj = pm.get(project_id)
+    job = jobs.cancel(proj.id, proj.upload_dir, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    executor.shutdown()
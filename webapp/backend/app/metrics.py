@@ -0,0 +1,273 @@
+"""
+Metriche del backend, esposte in formato testo Prometheus da `GET /metrics`.
+
+- `stage(nome)` misura una fase del lavoro (parsing Excel, raggruppamento delle
+  domande, statistiche, grafici...) in `survey_stage_duration_seconds` e la
+  aggiunge ai tempi della richiesta in corso, anche dai thread dell'executor.
+- `TimedRoute` misura ogni route in `survey_request_duration_seconds` e separa
+  il tempo dell'endpoint da quello della serializzazione (`jsonable_encoder`).
+- `ServerTimingMiddleware` restituisce i tempi della richiesta nell'header
+  `Server-Timing`, per tutte le richieste con `SURVEY_SERVER_TIMING=1` oppure
+  solo per quelle con l'header `X-Server-Timing: 1`.
+
+Le fasi eseguite nel pool di processi (`SURVEY_EXECUTOR=process`) non vengono
+registrate: i loro contatori restano nel processo worker.
+"""
+import asyncio
+import contextvars
+import functools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+
+SERVER_TIMING = os.environ.get("SURVEY_SERVER_TIMING", "0").strip().lower() in ("1", "true", "yes")
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Istogramma cumulativo per combinazione di etichette"""
+
+    def __init__(self, name: str, help_text: str, labels: Labels = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._series.items())
+        for values, (counts, total, count) in items:
+            for bound, c in zip(self.buckets, counts):
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, values, le)} {c}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_label_text(self.labels, values, inf)} {count}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, values)} {_number(total)}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, values)} {count}")
+        return lines
+
+
+class Counter:
+    """Contatore monotòno per combinazione di etichette"""
+
+    def __init__(self, name: str, help_text: str, labels: Labels = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_label_text(self.labels, k)} {_number(v)}" for k, v in items)
+        return lines
+
+
+class Callback:
+    """Metrica letta al momento dello scrape: `fn()` restituisce un numero o {etichette: valore}"""
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], object], kind: str = "gauge",
+                 labels: Labels = ()):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.kind = kind
+        self.labels = labels
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            value = self.fn()
+        except Exception:
+            return lines
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        lines.extend(f"{self.name}{_label_text(self.labels, k)} {_number(v)}" for k, v in items)
+        return lines
+
+
+STAGE_SECONDS = Histogram("survey_stage_duration_seconds", "Durata delle fasi di elaborazione", ("stage",))
+REQUEST_SECONDS = Histogram("survey_request_duration_seconds", "Durata delle richieste HTTP per route",
+                            ("method", "route", "status"))
+RESULT_CACHE = Counter("survey_result_cache_lookups_total", "Ricerche nella cache dei risultati delle analisi",
+                       ("result",))
+
+_registry: List[object] = [STAGE_SECONDS, REQUEST_SECONDS, RESULT_CACHE]
+
+
+def register(metric):
+    """Aggiunge una metrica all'output di `/metrics`"""
+    _registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---- Tempi della richiesta corrente ----
+# lista (fase, secondi) condivisa dai contesti copiati verso i thread dell'executor
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "survey_request_timings", default=None)
+
+
+def record(name: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    """Misura il blocco come fase `name`"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - t0)
+
+
+def timed(name: str):
+    """Decoratore equivalente a `with stage(name)` sull'intera funzione"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    totals: Dict[str, float] = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={1000 * seconds:.2f}" for name, seconds in totals.items())
+
+
+class TimedRoute(APIRoute):
+    """Route che misura endpoint e serializzazione della risposta"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, self._timed_endpoint(endpoint), **kwargs)
+
+    @staticmethod
+    def _timed_endpoint(endpoint: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def wrapper(*args, **kwargs):
+                with stage("endpoint"):
+                    return await endpoint(*args, **kwargs)
+        else:
+            @functools.wraps(endpoint)
+            def wrapper(*args, **kwargs):
+                with stage("endpoint"):
+                    return endpoint(*args, **kwargs)
+        return wrapper
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route = self.path
+
+        async def timed_handler(request):
+            timings = _request_timings.get()
+            start = len(timings) if timings is not None else 0
+            t0 = time.perf_counter()
+            status = "500"
+            try:
+                response = await handler(request)
+                status = str(response.status_code)
+                return response
+            except Exception as e:
+                status = str(getattr(e, "status_code", 500))
+                raise
+            finally:
+                elapsed = time.perf_counter() - t0
+                REQUEST_SECONDS.observe(elapsed, request.method, route, status)
+                if timings is not None:
+                    # validazione, jsonable_encoder e render della risposta
+                    endpoint = sum(s for n, s in timings[start:] if n == "endpoint")
+                    record("serialize", max(0.0, elapsed - endpoint))
+
+        return timed_handler
+
+
+class ServerTimingMiddleware:
+    """Middleware ASGI che raccoglie i tempi della richiesta e, se richiesto, li restituisce in `Server-Timing`"""
+
+    def __init__(self, app, enabled: bool = SERVER_TIMING):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        wanted = self.enabled or any(
+            k == b"x-server-timing" and v.strip() in (b"1", b"true") for k, v in scope.get("headers", [])
+        )
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        t0 = time.perf_counter()
+
+        async def send_with_timing(message):
+            if wanted and message["type"] == "http.response.start":
+                entries = timings + [("total", time.perf_counter() - t0)]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(entries).encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
@@ -0,0 +1,115 @@
+"""
+Domande a scelta multipla come bitset.
+
+LimeSurvey esporta una domanda a scelta multipla come una colonna per opzione
+(`1.4 Titolo di studio ...: [laurea]`), con "Sì"/"No" o con l'etichetta
+dell'opzione (o "Y") solo se scelta. `selection_values` riconosce queste
+colonne dai soli conteggi per valore già calcolati (`ColumnStats`), senza
+rileggere i dati.
+
+`MultiSelectBits` codifica le scelte di un gruppo due volte con `np.packbits`:
+- per rispondente (righe × ceil(opzioni/8) byte): le combinazioni di opzioni
+  sono le righe distinte di questa matrice;
+- per opzione (opzioni × ceil(righe/8) byte): frequenze e co-occorrenze sono
+  conteggi di bit (`popcount`) di AND tra bitset, calcolati per blocchi di
+  opzioni con il broadcasting di numpy, senza cicli Python sulle coppie.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# valori (normalizzati) che indicano un'opzione scelta o non scelta
+YES_TOKENS = {"si", "yes", "y", "1", "1.0", "true", "x"}
+NO_TOKENS = {"no", "n", "0", "0.0", "false"}
+# byte di AND tra bitset materializzati al più per blocco di co-occorrenze
+COOCCURRENCE_BLOCK_BYTES = 1 << 24
+
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    """Bit a 1 di ogni byte (np.bitwise_count con numpy >= 2, altrimenti tabella)"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits)
+    return _POPCOUNT8[bits]
+
+
+def selection_values(counts: Dict[Any, int], label: str, normalize: Callable[[str], str]) -> Optional[List[Any]]:
+    """
+    Valori di una colonna che indicano l'opzione `label` come scelta, o None se la
+    colonna non è una casella di scelta multipla (valori diversi da sì/no/etichetta).
+    """
+    label = normalize(label)
+    selected = []
+    for value in counts:
+        v = normalize(str(value))
+        if v in YES_TOKENS or (label and v == label):
+            selected.append(value)
+        elif v not in NO_TOKENS:
+            return None
+    return selected
+
+
+class MultiSelectBits:
+    """Scelte di un gruppo a scelta multipla come bitset per rispondente e per opzione"""
+
+    def __init__(self, options: Sequence[str], selected: np.ndarray, answered: np.ndarray):
+        self.options = list(options)
+        self.n_rows = int(selected.shape[0])
+        self.by_respondent = np.packbits(selected, axis=1)
+        self.by_option = np.packbits(selected.T, axis=1)
+        self.answered = np.packbits(answered)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: Sequence[str], options: Sequence[str],
+                   values: Sequence[List[Any]]) -> "MultiSelectBits":
+        """Codifica le colonne `columns` (una per opzione); `values[j]` sono i valori "scelta" della j-esima"""
+        selected = np.zeros((len(df), len(columns)), dtype=bool)
+        for j, (c, vals) in enumerate(zip(columns, values)):
+            if vals:
+                selected[:, j] = df[c].isin(vals).to_numpy()
+        # ha risposto chi ha almeno una casella valorizzata (anche solo "No")
+        answered = df[list(columns)].notna().any(axis=1).to_numpy()
+        return cls(options, selected, answered)
+
+    def respondents(self) -> int:
+        return int(popcount(self.answered).sum(dtype=np.int64))
+
+    def option_counts(self) -> np.ndarray:
+        """Rispondenti che hanno scelto ciascuna opzione"""
+        return popcount(self.by_option).sum(axis=1, dtype=np.int64)
+
+    def cooccurrence(self) -> np.ndarray:
+        """Matrice opzioni × opzioni dei rispondenti che hanno scelto entrambe (diagonale = frequenze)"""
+        k, width = self.by_option.shape
+        out = np.zeros((k, k), dtype=np.int64)
+        block = max(1, COOCCURRENCE_BLOCK_BYTES // max(1, k * width))
+        for start in range(0, k, block):
+            both = self.by_option[start:start + block, None, :] & self.by_option[None, :, :]
+            out[start:start + block] = popcount(both).sum(axis=2, dtype=np.int64)
+        return out
+
+    def selections_per_respondent(self) -> np.ndarray:
+        """Quanti rispondenti hanno scelto 0, 1, 2, ... opzioni (solo chi ha risposto)"""
+        answered = np.unpackbits(self.answered, count=self.n_rows).astype(bool)
+        sizes = popcount(self.by_respondent[answered]).sum(axis=1, dtype=np.int64)
+        return np.bincount(sizes, minlength=len(self.options) + 1)
+
+    def combinations(self, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Combinazioni di opzioni scelte, dalla più frequente, con il numero di rispondenti
+        (al più `limit`), e numero di combinazioni distinte.
+        """
+        answered = np.unpackbits(self.answered, count=self.n_rows).astype(bool)
+        rows = self.by_respondent[answered]
+        if not len(rows):
+            return [], 0
+        patterns, counts = np.unique(rows, axis=0, return_counts=True)
+        order = np.argsort(-counts, kind="stable")[:limit]
+        chosen = np.unpackbits(patterns[order], axis=1, count=len(self.options)).astype(bool)
+        top = [
+            {"options": [self.options[j] for j in np.flatnonzero(mask)], "count": int(n)}
+            for mask, n in zip(chosen, counts[order])
+        ]
+        return top, int(len(patterns))
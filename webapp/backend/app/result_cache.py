@@ -0,0 +1,184 @@
+"""
+Cache LRU limitata per i risultati di analisi.
+
+Le chiavi includono l'impronta del dataset caricato, così un nuovo dataset
+non può mai restituire risultati di quello precedente. La cache è limitata
+sia nel numero di voci sia nella memoria stimata (dimensione JSON).
+
+`SharedResultCache` aggiunge alla LRU in memoria un secondo livello SQLite
+(WAL) condiviso tra i worker del server (vedi `shared_state`).
+"""
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("SURVEY_RESULT_CACHE_SIZE", "256"))
+DEFAULT_MAX_BYTES = int(float(os.environ.get("SURVEY_RESULT_CACHE_MB", "64")) * 1024 * 1024)
+DEFAULT_SHARED_MAX_BYTES = int(float(os.environ.get("SURVEY_SHARED_CACHE_MB", "256")) * 1024 * 1024)
+
+
+def estimate_size(value: Any) -> int:
+    """Stima in byte di un risultato serializzabile"""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class LRUResultCache:
+    """Cache LRU thread-safe con limite di voci e di byte e contatori hit/miss/eviction"""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = DEFAULT_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        self._items: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None):
+        size = estimate_size(value) if size is None else size
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._items[key] = (value, size)
+            self.bytes += size
+            while self._items and (len(self._items) > self.max_entries or self.bytes > self.max_bytes):
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def info(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._items),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SharedResultCache(LRUResultCache):
+    """LRU in memoria davanti a una tabella SQLite condivisa tra processi.
+
+    Una ricerca mancata in memoria prova il file SQLite, dove ogni worker salva i
+    risultati che calcola. `clear()` svuota solo il livello in memoria: le chiavi
+    contengono l'impronta del dataset, quindi le voci di un dataset precedente non
+    vengono più lette e, come le altre, escono in ordine di inserimento quando il
+    file supera `shared_max_bytes`. Gli errori SQLite (es. file bloccato troppo a
+    lungo) valgono come cache mancata.
+    """
+
+    def __init__(self, path: str, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 shared_max_bytes: Optional[int] = None):
+        super().__init__(max_entries, max_bytes)
+        self.path = path
+        self.shared_max_bytes = DEFAULT_SHARED_MAX_BYTES if shared_max_bytes is None else shared_max_bytes
+        self.shared_hits = 0
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # il file sparisce con la pulizia del progetto: si riapre quello nuovo
+        if conn is None or not os.path.exists(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, created REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return json.dumps(key, default=str)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = super().get(key)
+        if value is not None or self.max_entries <= 0:
+            return value
+        try:
+            row = self._conn().execute("SELECT value, size FROM results WHERE key = ?", (self._key(key),)).fetchone()
+            if row is None:
+                return None
+            value = pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError):
+            return None
+        with self._lock:
+            self.shared_hits += 1
+        super().put(key, value, size=row[1])
+        return value
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None):
+        size = estimate_size(value) if size is None else size
+        super().put(key, value, size=size)
+        if self.max_entries <= 0 or size > self.shared_max_bytes:
+            return
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, created) VALUES (?, ?, ?, ?)",
+                (self._key(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), size, time.time()),
+            )
+            self._evict(conn)
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.shared_max_bytes:
+            return
+        # le voci più vecchie fino a tornare al 90% del limite
+        excess = total - int(0.9 * self.shared_max_bytes)
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY created"):
+            if excess <= 0:
+                break
+            stale.append((key,))
+            excess -= size
+        conn.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    def info(self) -> Dict[str, Any]:
+        info = super().info()
+        try:
+            entries, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        except sqlite3.Error:
+            entries = size = None
+        info.update({"shared_entries": entries, "shared_bytes": size, "shared_max_bytes": self.shared_max_bytes,
+                     "shared_hits": self.shared_hits})
+        return info
@@ -0,0 +1,101 @@
+"""
+Matrice del dataset caricato condivisa tra processi tramite file NumPy mappati in memoria.
+
+Dopo `_encode_categoricals` quasi tutte le colonne di `SurveyAnalyzer.data` sono
+Categorical: codici interi compatti più poche categorie. `write_matrix` salva i
+codici (e le colonne numeriche) in un file `.npy` per tipo, una riga per
+colonna; `map_matrix` li riapre con `mmap_mode="r"` e ricostruisce il frame con
+`Categorical.from_codes` senza copiare i codici. Tutti i worker che servono lo
+stesso progetto, e i task del pool di processi che ripristinano lo snapshot,
+leggono così le stesse pagine della page cache invece di una copia ciascuno.
+
+I file si chiamano `<snapshot>.<token>.<dtype>.npy`: uno snapshot nuovo scrive
+file nuovi e solo dopo rimuove i vecchi, che restano validi per chi li ha già
+mappati. Le colonne object (testo libero) restano nel pickle dello snapshot.
+"""
+import glob
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+
+
+def _mappable(s: pd.Series) -> Optional[np.ndarray]:
+    """Array da pubblicare per la colonna, None se resta nel pickle"""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy()
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "iufbmM":
+        return s.to_numpy()
+    return None
+
+
+def write_matrix(df: pd.DataFrame, base_path: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Scrive le colonne mappabili di `df` accanto a `base_path`.
+    Restituisce le colonne rimanenti e il layout da passare a `map_matrix`."""
+    groups: Dict[str, list] = {}
+    columns: Dict[Any, Dict[str, Any]] = {}
+    for col, s in df.items():
+        values = _mappable(s)
+        if values is None:
+            continue
+        key = values.dtype.str
+        rows = groups.setdefault(key, [])
+        entry = {"dtype": key, "row": len(rows)}
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            entry.update(categories=s.cat.categories, ordered=bool(s.cat.ordered))
+        columns[col] = entry
+        rows.append(values)
+
+    token = uuid4().hex[:12]
+    files = {}
+    for key, rows in groups.items():
+        name = f"{os.path.basename(base_path)}.{token}.{np.dtype(key).name}.npy"
+        path = os.path.join(os.path.dirname(base_path), name)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.vstack(rows) if rows else np.empty((0, len(df)), dtype=key))
+        os.replace(tmp, path)
+        files[key] = name
+    rest = df[[c for c in df.columns if c not in columns]]
+    layout = {"files": files, "columns": columns, "order": list(df.columns)}
+    return rest, layout
+
+
+def map_matrix(rest: pd.DataFrame, layout: Dict[str, Any], base_path: str) -> pd.DataFrame:
+    """Ricostruisce il frame: colonne mappate in sola lettura più quelle di `rest`"""
+    folder = os.path.dirname(base_path)
+    # viste ndarray semplici sul mapping (np.memmap non è atteso da pandas)
+    arrays = {key: np.load(os.path.join(folder, name), mmap_mode="r").view(np.ndarray)
+              for key, name in layout["files"].items()}
+    data = {}
+    for col in layout["order"]:
+        entry = layout["columns"].get(col)
+        if entry is None:
+            data[col] = rest[col]
+            continue
+        values = arrays[entry["dtype"]][entry["row"]]
+        if "categories" in entry:
+            dtype = pd.CategoricalDtype(entry["categories"], ordered=entry["ordered"])
+            # codici già validati e nel tipo scelto da pandas per queste categorie: nessuna copia
+            data[col] = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+        else:
+            data[col] = values
+    return pd.DataFrame(data, index=rest.index, copy=False)
+
+
+def matrix_files(layout: Dict[str, Any], base_path: str) -> list:
+    return [os.path.join(os.path.dirname(base_path), name) for name in layout.get("files", {}).values()]
+
+
+def remove_stale(base_path: str, keep: Optional[list] = None):
+    """Elimina i file di matrici precedenti (chi li ha mappati continua a leggerli)"""
+    keep = set(keep or [])
+    for path in glob.glob(glob.escape(base_path) + ".*.npy"):
+        if path not in keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,106 @@
+"""
+Stato su disco condiviso tra più worker uvicorn (`uvicorn --workers N`).
+
+- `file_lock(lock_path)`: lock esclusivo tra processi (flock) per le scritture
+  read-modify-write di `metadata.json` e `jobs.json`. Ogni processo
+  rilegge quei file quando cambiano mtime o dimensione e fonde le proprie
+  modifiche campo per campo, così un worker non sovrascrive quelle degli altri.
+- `SURVEY_SHARED_STATE=1` attiva anche la cache dei risultati condivisa (SQLite
+  in modalità WAL, vedi `result_cache.SharedResultCache`): un'analisi calcolata
+  da un worker viene servita da tutti gli altri.
+
+Senza `fcntl` (Windows) il lock non fa nulla: resta supportato un solo worker.
+"""
+import json
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SHARED_STATE = os.environ.get("SURVEY_SHARED_STATE", "0").strip().lower() in ("1", "true", "yes")
+
+
+def worker_id() -> str:
+    """`host:pid` del processo, per distinguere i job di altri worker da quelli interrotti"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@contextmanager
+def file_lock(lock_path: str):
+    """Lock esclusivo tra processi (e tra thread) sul file `lock_path`"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    with open(lock_path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, dimensione) del file, None se non esiste"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def write_json_atomic(path: str, data: Dict[str, Any], **dump_kwargs):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **dump_kwargs)
+    os.replace(tmp, path)
+
+
+def worker_alive(worker_id: Optional[str]) -> bool:
+    """Vero se il processo `host:pid` è ancora in esecuzione (sempre vero per altri host)"""
+    if not worker_id or ":" not in worker_id:
+        return False
+    host, _, pid = worker_id.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_fields(base: Dict[str, Any], mine: Dict[str, Any], theirs: Dict[str, Any],
+                 list_fields: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """Fusione a tre vie: i campi cambiati localmente rispetto a `base` vincono, gli altri
+    prendono il valore su disco. Per le liste in `list_fields` si applicano aggiunte e
+    rimozioni locali alla lista su disco."""
+    merged = dict(theirs)
+    for key, value in mine.items():
+        if key not in base or value == base[key]:
+            merged.setdefault(key, value)
+            continue
+        if key in list_fields and isinstance(value, list) and isinstance(theirs.get(key), list):
+            removed = [v for v in base[key] or [] if v not in value]
+            merged[key] = [v for v in theirs[key] if v not in removed]
+            merged[key] += [v for v in value if v not in merged[key]]
+        else:
+            merged[key] = value
+    return merged
@@ -0,0 +1,633 @@
+"""
+Merge in streaming degli export LimeSurvey.
+
+1. Ogni file in ingresso viene convertito nella cache colonnare da processi
+   worker in parallelo (`SURVEY_MERGE_WORKERS`, default min(4, CPU)), che
+   restituiscono solo lo schema: colonne, righe e tipo di ogni colonna.
+2. Dagli schemi si ricava lo schema unione (colonne nell'ordine di prima
+   comparsa, come `pd.concat`) e il tipo finale di ogni colonna. Le colonne
+   di file diversi con lo stesso nome normalizzato (versioni del questionario
+   con punteggiatura o accenti diversi) confluiscono in una sola colonna,
+   con il nome della prima variante (`reconcile_columns`).
+3. I file vengono riletti uno alla volta dalla cache e scritti a blocchi di
+   righe in un workbook write-only di openpyxl e nella cache del file unito.
+
+In memoria c'è al più un file in ingresso alla volta, più le sole colonne a
+tipi misti del risultato (destinate al pickle della cache).
+
+`stream_append` aggiorna invece un dataset unito esistente con i soli export
+nuovi: ogni riga è confrontata per chiave e per hash del contenuto con quelle
+già presenti e si tengono solo le righe aggiunte o modificate. Chiavi e hash
+delle righe del dataset unito sono salvati accanto alla sua voce di cache
+(`<file>.<sha1>.rowkeys.pickle`), così si calcola l'hash solo dei file nuovi;
+le righe cambiate diventano una nuova parte della cache colonnare
+(`columnar_cache.append_entry`) e l'Excel del risultato viene scritto solo
+quando serve (`export_merged`). La chiave di una riga è l'ID risposta con
+l'origine del file (`source_identity`, salvata nella colonna `source_file`),
+che non dipende dall'ordine dei file né dal prefisso con data e ora dato ai
+file caricati.
+"""
+import hashlib
+import os
+import pickle
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from .columnar_cache import (CacheWriter, append_entry, cache_dir_for, ensure_cached, materialize, pa, pq,
+                             read_table)
+from .coverage import CoverageCounter
+
+MERGE_WORKERS = int(os.environ.get("SURVEY_MERGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+MERGE_BATCH_ROWS = int(os.environ.get("SURVEY_MERGE_BATCH_ROWS", "5000"))
+FILE_NUMBER_PATTERN = re.compile(r"results-survey(\d+)\.(?:xlsx|xls|csv)")
+# Prefisso "YYYYMMDD_HHMMSS_" aggiunto dal backend ai file caricati
+UPLOAD_PREFIX_PATTERN = re.compile(r"^\d{8}_\d{6}_")
+SOURCE_EXTENSION_PATTERN = re.compile(r"\.(?:xlsx|xls|csv)(?:\.gz)?$", re.IGNORECASE)
+# Colonna con l'origine (stabile tra un caricamento e l'altro) di ogni riga del dataset unito
+SOURCE_COLUMN = "source_file"
+# Chiave di una risposta nel dataset unito, usata dalla modalità append:
+# gli ID risposta di LimeSurvey si ripetono tra questionari diversi
+APPEND_KEY = ("ID risposta", SOURCE_COLUMN)
+
+
+def column_kind(s: pd.Series, empty: Optional[bool] = None) -> str:
+    """Tipo di una colonna ai fini dell'unione: empty, int, float, datetime, bool, str o mixed"""
+    if s.isna().all() if empty is None else empty:
+        return "empty"
+    kind = s.dtype.kind
+    if kind in "iu":
+        return "int"
+    if kind == "f":
+        return "float"
+    if kind == "M" and getattr(s.dtype, "tz", None) is None:
+        return "datetime"
+    if kind == "b":
+        return "bool"
+    if s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) == "string":
+        return "str"
+    return "mixed"
+
+
+def merged_dtype(kinds: List[str], complete: bool) -> str:
+    """Tipo finale di una colonna unita, come lo restituirebbe read_excel sul file scritto.
+    `complete` indica se la colonna è presente in tutti i file (altrimenti ha mancanti).
+    """
+    present = set(kinds) - {"empty"}
+    no_missing = complete and "empty" not in kinds
+    if not present:
+        return "float64"
+    if present == {"int"}:
+        return "int64" if no_missing else "float64"
+    if present <= {"int", "float"}:
+        return "float64"
+    if present == {"str"}:
+        return "object"
+    if present == {"datetime"}:
+        return "datetime64[ns]"
+    if present == {"bool"}:
+        # read_excel legge come 1.0/0.0 una colonna booleana con celle vuote
+        return "bool" if no_missing else "float64"
+    return "mixed"
+
+
+def _arrow_kind(arrow_type, empty: bool) -> str:
+    if empty or pa.types.is_null(arrow_type):
+        return "empty"
+    if pa.types.is_integer(arrow_type):
+        return "int"
+    if pa.types.is_floating(arrow_type):
+        return "float"
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return "str"
+    if pa.types.is_timestamp(arrow_type) and arrow_type.tz is None:
+        return "datetime"
+    if pa.types.is_boolean(arrow_type):
+        return "bool"
+    return "mixed"
+
+
+def _parquet_kinds(path: str) -> Optional[Dict[str, str]]:
+    """Tipi delle colonne dai soli metadati Parquet (schema e conteggio dei null), senza leggere i dati"""
+    pf = pq.ParquetFile(path)
+    md = pf.metadata
+    nulls = [0] * md.num_columns
+    for rg in range(md.num_row_groups):
+        group = md.row_group(rg)
+        for j in range(md.num_columns):
+            stats = group.column(j).statistics
+            if stats is None or not stats.has_null_count:
+                return None
+            nulls[j] += stats.null_count
+    return {
+        field.name: _arrow_kind(field.type, md.num_rows > 0 and nulls[j] == md.num_rows)
+        for j, field in enumerate(pf.schema_arrow)
+    }
+
+
+def inspect_input(file_path: str) -> Dict[str, Any]:
+    """Porta il file nella cache colonnare e ne restituisce lo schema (eseguita nei worker)"""
+    meta = ensure_cached(file_path)
+    cdir = cache_dir_for(file_path)
+    kinds: Optional[Dict[str, str]] = {}
+    if meta.get("parts"):
+        # un dataset unito aggiornato in append: le sue parti hanno tipi diversi
+        kinds = None
+    elif meta.get("data_file"):
+        kinds = _parquet_kinds(os.path.join(cdir, meta["data_file"]))
+    if kinds is None:
+        df = read_table(file_path)
+    else:
+        # solo le (poche) colonne a tipi misti del pickle affiancato vanno lette
+        df = read_table(file_path, columns=meta.get("sidecar_columns", [])) if meta.get("sidecar_file") else None
+    if df is not None:
+        empty = df.isna().all(axis=0).to_numpy()
+        kinds = dict(kinds or {})
+        kinds.update({c: column_kind(s, bool(e)) for (c, s), e in zip(df.items(), empty)})
+    return {
+        "rows": int(meta["rows"]),
+        "columns": list(meta["columns"]),
+        "kinds": kinds,
+    }
+
+
+def _original_name(file_path: str) -> str:
+    """Nome del file come è stato caricato, senza il prefisso con data e ora dell'upload"""
+    return UPLOAD_PREFIX_PATTERN.sub("", os.path.basename(file_path))
+
+
+def _file_number(file_path: str, ordinal: int) -> str:
+    m = FILE_NUMBER_PATTERN.search(_original_name(file_path))
+    # Se non segue il pattern, usa un numero sequenziale
+    return m.group(1) if m else str(ordinal)
+
+
+def source_identity(file_path: str) -> Optional[str]:
+    """
+    Origine di un export, uguale per tutti i ricaricamenti dello stesso questionario:
+    "results-surveyNNN" per gli export di LimeSurvey (anche se rinominati), altrimenti
+    il nome originale del file senza estensione. None se non ricavabile.
+    """
+    name = _original_name(file_path)
+    m = FILE_NUMBER_PATTERN.search(name)
+    if m:
+        return f"results-survey{m.group(1)}"
+    stem = SOURCE_EXTENSION_PATTERN.sub("", name).strip()
+    return stem or None
+
+
+def _excel_rows(block: pd.DataFrame):
+    values = block.astype(object).where(block.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def _inspect_all(file_paths: List[str], workers: int, progress: Callable[..., None]) -> Dict[str, Dict[str, Any]]:
+    """Schemi dei file leggibili, calcolati in parallelo dai worker"""
+    schemas: Dict[str, Dict[str, Any]] = {}
+
+    def collect(file_path: str, inspect):
+        try:
+            schemas[file_path] = inspect()
+        except Exception as e:
+            print(f"Errore nel leggere {file_path}: {e}")
+        progress(files_read=len(schemas))
+
+    if workers > 1 and len(file_paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(file_paths))) as pool:
+            futures = [(p, pool.submit(inspect_input, p)) for p in file_paths]
+            try:
+                for p, future in futures:
+                    collect(p, future.result)
+            except BaseException:
+                for _, future in futures:
+                    future.cancel()
+                raise
+    else:
+        for p in file_paths:
+            collect(p, lambda p=p: inspect_input(p))
+    return schemas
+
+
+def _union_columns(column_lists) -> List[str]:
+    # Stesso ordine di pd.concat: colonne nell'ordine di prima comparsa
+    columns: List[str] = []
+    seen = set()
+    for cols in column_lists:
+        for c in cols:
+            if c not in seen:
+                seen.add(c)
+                columns.append(c)
+    return columns
+
+
+def reconcile_columns(column_lists: List[List[str]], normalize: Callable[[str], str],
+                      names: Optional[List[str]] = None) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+    """
+    Rinomina per file che porta sullo stesso nome canonico le colonne equivalenti
+    (stesso `normalize`, es. punteggiatura o accenti diversi tra versioni del questionario).
+
+    Il nome canonico è la variante incontrata per prima. Le colonne equivalenti di uno
+    stesso file restano distinte (il file stesso le distingue): la k-esima occupa la
+    k-esima colonna canonica del suo nome normalizzato. Restituisce le rinomine per file
+    (solo i nomi che cambiano) e il report della riconciliazione: numero di colonne
+    (escluso `file_number`) senza e con la riconciliazione e varianti di ogni colonna canonica
+    con i file in cui compaiono.
+    """
+    names = names or [str(i) for i in range(1, len(column_lists) + 1)]
+    slots: Dict[str, List[str]] = {}
+    variants: Dict[str, Dict[str, List[str]]] = {}
+    renames: List[Dict[str, str]] = []
+    for cols, name in zip(column_lists, names):
+        by_key: Dict[str, List[str]] = {}
+        for c in cols:
+            n = normalize(c) if c not in ("file_number", SOURCE_COLUMN) else ""
+            # senza nome normalizzato la colonna si confronta solo per nome esatto
+            by_key.setdefault(n or f"\x1f{c}", []).append(c)
+        rename: Dict[str, str] = {}
+        for key, group in by_key.items():
+            taken = slots.setdefault(key, [])
+            exact = [c for c in group if c in taken]
+            free = [s for s in taken if s not in exact]
+            for c in group:
+                if c in exact:
+                    target = c
+                elif free:
+                    target = free.pop(0)
+                else:
+                    taken.append(c)
+                    target = c
+                if target != c:
+                    rename[c] = target
+                files = variants.setdefault(target, {}).setdefault(c, [])
+                if name not in files:
+                    files.append(name)
+        renames.append(rename)
+
+    groups = [{"canonical": canonical, "variants": found}
+              for canonical, found in variants.items() if len(found) > 1]
+    width = len({c for cols in column_lists for c in cols} - {"file_number", SOURCE_COLUMN})
+    return renames, {
+        "columns_before": width,
+        "columns_after": width - sum(len(g["variants"]) - 1 for g in groups),
+        "merged_columns": sum(len(g["variants"]) - 1 for g in groups),
+        "groups": groups,
+    }
+
+
+def _write_blocks(ws, df: pd.DataFrame, batch_rows: int, on_block: Callable[[pd.DataFrame], None]):
+    for start in range(0, len(df), batch_rows):
+        block = df.iloc[start:start + batch_rows]
+        for row in _excel_rows(block):
+            ws.append(row)
+        on_block(block)
+
+
+def _reconciled(schemas: Dict[str, Dict[str, Any]], valid: List[str], normalize: Optional[Callable[[str], str]],
+                base_columns: Optional[List[str]] = None):
+    """Rinomine per file (indicizzate per percorso) e report; senza `normalize` conta solo il nome esatto"""
+    lists = [schemas[p]["columns"] for p in valid]
+    names = [os.path.basename(p) for p in valid]
+    if base_columns is not None:
+        lists, names = [base_columns] + lists, ["(dataset unito)"] + names
+    renames, report = reconcile_columns(lists, normalize or str, names)
+    if base_columns is not None:
+        renames = renames[1:]
+    return dict(zip(valid, renames)), report
+
+
+def stream_merge(file_paths: List[str], output_path: str, progress: Callable[..., None],
+                 workers: Optional[int] = None, batch_rows: Optional[int] = None,
+                 normalize: Optional[Callable[[str], str]] = None) -> Dict[str, Any]:
+    """
+    Unisce i file in `output_path` senza mai tenerli tutti in memoria.
+    Con `normalize` le colonne equivalenti di file diversi confluiscono in una sola (vedi `reconcile_columns`).
+    """
+    workers = MERGE_WORKERS if workers is None else workers
+    batch_rows = max(1, MERGE_BATCH_ROWS if batch_rows is None else batch_rows)
+
+    schemas = _inspect_all(file_paths, workers, progress)
+    valid = [p for p in file_paths if p in schemas]
+    if not valid:
+        return {"error": "Nessun file valido trovato"}
+
+    # Schema unione con file_number e origine in coda a ogni file
+    renames, report = _reconciled(schemas, valid, normalize)
+    columns = _union_columns([renames[p].get(c, c) for c in schemas[p]["columns"]] + ["file_number", SOURCE_COLUMN]
+                             for p in valid)
+    kinds_of = {p: {renames[p].get(c, c): k for c, k in schemas[p]["kinds"].items()} for p in valid}
+    numbers = {p: _file_number(p, i) for i, p in enumerate(valid, 1)}
+    sources = {p: source_identity(p) for p in valid}
+    dtypes = {}
+    for c in columns:
+        if c == "file_number":
+            dtypes[c] = "int64" if all(n.isdigit() for n in numbers.values()) else "mixed"
+            continue
+        if c == SOURCE_COLUMN:
+            dtypes[c] = "int64" if all(s and s.isdigit() for s in sources.values()) else "object"
+            continue
+        kinds = [kinds_of[p][c] for p in valid if c in kinds_of[p]]
+        dtypes[c] = merged_dtype(kinds, complete=len(kinds) == len(valid))
+
+    rows_total = sum(schemas[p]["rows"] for p in valid)
+    progress("writing", rows_written=0, rows_total=rows_total)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(columns)
+    cache = CacheWriter(output_path, dtypes)
+    coverage = CoverageCounter(columns)
+    keyed = APPEND_KEY[0] in columns
+    keys, hashes = [], []
+    rows_written = 0
+
+    def on_block(block: pd.DataFrame):
+        nonlocal rows_written
+        cache.append(block)
+        if keyed:
+            keys.append(_row_keys(block[APPEND_KEY[0]], block[SOURCE_COLUMN]))
+            hashes.append(row_hashes(block, columns))
+        rows_written += len(block)
+        progress(rows_written=rows_written)
+
+    try:
+        for p in valid:
+            df = read_table(p).rename(columns=renames[p]).reindex(columns=columns)
+            number = int(numbers[p]) if dtypes["file_number"] == "int64" else numbers[p]
+            df["file_number"] = number
+            df[SOURCE_COLUMN] = int(sources[p]) if dtypes[SOURCE_COLUMN] == "int64" else sources[p]
+            coverage.add(number, df)
+            _write_blocks(ws, df, batch_rows, on_block)
+            del df
+        wb.save(output_path)
+        meta = cache.commit()
+    except BaseException:
+        cache.abort()
+        raise
+    coverage.save(output_path, meta)
+    if keyed:
+        _save_row_index(output_path, meta, pd.Index([]).append(keys),
+                        np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64))
+
+    return {
+        "success": True,
+        "rows": rows_written,
+        "columns": len(columns),
+        "files_processed": len(valid),
+        "reconciliation": report,
+    }
+
+
+# segnaposto dei mancanti: non un NUL finale, che numpy elimina dalle stringhe
+_MISSING = "\x1fNA\x1f"
+
+
+def _canonical_scalar(v) -> str:
+    if v is None or (isinstance(v, float) and np.isnan(v)) or v is pd.NaT:
+        return _MISSING
+    if isinstance(v, (bool, int, float, np.number)):
+        return str(float(v))
+    return str(v)
+
+
+def _canonical(s: pd.Series) -> pd.Series:
+    """Rappresentazione testuale di una colonna indipendente dal dtype con cui è stata letta
+    (5, 5.0 e True/1.0 coincidono, i mancanti hanno un unico segnaposto)"""
+    kind = s.dtype.kind
+    if kind in "iufb":
+        f = s.astype("float64")
+        return f.astype(str).where(f.notna(), _MISSING)
+    if kind == "M":
+        return s.astype(str).where(s.notna(), _MISSING)
+    if pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty"):
+        return s.where(s.notna(), _MISSING)
+    return s.map(_canonical_scalar)
+
+
+# moltiplicatore dispari (bigezione su 64 bit) per mescolare hash e chiave della colonna
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _cell_hashes(s: pd.Series, column: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(hash, presenti) delle celle di una colonna, indipendenti dal dtype con cui è stata letta
+    come `_canonical`: i numeri (anche in colonne miste, True = 1.0) valgono per il valore float"""
+    key = hashlib.md5(str(column).encode("utf-8")).hexdigest()[:16]
+    kind = s.dtype.kind
+    if kind in "iufb":
+        values = s.to_numpy(dtype="float64", na_value=np.nan) + 0.0  # -0.0 e 0.0 coincidono
+        present = ~np.isnan(values)
+        return (pd.util.hash_array(values) ^ np.uint64(int(key, 16))) * _MIX, present
+    canon = _canonical(s).to_numpy(dtype=object)
+    present = canon != _MISSING
+    hashes = pd.util.hash_array(canon, hash_key=key)
+    if kind == "O" and pd.api.types.infer_dtype(s, skipna=True) not in ("string", "empty"):
+        values = s.to_numpy(dtype=object)
+        numeric = np.fromiter((isinstance(v, (bool, int, float, np.number)) for v in values), bool, len(values))
+        numeric &= present
+        if numeric.any():
+            hashes[numeric] = _cell_hashes(pd.Series(values[numeric].astype("float64")), column)[0]
+    return hashes, present
+
+
+def row_hashes(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """
+    Hash a 64 bit del contenuto di ogni riga sulle colonne indicate: somma degli hash delle
+    celle, ciascuno con una chiave ricavata dal nome della colonna. Le celle vuote (e le
+    colonne assenti) non contano, così l'hash salvato di una riga resta valido quando il
+    dataset unito acquista colonne nuove.
+    """
+    total = np.zeros(len(df), dtype=np.uint64)
+    for c in columns:
+        if c not in df.columns:
+            continue
+        hashes, present = _cell_hashes(df[c], c)
+        total += np.where(present, hashes, np.uint64(0))
+    return total
+
+
+def _row_index_path(source_path: str, meta: Dict[str, Any]) -> str:
+    return os.path.join(cache_dir_for(source_path),
+                        f"{os.path.basename(source_path)}.{meta['sha1'][:16]}.rowkeys.pickle")
+
+
+def _save_row_index(source_path: str, meta: Dict[str, Any], keys: pd.Index, hashes: np.ndarray):
+    """Salva chiavi e hash delle righe accanto alla voce di cache `meta` del dataset unito"""
+    path = _row_index_path(source_path, meta)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pd.DataFrame({"key": keys.to_numpy(dtype=object), "hash": hashes}).to_pickle(tmp)
+    os.replace(tmp, path)
+
+
+def _row_index(source_path: str, meta: Dict[str, Any]) -> Tuple[pd.Index, np.ndarray]:
+    """Chiavi e hash delle righe del dataset unito; per un file unito senza indice salvato
+    (es. prima di questa versione) li calcola dal file e li salva"""
+    try:
+        saved = pd.read_pickle(_row_index_path(source_path, meta))
+    except (OSError, pickle.UnpicklingError, EOFError):
+        df = read_table(source_path)
+        keys, hashes = _row_keys(df[APPEND_KEY[0]], df[SOURCE_COLUMN]), row_hashes(df, list(df.columns))
+        _save_row_index(source_path, meta, keys, hashes)
+        return keys, hashes
+    return pd.Index(saved["key"]), saved["hash"].to_numpy()
+
+
+def _row_keys(ids: pd.Series, sources: pd.Series) -> pd.Index:
+    # l'origine come testo: un nome di file di sole cifre può essere riletto come intero
+    return pd.Index(_canonical(ids) + "\x1f" + sources.astype(str))
+
+
+def _append_file_numbers(base: pd.DataFrame, file_paths: List[str], sources: Dict[str, str]) -> Dict[str, Any]:
+    """
+    file_number dei file da accodare: quello già usato nel dataset unito per la stessa
+    origine, altrimenti l'id del questionario o il primo numero libero dopo quelli esistenti.
+    """
+    known = dict(zip(base[SOURCE_COLUMN].astype(str), base["file_number"]))
+    used = pd.to_numeric(base["file_number"], errors="coerce")
+    next_number = int(used.max()) + 1 if used.notna().any() else 1
+    numbers = {}
+    for p in file_paths:
+        number = known.get(sources[p])
+        if number is None:
+            number = _file_number(p, next_number)
+            number = int(number) if number.isdigit() else number
+            if number == next_number:
+                next_number += 1
+            known[sources[p]] = number
+        numbers[p] = number.item() if hasattr(number, "item") else number
+    return numbers
+
+
+def stream_append(base_path: str, file_paths: List[str], output_path: str, progress: Callable[..., None],
+                  workers: Optional[int] = None, normalize: Optional[Callable[[str], str]] = None) -> Dict[str, Any]:
+    """
+    Aggiorna il dataset unito `base_path` con i soli cambiamenti contenuti nei file.
+
+    Le righe sono identificate da (ID risposta, origine del file) e confrontate con un hash del
+    contenuto: quelle identiche sono scartate, quelle modificate sostituiscono la riga
+    esistente nella stessa posizione e quelle nuove sono accodate. Del dataset esistente si
+    leggono solo chiavi e hash salvati e le colonne `source_file` e `file_number`; le righe
+    cambiate vanno in una nuova parte della sua cache colonnare e `output_path` viene scritto
+    solo da `export_merged`. Se non cambia nulla non viene scritto alcun file. Con `normalize`
+    le colonne dei file nuovi equivalenti a una colonna esistente vi confluiscono, con il nome
+    già presente nel dataset unito.
+    """
+    workers = MERGE_WORKERS if workers is None else workers
+
+    schemas = _inspect_all(file_paths, workers, progress)
+    valid = [p for p in file_paths if p in schemas]
+    if not valid:
+        return {"error": "Nessun file valido trovato"}
+    sources = {p: source_identity(p) for p in valid}
+    unresolved = [os.path.basename(p) for p in valid if sources[p] is None]
+    if unresolved:
+        return {"error": f"Impossibile ricavare l'origine di: {', '.join(unresolved)}"}
+    meta = ensure_cached(base_path)
+    base_columns = list(meta["columns"])
+    for key in APPEND_KEY + ("file_number",):
+        if key not in base_columns:
+            return {"error": f"Colonna '{key}' mancante in {os.path.basename(base_path)}: "
+                             "ripetere il merge completo dei file"}
+    renames, report = _reconciled(schemas, valid, normalize, base_columns)
+    without_id = [os.path.basename(p) for p in valid
+                  if APPEND_KEY[0] not in {renames[p].get(c, c) for c in schemas[p]["columns"]}]
+    if without_id:
+        return {"error": f"Colonna '{APPEND_KEY[0]}' mancante in: {', '.join(without_id)}"}
+
+    columns = _union_columns([base_columns] + [[renames[p].get(c, c) for c in schemas[p]["columns"]]
+                                               + ["file_number", SOURCE_COLUMN] for p in valid])
+    base_keys, base_hashes = _row_index(base_path, meta)
+    origin = read_table(base_path, [SOURCE_COLUMN, "file_number"])
+    numbers = _append_file_numbers(origin, valid, sources)
+    digit_sources = origin[SOURCE_COLUMN].dtype.kind in "iu"
+    del origin
+    # in caso di chiavi ripetute nel dataset esistente vale l'ultima occorrenza
+    last = ~base_keys.duplicated(keep="last")
+    index, positions = base_keys[last], np.flatnonzero(last)
+
+    progress("comparing", files_compared=0, files_total=len(valid))
+    deltas, delta_keys, delta_hashes, delta_pos = [], [], [], []
+    skipped = 0
+    for i, p in enumerate(valid, 1):
+        df = read_table(p).rename(columns=renames[p]).reindex(columns=columns)
+        df["file_number"] = numbers[p]
+        df[SOURCE_COLUMN] = int(sources[p]) if digit_sources and sources[p].isdigit() else sources[p]
+        keys = _row_keys(df[APPEND_KEY[0]], df[SOURCE_COLUMN])
+        hashes = row_hashes(df, columns)
+        found = index.get_indexer(keys)
+        pos = np.where(found >= 0, positions[found], -1)
+        changed = pos < 0
+        if len(base_hashes):
+            changed |= base_hashes[pos] != hashes
+        skipped += int((~changed).sum())
+        if changed.any():
+            deltas.append(df[changed])
+            delta_keys.append(keys[changed])
+            delta_hashes.append(hashes[changed])
+            delta_pos.append(pos[changed])
+        del df
+        progress(files_compared=i)
+
+    if not deltas:
+        return {
+            "success": True,
+            "unchanged": True,
+            "mode": "append",
+            "base_file": os.path.basename(base_path),
+            "rows": int(meta["rows"]),
+            "columns": len(base_columns),
+            "files_processed": len(valid),
+            "added": 0,
+            "updated": 0,
+            "skipped": skipped,
+            "reconciliation": report,
+        }
+
+    delta = pd.concat(deltas, ignore_index=True)
+    keys = delta_keys[0].append(delta_keys[1:])
+    hashes, pos = np.concatenate(delta_hashes), np.concatenate(delta_pos)
+    # la stessa risposta in più file: vale il file elencato per ultimo
+    latest = ~keys.duplicated(keep="last")
+    skipped += int((~latest).sum())
+    delta, keys, hashes, pos = delta[latest], keys[latest], hashes[latest], pos[latest]
+    # prima le righe modificate, nell'ordine del dataset, poi quelle nuove
+    order = np.r_[np.flatnonzero(pos >= 0)[np.argsort(pos[pos >= 0], kind="stable")], np.flatnonzero(pos < 0)]
+    delta, keys, hashes, pos = delta.iloc[order], keys[order], hashes[order], pos[order]
+    updated = pos[pos >= 0]
+
+    progress("writing", rows_written=0, rows_total=len(delta))
+    out = append_entry(base_path, output_path, delta, updated)
+    out_hashes = base_hashes.copy()
+    out_hashes[updated] = hashes[:len(updated)]
+    _save_row_index(output_path, out, base_keys.append(keys[len(updated):]),
+                    np.concatenate([out_hashes, hashes[len(updated):]]))
+    progress(rows_written=len(delta))
+
+    return {
+        "success": True,
+        "mode": "append",
+        "base_file": os.path.basename(base_path),
+        "rows": int(out["rows"]),
+        "columns": len(columns),
+        "files_processed": len(valid),
+        "added": len(delta) - len(updated),
+        "updated": len(updated),
+        "skipped": skipped,
+        "reconciliation": report,
+    }
+
+
+def export_merged(path: str, batch_rows: Optional[int] = None) -> Dict[str, Any]:
+    """Scrive l'Excel di un dataset unito aggiornato da `stream_append`, se non è ancora stato scritto"""
+    batch_rows = max(1, MERGE_BATCH_ROWS if batch_rows is None else batch_rows)
+
+    def write(df: pd.DataFrame, target: str):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+        ws.append(list(df.columns))
+        _write_blocks(ws, df, batch_rows, lambda block: None)
+        wb.save(target)
+
+    return materialize(path, write)
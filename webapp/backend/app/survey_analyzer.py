@@ -1,4 +1,6 @@
+import hashlib
 import os
+import pickle
 import re
 import pandas as pd
 import numpy as np
@@ -7,23 +9,61 @@ import plotly.express as px
 import plotly.graph_objects as go
 from collections import Counter
 import textwrap
+import time
 try:
     import scipy.stats as stats
 except ImportError:
     stats = None
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, List, Optional
+
+from .column_stats import ColumnStats, compute_column_stats, likert_box
+from .columnar_cache import ensure_cached, read_table
+from .dataset_manifest import dataset_fingerprint, read_dataset, resolve
+from .header_scan import header_only, scan_headers
+from .metrics import RESULT_CACHE, record, stage, timed
+from .likert_encoder import LikertEncoder
+from .multi_select import MultiSelectBits, selection_values
+from .result_cache import LRUResultCache
+from .shared_matrix import map_matrix, matrix_files, remove_stale, write_matrix
+from .shared_state import file_lock
+from .streaming_merge import stream_append, stream_merge
+from .text_index import TextIndex
+
+ProgressCallback = Callable[..., None]
+
+# Da incrementare quando cambia la struttura dello stato salvato (ColumnStats incluso)
+SNAPSHOT_VERSION = 4
+# Da incrementare quando cambia il formato dei risultati di analyze_question_group: fa parte della
+# chiave della cache dei risultati, anche di quella condivisa su SQLite che sopravvive ai riavvii
+RESULT_VERSION = 2
+
+
+def _no_progress(stage: Optional[str] = None, **progress):
+    pass
+
 
 class SurveyAnalyzer:
     """
     Classe principale per l'analisi dei questionari basata sul notebook
     """
     
-    def __init__(self):
+    def __init__(self, cache_size: Optional[int] = None, cache_max_bytes: Optional[int] = None,
+                 result_cache: Optional[LRUResultCache] = None):
         self.data = None
+        self.dataset_fingerprint: Optional[str] = None
+        # una cache passata dall'esterno (es. condivisa tra worker) sostituisce quella locale
+        self.result_cache = result_cache if result_cache is not None else LRUResultCache(cache_size, cache_max_bytes)
         self.question_groups = {}
         self.group_labels = {}
         self._group_families = {}
         self.likert_summary = None
+        self.column_stats: Dict[str, ColumnStats] = {}
+        self.memory_report: Optional[Dict[str, Any]] = None
+        self._likert_encoders: Dict[str, LikertEncoder] = {}
+        # gruppo -> colonne e valori "scelta" se a scelta multipla (None altrimenti), calcolato alla prima richiesta
+        self._multi_select: Dict[str, Optional[Dict[str, Any]]] = {}
+        # risposte aperte del sorgente (anche delle colonne non selezionate), vedi `text_index`
+        self.text_index: Optional[TextIndex] = None
         
         # Configurazioni dal notebook
         self.OPEN_TEXT_KEYWORDS = [
@@ -34,7 +74,7 @@ class SurveyAnalyzer:
         
         self.META_EXACT = {
             'ID risposta', 'Data invio', 'Ultima pagina', 'Lingua iniziale', 'Seme',
-            'Data di inizio', 'Data dellultima azione', 'file_number'
+            'Data di inizio', 'Data dellultima azione', 'file_number', 'source_file'
         }
         
         self.EXCLUDE_PREFIXES = ['Tempo totale', 'Tempo per il gruppo di domande', 'Tempo per la domanda']
@@ -119,64 +159,35 @@ class SurveyAnalyzer:
         s = re.sub(r'\s+', ' ', s)
         return s
     
-    def merge_excel_files(self, file_paths: List[str], output_path: str) -> Dict[str, Any]:
+    @timed("merge")
+    def merge_excel_files(self, file_paths: List[str], output_path: str,
+                          progress: Optional[ProgressCallback] = None,
+                          workers: Optional[int] = None,
+                          append_to: Optional[str] = None) -> Dict[str, Any]:
         """
-        Unisce più file Excel in un unico dataset
+        Unisce più file Excel in un unico dataset, in streaming (vedi `streaming_merge`).
+        Con `append_to` aggiorna il dataset unito indicato con le sole righe nuove o modificate.
+        Le colonne equivalenti per `normalize_name` confluiscono in una sola; il report è in `reconciliation`.
+        `progress(stage, **contatori)` riceve l'avanzamento e può interrompere il lavoro sollevando un'eccezione.
         """
-        pattern = re.compile(r"results-survey(\d+)\.xlsx")
-        dfs = []
-        
-        for file_path in file_paths:
-            filename = os.path.basename(file_path)
-            m = pattern.match(filename)
-            
-            try:
-                df = pd.read_excel(file_path)
-                if m:
-                    df["file_number"] = m.group(1)
-                else:
-                    # Se non segue il pattern, usa un numero sequenziale
-                    df["file_number"] = str(len(dfs) + 1)
-                dfs.append(df)
-            except Exception as e:
-                print(f"Errore nel leggere {file_path}: {e}")
-                continue
-        
-        if not dfs:
-            return {"error": "Nessun file valido trovato"}
-        
-        merged = pd.concat(dfs, ignore_index=True)
-        merged.to_excel(output_path, index=False)
-        
-        return {
-            "success": True,
-            "rows": len(merged),
-            "columns": len(merged.columns),
-            "files_processed": len(dfs)
-        }
+        progress = progress or _no_progress
+        progress("reading", files_read=0, files_total=len(file_paths))
+        if append_to:
+            return stream_append(append_to, file_paths, output_path, progress, workers=workers,
+                                 normalize=self.normalize_name)
+        return stream_merge(file_paths, output_path, progress, workers=workers, normalize=self.normalize_name)
     
-    def analyze_headers(self, file_path: str) -> Dict[str, Any]:
+    @timed("analyze_headers")
+    def analyze_headers(self, file_path: str, mode: str = "full") -> Dict[str, Any]:
         """
-        Analizza le intestazioni del dataset
+        Analizza le intestazioni del dataset.
+        `mode="header"` legge solo i nomi delle colonne (normalizzazione e duplicati);
+        `mode="full"` calcola anche le statistiche per colonna in un passaggio a blocchi
+        (vedi `header_scan`).
         """
-        df = pd.read_excel(file_path)
-        rows = []
-        
-        for c in df.columns:
-            s = df[c]
-            rows.append({
-                'original_name': c,
-                'normalized_name': self.normalize_name(c),
-                'dtype': str(s.dtype),
-                'row_count': len(df),
-                'non_null_count': int(s.notna().sum()),
-                'null_count': int(s.isna().sum()),
-                'non_null_pct': round(100 * s.notna().mean(), 2),
-                'unique_count_non_null': int(s.dropna().nunique()) if s.notna().any() else 0,
-                'sample_values': ', '.join(s.dropna().astype(str).unique()[:3])
-            })
-        
-        return {"headers": rows, "total_rows": len(df), "total_columns": len(df.columns)}
+        if mode == "header":
+            return header_only(file_path, self.normalize_name)
+        return scan_headers(file_path, self.normalize_name)
     
     def is_open_text(self, name: str) -> bool:
         """Verifica se una colonna è testo aperto"""
@@ -185,7 +196,10 @@ class SurveyAnalyzer:
     
     def select_useful_columns(self, headers_analysis: List[Dict]) -> List[str]:
         """
-        Seleziona le colonne utili per l'analisi
+        Seleziona le colonne utili per l'analisi.
+        Senza conteggi (analisi delle sole intestazioni) una colonna non viene scartata
+        come vuota, mentre un campo di testo aperto viene scartato: non si sa se ha
+        poche risposte distinte.
         """
         candidates = []
         
@@ -195,13 +209,13 @@ class SurveyAnalyzer:
             if name in self.META_EXACT or any(name.startswith(p) for p in self.EXCLUDE_PREFIXES):
                 continue
             
-            non_null = int(row.get('non_null_count', 0))
-            unique_cnt = int(row.get('unique_count_non_null', 0)) if pd.notna(row.get('unique_count_non_null', 0)) else 0
+            non_null = row.get('non_null_count')
+            unique_cnt = row.get('unique_count_non_null')
             
-            if non_null == 0:
+            if non_null is not None and int(non_null) == 0:
                 continue
             
-            if self.is_open_text(name) and unique_cnt > 20:
+            if self.is_open_text(name) and (unique_cnt is None or pd.isna(unique_cnt) or int(unique_cnt) > 20):
                 continue
             
             if name in self.TITLE_OF_STUDY_WHITELIST:
@@ -209,8 +223,6 @@ class SurveyAnalyzer:
                 continue
             
             if any(name.startswith(p) for p in self.KEEP_PREFIXES):
-                if self.is_open_text(name) and unique_cnt > 20:
-                    continue
                 candidates.append(name)
         
         # Rimuovi duplicati mantenendo l'ordine
@@ -223,10 +235,264 @@ class SurveyAnalyzer:
         
         return keep
     
-    def load_data(self, file_path: str):
-        """Carica il dataset"""
-        self.data = pd.read_excel(file_path)
+    def load_data(self, file_path: str, progress: Optional[ProgressCallback] = None):
+        """Carica il dataset, workbook o manifest `dataset_*.json` (con avanzamento opzionale come in `merge_excel_files`)"""
+        progress = progress or _no_progress
+        progress("reading")
+        with stage("parse"):
+            new_fingerprint = dataset_fingerprint(file_path)
+            if new_fingerprint != self.dataset_fingerprint:
+                self.result_cache.clear()
+            # per un dataset virtuale si leggono solo le sue colonne del sorgente
+            self.data = read_dataset(file_path)
+        self.dataset_fingerprint = new_fingerprint
+        before = int(self.data.memory_usage(deep=True).sum())
+        with stage("analyze_questions"):
+            self._analyze_questions(progress)
+        progress("encoding")
+        with stage("encode_categoricals"):
+            self._encode_categoricals()
+        after = int(self.data.memory_usage(deep=True).sum())
+        self.memory_report = {
+            "before_bytes": before,
+            "after_bytes": after,
+            "saved_pct": round(100 * (1 - after / before), 1) if before else 0.0,
+        }
+        progress("statistics")
+        with stage("column_stats"):
+            self._compute_column_stats()
+        progress("indexing")
+        with stage("text_index"):
+            self._build_text_index(file_path)
+
+    def text_columns(self, columns: List[str]) -> List[str]:
+        """Colonne di testo aperto tra quelle indicate (escluse le meta)"""
+        return [c for c in columns if c not in self.META_EXACT and self.is_open_text(c)]
+
+    def _build_text_index(self, file_path: str):
+        """Indicizza le risposte aperte del sorgente del dataset, anche se escluse dalla selezione"""
+        source, _ = resolve(file_path)
+        present = ensure_cached(source)["columns"]
+        columns = self.text_columns(present)
+        id_column = 'ID risposta' if 'ID risposta' in present else None
+        index = TextIndex(columns, id_column)
+        if columns:
+            index.add(read_table(source, columns + ([id_column] if id_column else [])), self.norm_txt)
+        self.text_index = index
+
+    def search_text(self, query: str, columns: Optional[List[str]] = None, phrase: bool = False,
+                    limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """Ricerca nelle risposte aperte (tutte le parole, o la frase con `phrase`)"""
+        if self.text_index is None:
+            raise ValueError("Nessun dataset caricato")
+        return self.text_index.search(query, self.norm_txt, columns, phrase, limit, offset)
+
+    def text_term_frequencies(self, columns: Optional[List[str]] = None, top: int = 30,
+                              bigrams: bool = False) -> List[Dict[str, Any]]:
+        """Termini più frequenti delle risposte aperte, per colonna"""
+        if self.text_index is None:
+            raise ValueError("Nessun dataset caricato")
+        indexed = self.text_index.columns
+        if columns is not None:
+            keep = set(columns)
+            indexed = [c for c in indexed if c in keep]
+        return [self.text_index.term_frequencies(c, top, bigrams) for c in indexed]
+
+    def append_rows(self, batch: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Accoda un blocco di rispondenti al dataset caricato aggiornando le statistiche
+        per colonna in O(righe del blocco), senza ricaricare né rianalizzare i gruppi.
+        Le colonne dei dati vengono comunque concatenate: la copia dei dati resta O(righe totali).
+        Le colonne del blocco sono allineate a quelle del dataset (le altre sono ignorate, salvo
+        le colonne di testo aperto, che vanno nell'indice delle risposte aperte).
+        Se l'aggiunta cambia la famiglia Likert di un gruppo, che prima non aveva
+        risposte, si ripete l'analisi completa.
+        """
+        if self.data is None:
+            raise ValueError("Nessun dataset caricato")
+        batch = batch.reset_index(drop=True)
+        old_rows = len(self.data)
+        if self.text_index is not None:
+            self.text_index.add(batch, self.norm_txt, old_rows)
+        batch = batch.reindex(columns=self.data.columns)
+        likert_cols = self._likert_columns()
+
+        columns = {}
+        batch_stats = {}
+        recomputed = []
+        for col in self.data.columns:
+            old, add = self.data[col], batch[col]
+            family = likert_cols.get(col)
+            encoder = self.likert_encoder(family) if family else None
+            batch_stats[col] = ColumnStats.from_series(add, encoder, family)
+            if isinstance(old.dtype, pd.CategoricalDtype):
+                known = set(old.cat.categories)
+                extra = [v for v in pd.unique(add.dropna()) if v not in known]
+                if extra:
+                    old = old.cat.add_categories(extra)
+                add = pd.Series(pd.Categorical(add, dtype=old.dtype))
+            merged = pd.concat([old, add], ignore_index=True)
+            if merged.dtype != old.dtype:
+                # es. interi che diventano float: le chiavi dei conteggi cambiano tipo
+                recomputed.append(col)
+            columns[col] = merged
+        self.data = pd.DataFrame(columns)
+
+        # la famiglia dipende dal primo valore di ogni colonna: cambia solo se il blocco
+        # porta il primo valore di una colonna finora vuota
+        def first_values(stats: ColumnStats) -> bool:
+            return any(str(v).strip() for v in stats.counts)
+
+        families_changed = False
+        for g, cols in self.question_groups.items():
+            if self._group_families.get(g) is None and any(
+                not first_values(self.column_stats[c]) and first_values(batch_stats[c]) for c in cols
+            ):
+                families_changed |= self.guess_family_from_first_row(cols) is not None
+        if families_changed:
+            self._rebuild()
+        else:
+            for col in self.data.columns:
+                if col in recomputed:
+                    family = likert_cols.get(col)
+                    encoder = self.likert_encoder(family) if family else None
+                    self.column_stats[col] = ColumnStats.from_series(self.data[col], encoder, family)
+                    continue
+                dtype = self.data[col].dtype
+                # le categorie Likert seguono la scala, non l'ordine di comparsa dei conteggi
+                unordered = isinstance(dtype, pd.CategoricalDtype) and not dtype.ordered
+                self.column_stats[col] = self.column_stats[col].merge(
+                    batch_stats[col],
+                    key_order=list(dtype.categories) if unordered else None,
+                )
+
+        self._multi_select = {}
+        self.result_cache.clear()
+        digest = hashlib.sha1((self.dataset_fingerprint or "").encode())
+        digest.update(pd.util.hash_pandas_object(batch.astype(object), index=False).to_numpy().tobytes())
+        self.dataset_fingerprint = digest.hexdigest()
+        if self.memory_report and old_rows:
+            # stima proporzionale, per non rimisurare tutto il dataset
+            self.memory_report["after_bytes"] = int(self.memory_report["after_bytes"] * len(self.data) / old_rows)
+        return {
+            "rows_added": len(batch),
+            "rows": len(self.data),
+            "recomputed_columns": len(self.data.columns) if families_changed else len(recomputed),
+            "full_rebuild": families_changed,
+        }
+
+    def _rebuild(self):
+        """Rianalizza da capo i dati in memoria, come dopo `load_data`"""
+        self.data = pd.DataFrame({
+            c: s.astype(object) if isinstance(s.dtype, pd.CategoricalDtype) else s
+            for c, s in self.data.items()
+        })
         self._analyze_questions()
+        self._encode_categoricals()
+        self._compute_column_stats()
+
+    def save_snapshot(self, path: str, dataset_path: str):
+        """Salva in un pickle lo stato del dataset caricato, per ripartire senza ricaricarlo.
+        Codici delle colonne Categorical e colonne numeriche vanno in file .npy che ogni
+        processo mappa in sola lettura (vedi `shared_matrix`); anche questo analyzer passa
+        a leggerli da lì, rilasciando la propria copia."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with file_lock(f"{path}.lock"):
+            rest, layout = write_matrix(self.data, path)
+            self._write_snapshot(path, dataset_path, rest, layout)
+            remove_stale(path, keep=matrix_files(layout, path))
+        self.data = map_matrix(rest, layout, path)
+
+    def _write_snapshot(self, path: str, dataset_path: str, rest: pd.DataFrame, layout: Dict[str, Any]):
+        state = {
+            "version": SNAPSHOT_VERSION,
+            "dataset_file": os.path.basename(dataset_path),
+            "dataset_fingerprint": self.dataset_fingerprint,
+            "data": rest,
+            "matrix": layout,
+            "question_groups": self.question_groups,
+            "group_labels": self.group_labels,
+            "group_families": self._group_families,
+            "likert_summary": self.likert_summary,
+            "column_stats": self.column_stats,
+            "memory_report": self.memory_report,
+            "text_index": self.text_index,
+        }
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def load_snapshot(self, path: str, dataset_path: str) -> bool:
+        """Ripristina lo stato salvato se si riferisce ancora allo stesso file del dataset"""
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except Exception:
+            return False
+        if (
+            not isinstance(state, dict)
+            or state.get("version") != SNAPSHOT_VERSION
+            or state.get("dataset_file") != os.path.basename(dataset_path)
+            or state.get("dataset_fingerprint") != dataset_fingerprint(dataset_path)
+        ):
+            return False
+        try:
+            data = map_matrix(state["data"], state["matrix"], path)
+        except (OSError, ValueError, KeyError):
+            # matrici rimosse da uno snapshot più recente: si ricarica il dataset
+            return False
+        self.result_cache.clear()
+        self.dataset_fingerprint = state["dataset_fingerprint"]
+        self.data = data
+        self.question_groups = state["question_groups"]
+        self.group_labels = state["group_labels"]
+        self._group_families = state["group_families"]
+        self.likert_summary = state["likert_summary"]
+        self.column_stats = state["column_stats"]
+        self.memory_report = state["memory_report"]
+        self.text_index = state["text_index"]
+        self._multi_select = {}
+        return True
+
+    def _likert_columns(self) -> Dict[str, str]:
+        """Colonna -> famiglia Likert rilevata per il suo gruppo"""
+        mapping = {}
+        for g, cols in self.question_groups.items():
+            family = self._group_families.get(g)
+            if family and family in self.LIKERT_FAMILIES:
+                for c in cols:
+                    mapping[c] = family
+        return mapping
+
+    def _encode_categoricals(self):
+        """Converte le colonne testuali in Categorical con codici interi compatti.
+        Le colonne Likert usano come categorie ordinate la scala della famiglia
+        (codice 0..K-1 = punteggio 1..K); eventuali valori fuori scala vengono
+        accodati dopo. Le colonne a testo libero molto varie restano object.
+        """
+        if self.data is None:
+            return
+        likert_cols = self._likert_columns()
+        converted = {}
+        for col in self.data.columns:
+            s = self.data[col]
+            if s.dtype != object:
+                continue
+            values = list(pd.unique(s.dropna()))
+            family = likert_cols.get(col)
+            if family:
+                order = self.LIKERT_FAMILIES[family]['order']
+                in_scale = set(order)
+                extra = [v for v in values if v not in in_scale]
+                converted[col] = pd.Categorical(s, categories=list(order) + extra, ordered=True)
+            elif len(values) <= 0.5 * len(s):
+                converted[col] = pd.Categorical(s, categories=values)
+        if converted:
+            self.data = pd.DataFrame(
+                {c: converted.get(c, self.data[c]) for c in self.data.columns},
+                index=self.data.index,
+            )
     
     def clean_question_text(self, col: str) -> str:
         """Pulisce il testo della domanda"""
@@ -280,20 +546,14 @@ class SurveyAnalyzer:
                 fam_counts[matched_family] = fam_counts.get(matched_family, 0) + 1
         return max(fam_counts, key=fam_counts.get) if fam_counts else None
     
-    def _analyze_questions(self):
+    def _analyze_questions(self, progress: Optional[ProgressCallback] = None):
         """Analizza e raggruppa le domande"""
         if self.data is None:
             return
+        progress = progress or _no_progress
         
-        # Raggruppa colonne per prefisso numerico
-        num_pat = re.compile(r'^(\d+\.\d+)(?:[\s\S]*)$')
-        self.question_groups = {}
-        
-        for col in self.data.columns:
-            m = num_pat.match(col)
-            if m:
-                key = m.group(1)
-                self.question_groups.setdefault(key, []).append(col)
+        self.question_groups = self.group_columns(self.data.columns)
+        self._multi_select = {}
         
         # Crea etichette leggibili
         self.group_labels = {}
@@ -302,11 +562,15 @@ class SurveyAnalyzer:
             self.group_labels[key] = max(set(texts), key=lambda t: (texts.count(t), len(t))) if texts else key
         
         # Rileva famiglie Likert
-        self._group_families = {g: self.guess_family_from_first_row(cols) for g, cols in self.question_groups.items()}
+        self._group_families = {}
+        progress("grouping", groups_analyzed=0, groups_total=len(self.question_groups))
+        for i, (g, cols) in enumerate(self.question_groups.items(), 1):
+            self._group_families[g] = self.guess_family_from_first_row(cols)
+            progress(groups_analyzed=i)
         
         # Crea riassunto Likert
         likert_data = []
-        for g in sorted(self.question_groups.keys(), key=lambda k: (int(k.split('.')[0]), int(k.split('.')[1]))):
+        for g in sorted(self.question_groups.keys(), key=self.group_sort_key):
             likert_data.append({
                 'group': g,
                 'label': self.group_labels.get(g, g),
@@ -315,7 +579,83 @@ class SurveyAnalyzer:
             })
         
         self.likert_summary = pd.DataFrame(likert_data)
+
+    def likert_encoder(self, family: str) -> LikertEncoder:
+        """Encoder (memorizzato) della famiglia Likert, con i sinonimi di `tokens`"""
+        encoder = self._likert_encoders.get(family)
+        if encoder is None:
+            cfg = self.LIKERT_FAMILIES[family]
+            encoder = LikertEncoder(cfg['order'], cfg['tokens'], self.norm_txt)
+            self._likert_encoders[family] = encoder
+        return encoder
+
+    def _compute_column_stats(self):
+        """Precalcola conteggi e istogrammi Likert di ogni colonna"""
+        likert_encoders = {
+            c: (family, self.likert_encoder(family))
+            for c, family in self._likert_columns().items()
+        }
+        self.column_stats = compute_column_stats(self.data, likert_encoders)
     
+    @staticmethod
+    def group_columns(columns) -> Dict[str, List[str]]:
+        """Raggruppa le colonne per prefisso numerico ('2.1 Testo [voce]' -> '2.1')"""
+        num_pat = re.compile(r'^(\d+\.\d+)(?:[\s\S]*)$')
+        groups: Dict[str, List[str]] = {}
+        for col in columns:
+            m = num_pat.match(col)
+            if m:
+                groups.setdefault(m.group(1), []).append(col)
+        return groups
+
+    @staticmethod
+    def group_sort_key(key: str) -> tuple:
+        """Ordine naturale delle chiavi di gruppo ('2.10' dopo '2.9')"""
+        return tuple(int(p) for p in key.split('.'))
+
+    def group_keys(self) -> List[str]:
+        """Chiavi dei gruppi in ordine naturale"""
+        return sorted(self.question_groups.keys(), key=self.group_sort_key)
+
+    def multi_select_layout(self, group_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Colonne, opzioni e valori "scelta" del gruppo se è una domanda a scelta multipla,
+        altrimenti None. Si decide dai conteggi per valore già calcolati: un gruppo non Likert
+        con almeno due colonne `[opzione]` che contengono solo sì/no o l'etichetta dell'opzione
+        (le colonne di testo aperto, come `[Altro]`, sono escluse).
+        """
+        if group_key in self._multi_select:
+            return self._multi_select[group_key]
+        layout = None
+        if group_key in self.question_groups and not self._group_families.get(group_key):
+            columns, options, values = [], [], []
+            for c in self.question_groups[group_key]:
+                _, sub = self.split_title_parts(c)
+                if not sub or self.is_open_text(c):
+                    continue
+                selected = selection_values(self.column_stats[c].counts, sub, self.norm_txt)
+                if selected is None:
+                    columns = []
+                    break
+                columns.append(c)
+                options.append(sub)
+                values.append(selected)
+            if len(columns) >= 2 and any(values):
+                layout = {"columns": columns, "options": options, "values": values}
+        self._multi_select[group_key] = layout
+        return layout
+
+    def multi_select_groups(self) -> List[str]:
+        """Gruppi a scelta multipla, in ordine naturale"""
+        return [g for g in self.group_keys() if self.multi_select_layout(g) is not None]
+
+    def multi_select_bits(self, group_key: str) -> Optional[MultiSelectBits]:
+        """Scelte del gruppo come bitset per rispondente e per opzione (None se non a scelta multipla)"""
+        layout = self.multi_select_layout(group_key)
+        if layout is None:
+            return None
+        return MultiSelectBits.from_frame(self.data, layout["columns"], layout["options"], layout["values"])
+
     def get_question_groups(self) -> Dict[str, Any]:
         """Restituisce i gruppi di domande"""
         if not self.question_groups:
@@ -324,7 +664,8 @@ class SurveyAnalyzer:
         return {
             "groups": list(self.question_groups.keys()),
             "labels": self.group_labels,
-            "likert_families": self._group_families
+            "likert_families": self._group_families,
+            "multi_select_groups": self.multi_select_groups(),
         }
     
     def wrap_title(self, title: str, max_chars: int = 140) -> str:
@@ -337,8 +678,38 @@ class SurveyAnalyzer:
     def analyze_question_group(self, group_key: str, chart_type: str = 'bar', 
                              show_percentages: bool = True, include_na: bool = False) -> Dict[str, Any]:
         """
-        Analizza un gruppo di domande e genera grafici
+        Analizza un gruppo di domande e genera grafici.
+        I risultati sono memorizzati in una cache LRU legata al dataset caricato:
+        il dizionario restituito è condiviso e non va modificato.
         """
+        key = (RESULT_VERSION, self.dataset_fingerprint, group_key, chart_type, bool(show_percentages),
+               bool(include_na))
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            RESULT_CACHE.inc("hit")
+            return cached
+        RESULT_CACHE.inc("miss")
+        with stage("analyze_group"):
+            result = self._analyze_question_group(group_key, chart_type, show_percentages, include_na)
+        if "error" not in result:
+            self.result_cache.put(key, result)
+        return result
+
+    def iter_question_groups(self, group_keys: Optional[List[str]] = None, chart_type: str = 'bar',
+                             show_percentages: bool = True, include_na: bool = False):
+        """Analizza più gruppi (tutti se `group_keys` è None) restituendo i risultati uno alla volta"""
+        for key in group_keys or self.group_keys():
+            yield self.analyze_question_group(key, chart_type, show_percentages, include_na)
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Contatori della cache dei risultati"""
+        info = self.result_cache.info()
+        info["dataset_fingerprint"] = self.dataset_fingerprint
+        return info
+
+    def _analyze_question_group(self, group_key: str, chart_type: str, show_percentages: bool,
+                                include_na: bool) -> Dict[str, Any]:
+        """Calcolo effettivo dell'analisi di un gruppo (senza cache)"""
         try:
             if self.data is None:
                 return {"error": "Nessun dataset caricato"}
@@ -360,22 +731,19 @@ class SurveyAnalyzer:
                      '#FF9FF3', '#54A0FF', '#5F27CD', '#00D2D3', '#FF9F43',
                      '#6C5CE7', '#A29BFE', '#FD79A8', '#E17055', '#00B894']
             
-            # For small multiples, render subquestion charts as bars
-            effective_chart_type_for_sub = 'bar' if chart_type == 'small_multiples' else chart_type
+            # For small multiples and multi-select groups, render subquestion charts as bars
+            effective_chart_type_for_sub = 'bar' if chart_type in ('small_multiples', 'multi_select') else chart_type
 
-            # Cache per-subquestion counts and numeric data for potential group-level charts
+            # Per-subquestion counts and Likert codes come from the precomputed statistics table
             per_sub_counts = []  # list of (column, Counter, total)
-            per_sub_numeric = {}  # column -> list numeric values (for likert only)
+            per_sub_hist = {}  # column -> histogram of the Likert codes 1..k (for likert only)
+            likert_family = self._group_families.get(group_key)
 
             for i, col in enumerate(cols, 1):
-                # Prendi i dati della colonna
-                series = self.data[col]
-                original_count = len(series)
-                
-                if not include_na:
-                    series = series.dropna()
+                col_stats = self.column_stats[col]
+                total = col_stats.n_rows if include_na else col_stats.valid_count
                 
-                if len(series) == 0:
+                if total == 0:
                     results["subquestions"].append({
                         "index": i,
                         "column": col,
@@ -384,35 +752,22 @@ class SurveyAnalyzer:
                     continue
                 
                 # Conta i valori
-                counts = Counter(series)
-                total = sum(counts.values())
+                counts = col_stats.counter(include_na)
                 
                 # Statistiche descrittive
                 stats_data = {
                     "total_responses": total,
-                    "missing_values": original_count - total if not include_na else 0
+                    "missing_values": col_stats.na_count if not include_na else 0
                 }
                 
                 # Calcola statistiche numeriche per Likert
-                likert_family = self._group_families.get(group_key)
-                if likert_family and likert_family in self.LIKERT_FAMILIES:
-                    order = self.LIKERT_FAMILIES[likert_family]['order']
-                    numeric_values = []
-                    for val in series:
-                        try:
-                            idx = order.index(val)
-                            numeric_values.append(idx + 1)
-                        except ValueError:
-                            continue
-                    if numeric_values:
-                        per_sub_numeric[col] = numeric_values
-                    
-                    if numeric_values:
-                        stats_data.update({
-                            "mean": round(np.mean(numeric_values), 2),
-                            "median": round(np.median(numeric_values), 1),
-                            "std": round(np.std(numeric_values, ddof=1), 2) if len(numeric_values) > 1 else 0
-                        })
+                if likert_family and likert_family in self.LIKERT_FAMILIES and col_stats.likert_n:
+                    per_sub_hist[col] = col_stats.likert_hist
+                    stats_data.update({
+                        "mean": round(col_stats.likert_mean(), 2),
+                        "median": round(col_stats.likert_median(), 1),
+                        "std": round(col_stats.likert_std(ddof=1), 2) if col_stats.likert_n > 1 else 0
+                    })
                 
                 # Distribuzione dei valori
                 distribution = []
@@ -428,7 +783,7 @@ class SurveyAnalyzer:
                 per_sub_counts.append((col, counts, total))
 
                 # Genera grafico per sotto-domanda
-                chart_data = self._generate_chart_data(counts, col, effective_chart_type_for_sub, show_percentages, colors, group_key, numeric_data=per_sub_numeric.get(col))
+                chart_data = self._generate_chart_data(counts, col, effective_chart_type_for_sub, show_percentages, colors, group_key, likert_hist=per_sub_hist.get(col))
                 
                 results["subquestions"].append({
                     "index": i,
@@ -440,12 +795,12 @@ class SurveyAnalyzer:
             
             # Group-level charts (stacked_100, heatmap_corr, box_multi)
             if chart_type in ("stacked_100", "heatmap_corr", "box_multi"):
+                charts_t0 = time.perf_counter()
                 group_chart = {"chart_type": chart_type}
                 # Names for subquestions
                 sub_names = [self.wrap_title(c, max_chars=80) for c, _, _ in per_sub_counts]
                 # Category labels
                 all_labels = []
-                likert_family = self._group_families.get(group_key)
                 if chart_type == "stacked_100":
                     if likert_family and likert_family in self.LIKERT_FAMILIES:
                         all_labels = [str(l) for l in self.LIKERT_FAMILIES[likert_family]['order']]
@@ -477,23 +832,10 @@ class SurveyAnalyzer:
                 elif chart_type == "heatmap_corr":
                     # Build numeric dataframe if possible
                     if likert_family and likert_family in self.LIKERT_FAMILIES:
-                        order = self.LIKERT_FAMILIES[likert_family]['order']
-                        # Map each subquestion series to numeric aligned by index
-                        df_map = {}
-                        for c in cols:
-                            s = self.data[c]
-                            vals = []
-                            for v in s:
-                                if pd.isna(v):
-                                    vals.append(np.nan)
-                                else:
-                                    try:
-                                        idx = order.index(v)
-                                        vals.append(idx + 1)
-                                    except ValueError:
-                                        vals.append(np.nan)
-                            df_map[self.wrap_title(c, max_chars=40)] = vals
-                        df = pd.DataFrame(df_map)
+                        # Encode the whole group to a respondents x subquestions score matrix
+                        encoder = self.likert_encoder(likert_family)
+                        scores = LikertEncoder.to_scores(encoder.encode_frame(self.data, cols))
+                        df = pd.DataFrame(scores, columns=[self.wrap_title(c, max_chars=40) for c in cols])
                         if not df.empty:
                             corr = df.corr().fillna(0)
                             group_chart.update({
@@ -503,18 +845,18 @@ class SurveyAnalyzer:
                             })
                 elif chart_type == "box_multi":
                     # Build multiple box plots across subquestions (Likert only)
-                    if likert_family and likert_family in self.LIKERT_FAMILIES and per_sub_numeric:
+                    if likert_family and likert_family in self.LIKERT_FAMILIES and per_sub_hist:
                         traces = []
                         for idx, c in enumerate(cols):
-                            y = per_sub_numeric.get(c)
-                            if not y:
+                            box = likert_box(per_sub_hist[c]) if c in per_sub_hist else None
+                            if box is None:
                                 continue
                             # Title parts for better legend naming
                             main, sub = self.split_title_parts(c)
                             name = self.wrap_title(main, max_chars=60) if main else self.wrap_title(c, max_chars=60)
                             traces.append({
                                 "name": name,
-                                "y": y,
+                                "box": box,
                                 "marker": {"color": colors[idx % len(colors)]},
                             })
                         if traces:
@@ -524,14 +866,51 @@ class SurveyAnalyzer:
                                 "y_label": "Punteggio Likert"
                             })
                 results["group_chart"] = group_chart
+                record("charts", time.perf_counter() - charts_t0)
+            elif chart_type == "multi_select":
+                charts_t0 = time.perf_counter()
+                results["group_chart"] = self._multi_select_chart(group_key)
+                record("charts", time.perf_counter() - charts_t0)
 
             return results
         except Exception as e:
             return {"error": f"Analyzer error: {str(e)}"}
     
+    def _multi_select_chart(self, group_key: str, top_combinations: int = 20) -> Dict[str, Any]:
+        """Frequenze delle opzioni, combinazioni più frequenti e co-occorrenze di un gruppo a scelta multipla"""
+        bits = self.multi_select_bits(group_key)
+        if bits is None:
+            return {"chart_type": "multi_select", "error": f"Il gruppo {group_key} non è a scelta multipla"}
+        respondents = bits.respondents()
+
+        def pct(n) -> float:
+            return round(100 * int(n) / respondents, 1) if respondents else 0
+
+        counts = bits.option_counts()
+        combinations, distinct = bits.combinations(top_combinations)
+        for combo in combinations:
+            combo["percentage"] = pct(combo["count"])
+        sizes = bits.selections_per_respondent()
+        return {
+            "chart_type": "multi_select",
+            "title": f"Scelta multipla - {self.group_labels.get(group_key, group_key)}",
+            "options": bits.options,
+            "respondents": respondents,
+            "option_counts": counts.tolist(),
+            "option_percentages": [pct(n) for n in counts],
+            "combinations": combinations,
+            "distinct_combinations": distinct,
+            "selections_per_respondent": [{"selected": k, "count": int(n)} for k, n in enumerate(sizes)],
+            "labels": [self.wrap_title(o, max_chars=40) for o in bits.options],
+            "matrix": bits.cooccurrence().tolist(),
+        }
+
+    @timed("charts")
     def _generate_chart_data(self, counts: Counter, col: str, chart_type: str, 
-                           show_percentages: bool, colors: List[str], group_key: str, numeric_data: Optional[List[float]] = None) -> Dict[str, Any]:
-        """Genera i dati per il grafico"""
+                           show_percentages: bool, colors: List[str], group_key: str,
+                           likert_hist: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Genera i dati per il grafico. Istogrammi e box plot Likert viaggiano come conteggi per
+        codice e riassunti del box, non come un valore per rispondente."""
         labels = list(counts.keys())
         values = list(counts.values())
         total = sum(values)
@@ -589,36 +968,37 @@ class SurveyAnalyzer:
             likert_family = self._group_families.get(group_key)
             if likert_family and likert_family in self.LIKERT_FAMILIES:
                 order = self.LIKERT_FAMILIES[likert_family]['order']
-                # If numeric_data not provided, derive from counts (expanded)
-                if numeric_data is None:
-                    numeric_data = []
-                    for val in counts.keys():
-                        try:
-                            idx = order.index(val)
-                            numeric_data.extend([idx + 1] * counts[val])
-                        except ValueError:
-                            continue
-                
-                if numeric_data:
+                # If the histogram is not provided, derive it from the counts of the labels
+                if likert_hist is None:
+                    codes = self.likert_encoder(likert_family).encode_values(list(counts.keys())).astype(np.int64)
+                    reps = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+                    keep = codes > 0
+                    likert_hist = np.bincount(codes[keep] - 1, weights=reps[keep], minlength=len(order)).astype(np.int64)
+                n = int(likert_hist.sum())
+
+                if n:
+                    codes = np.arange(1, len(likert_hist) + 1)
                     chart_config.update({
-                        "numeric_data": numeric_data,
+                        "likert_codes": codes.tolist(),
+                        "likert_counts": likert_hist.tolist(),
                         "bins": len(order),
                         "x_label": "Valore Likert"
                     })
-                    
-                    if chart_type == 'gaussian' and len(numeric_data) > 1:
-                        mean_val = float(np.mean(numeric_data))
-                        std_val = float(np.std(numeric_data))
+
+                    if chart_type == 'gaussian' and n > 1:
+                        mean_val = float((codes * likert_hist).sum() / n)
+                        std_val = float(np.sqrt((likert_hist * (codes - mean_val) ** 2).sum() / n))
                         chart_config.update({
                             "gaussian": {
                                 "mean": mean_val,
                                 "std": std_val
                             }
                         })
-                    
+
                     if chart_type == 'box_likert':
-                        # For box plot, we just need numeric_data; frontend will render box
+                        # Quartiles and whiskers are computed here; the frontend draws the box
                         chart_config.update({
+                            "box": likert_box(likert_hist),
                             "y_label": "Punteggio Likert"
                         })
         
@@ -0,0 +1,221 @@
+"""
+Indice invertito delle risposte aperte ("Altro", "Specificare", ...).
+
+Le colonne di testo aperto restano fuori dalla selezione delle colonne utili,
+ma al caricamento del dataset le loro risposte vengono lette dal sorgente e
+indicizzate qui:
+- ogni risposta distinta viene normalizzata una sola volta (accenti e
+  maiuscole, come `SurveyAnalyzer.norm_txt`) e spezzata in parole; i termini
+  sono le parole e le coppie di parole consecutive (bigrammi, per le ricerche
+  di frase);
+- per ogni termine si tiene l'array ordinato degli id delle risposte distinte
+  che lo contengono; ogni risposta distinta rimanda alle righe in cui compare.
+
+Una ricerca è quindi l'intersezione di pochi array ordinati, senza scorrere le
+risposte con `str.contains`. Le frequenze dei termini per domanda sono un
+`np.bincount` sulle coppie (termine, risposta distinta) pesate per il numero di
+righe della domanda che contengono ciascuna risposta.
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+WORD_PATTERN = re.compile(r"[0-9a-z]+")
+# parole (già senza accenti) escluse dal riepilogo delle frequenze, ma cercabili
+STOPWORDS = frozenset("""
+a ad al alla alle agli ai all allo anche avere c che chi ci come con cosi cui da dal dalla dalle dai
+degli dei del della delle dello di dove e ed era essere fra gli ha hanno ho i il in io la le lei
+lo loro lui ma me mi mia mio ne nei nel nella nelle nello no noi non o per piu poi quale quali
+quando quanto quella quelle quelli quello questa queste questi questo se si sia sono su sua sue
+sui sul sulla suo tra tu un una uno vi voi
+""".split())
+
+
+def tokenize(text: str, normalize: Callable[[str], str]) -> List[str]:
+    return WORD_PATTERN.findall(normalize(text))
+
+
+def _terms(words: List[str]) -> List[str]:
+    """Parole e bigrammi distinti di una risposta"""
+    bigrams = [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return list(dict.fromkeys(words + bigrams))
+
+
+class TextIndex:
+    """Risposte aperte di alcune colonne con l'indice invertito parole/bigrammi -> risposte distinte"""
+
+    def __init__(self, columns: Sequence[str], id_column: Optional[str] = None):
+        self.columns = list(columns)
+        self.id_column = id_column
+        # risposte distinte (testo originale) e vocabolario dei termini
+        self.texts: List[str] = []
+        self._text_ids: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.postings: List[np.ndarray] = []
+        # coppie (termine, risposta distinta), per le frequenze
+        self.pair_terms = np.empty(0, dtype=np.int32)
+        self.pair_texts = np.empty(0, dtype=np.int32)
+        # una voce per risposta data: risposta distinta, colonna, riga e ID risposta
+        self.doc_text = np.empty(0, dtype=np.int32)
+        self.doc_column = np.empty(0, dtype=np.int32)
+        self.doc_row = np.empty(0, dtype=np.int64)
+        self.doc_id: List[Any] = []
+        self._by_text = None
+        self._summary_masks: Dict[bool, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.doc_text)
+
+    def add(self, frame: pd.DataFrame, normalize: Callable[[str], str], row_offset: int = 0):
+        """Indicizza le risposte delle colonne di testo di `frame` (righe numerate da `row_offset`)"""
+        ids = frame[self.id_column] if self.id_column in frame.columns else None
+        new_pairs: Dict[int, List[int]] = {}
+        doc_text, doc_column, doc_row, doc_id = [], [], [], []
+        for j, c in enumerate(self.columns):
+            if c not in frame.columns:
+                continue
+            values = frame[c].dropna().astype(str).str.strip()
+            values = values[values != ""]
+            if values.empty:
+                continue
+            codes, uniques = pd.factorize(values)
+            text_ids = np.empty(len(uniques), dtype=np.int32)
+            for k, text in enumerate(uniques):
+                tid = self._text_ids.get(text)
+                if tid is None:
+                    tid = len(self.texts)
+                    self._text_ids[text] = tid
+                    self.texts.append(text)
+                    for term in _terms(tokenize(text, normalize)):
+                        term_id = self.vocabulary.get(term)
+                        if term_id is None:
+                            term_id = len(self.terms)
+                            self.vocabulary[term] = term_id
+                            self.terms.append(term)
+                            self.postings.append(np.empty(0, dtype=np.int32))
+                        new_pairs.setdefault(term_id, []).append(tid)
+                text_ids[k] = tid
+            positions = frame.index.get_indexer(values.index)
+            doc_text.append(text_ids[codes])
+            doc_column.append(np.full(len(values), j, dtype=np.int32))
+            doc_row.append(positions.astype(np.int64) + row_offset)
+            doc_id.extend(ids.iloc[positions].tolist() if ids is not None else [None] * len(values))
+
+        # le risposte nuove hanno id maggiori di quelle già indicizzate: gli array restano ordinati
+        for term_id, tids in new_pairs.items():
+            self.postings[term_id] = np.concatenate([self.postings[term_id], np.asarray(tids, dtype=np.int32)])
+        if new_pairs:
+            self.pair_terms = np.concatenate([self.pair_terms] + [
+                np.full(len(tids), t, dtype=np.int32) for t, tids in new_pairs.items()])
+            self.pair_texts = np.concatenate([self.pair_texts] + [
+                np.asarray(tids, dtype=np.int32) for tids in new_pairs.values()])
+            self._summary_masks = {}
+        if doc_text:
+            self.doc_text = np.concatenate([self.doc_text] + doc_text)
+            self.doc_column = np.concatenate([self.doc_column] + doc_column)
+            self.doc_row = np.concatenate([self.doc_row] + doc_row)
+            self.doc_id.extend(doc_id)
+            self._by_text = None
+
+    def _docs_of(self, text_ids: np.ndarray) -> np.ndarray:
+        """Risposte date (indici delle voci) che contengono le risposte distinte indicate"""
+        if self._by_text is None:
+            order = np.argsort(self.doc_text, kind="stable")
+            starts = np.searchsorted(self.doc_text[order], np.arange(len(self.texts) + 1))
+            self._by_text = (order, starts)
+        order, starts = self._by_text
+        lo, hi = starts[text_ids], starts[text_ids + 1]
+        if not len(lo):
+            return np.empty(0, dtype=np.int64)
+        # concatenazione vettoriale degli intervalli [lo, hi) di `order`
+        lengths = hi - lo
+        offsets = np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+        return order[np.arange(int(lengths.sum())) + offsets]
+
+    def query_terms(self, query: str, normalize: Callable[[str], str], phrase: bool = False) -> List[str]:
+        words = tokenize(query, normalize)
+        if phrase and len(words) > 1:
+            return [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return list(dict.fromkeys(words))
+
+    def search(self, query: str, normalize: Callable[[str], str], columns: Optional[Sequence[str]] = None,
+               phrase: bool = False, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """
+        Risposte che contengono tutte le parole della ricerca (con `phrase`, le parole
+        consecutive nell'ordine dato), eventualmente solo nelle colonne `columns`.
+        """
+        terms = self.query_terms(query, normalize, phrase)
+        found = np.empty(0, dtype=np.int32)
+        if terms and all(t in self.vocabulary for t in terms):
+            lists = sorted((self.postings[self.vocabulary[t]] for t in terms), key=len)
+            found = lists[0]
+            for other in lists[1:]:
+                found = np.intersect1d(found, other, assume_unique=True)
+        docs = self._docs_of(found)
+        if columns is not None:
+            wanted = [j for j, c in enumerate(self.columns) if c in set(columns)]
+            docs = docs[np.isin(self.doc_column[docs], wanted)]
+        docs = docs[np.lexsort((self.doc_row[docs], self.doc_column[docs]))]
+
+        per_column = np.bincount(self.doc_column[docs], minlength=len(self.columns))
+        page = docs[offset:offset + limit]
+        return {
+            "query": query,
+            "terms": terms,
+            "total": int(len(docs)),
+            "by_column": {self.columns[j]: int(n) for j, n in enumerate(per_column) if n},
+            "results": [
+                {
+                    "column": self.columns[self.doc_column[d]],
+                    "row": int(self.doc_row[d]),
+                    "response_id": _plain(self.doc_id[d]),
+                    "text": self.texts[self.doc_text[d]],
+                }
+                for d in page
+            ],
+        }
+
+    def term_frequencies(self, column: str, top: int = 30, bigrams: bool = False) -> Dict[str, Any]:
+        """Termini più frequenti di una colonna: numero di risposte che contengono ciascuno"""
+        j = self.columns.index(column)
+        in_column = self.doc_text[self.doc_column == j]
+        rows_per_text = np.bincount(in_column, minlength=len(self.texts))
+        counts = np.bincount(self.pair_terms, weights=rows_per_text[self.pair_texts],
+                             minlength=len(self.terms)).astype(np.int64)
+        counts[~self._summary_mask(bigrams)] = 0
+        candidates = np.flatnonzero(counts)
+        if len(candidates) > top:
+            candidates = candidates[np.argpartition(-counts[candidates], top - 1)[:top]]
+        candidates = candidates[np.lexsort((candidates, -counts[candidates]))]
+        answers = int(len(in_column))
+        return {
+            "column": column,
+            "answers": answers,
+            "distinct_answers": int(np.count_nonzero(rows_per_text)),
+            "terms": [
+                {"term": self.terms[t], "count": int(counts[t]),
+                 "percentage": round(100 * int(counts[t]) / answers, 1) if answers else 0}
+                for t in candidates
+            ],
+        }
+
+    def _summary_mask(self, bigrams: bool) -> np.ndarray:
+        """Termini del riepilogo: parole (o bigrammi) che non iniziano né finiscono con una parola vuota"""
+        mask = self._summary_masks.get(bigrams)
+        if mask is None:
+            mask = np.zeros(len(self.terms), dtype=bool)
+            for t, term in enumerate(self.terms):
+                words = term.split(" ")
+                mask[t] = (len(words) > 1) == bigrams and not any(
+                    w in STOPWORDS or len(w) < 2 for w in (words[0], words[-1]))
+            self._summary_masks[bigrams] = mask
+        return mask
+
+
+def _plain(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value.item() if hasattr(value, "item") else value
@@ -0,0 +1,93 @@
+"""
+Aggiornamento di un dataset unito con un export riscaricato che contiene poche
+risposte nuove (`stream_append`), contro il merge completo dello stesso export.
+
+Scrive un export CSV sintetico di `--respondents` risposte, lo unisce e poi
+accoda `--appends` volte lo stesso export riscaricato con `--delta` risposte in
+più ogni volta. Per ogni base misura:
+- `merge_ms`: `stream_merge` dell'export riscaricato (merge completo);
+- `append_ms`: `stream_append` dello stesso export sul dataset unito, una media
+  sugli append successivi (ognuno parte dal risultato del precedente);
+- `read_ms`: `read_table` del dataset unito dopo l'ultimo append;
+- `export_ms`: scrittura dell'Excel del dataset unito, fatta solo su richiesta.
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.bench_append --respondents 5000 20000 --delta 10
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+from .synthetic_survey import make_survey
+
+
+def timed_ms(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, round(1000 * (time.perf_counter() - t0), 2)
+
+
+def write_export(folder: str, name: str, df) -> str:
+    path = os.path.join(folder, name)
+    df.to_csv(path, sep=";", index=False, encoding="utf-8-sig", quoting=csv.QUOTE_ALL)
+    return path
+
+
+def run(respondents: int, delta: int, appends: int, sections: int) -> dict:
+    from app.columnar_cache import read_table
+    from app.streaming_merge import export_merged, stream_append, stream_merge
+
+    quiet = lambda *a, **k: None  # noqa: E731
+    # ogni riscaricamento ripete identiche le risposte del precedente
+    survey = make_survey(respondents + appends * delta, sections=sections, seed=7)
+    with tempfile.TemporaryDirectory(prefix="survey-bench-") as tmp:
+        first = write_export(tmp, "20250101_000000_results-survey42.csv", survey.iloc[:respondents])
+        base = os.path.join(tmp, "merged_0.xlsx")
+        stream_merge([first], base, quiet, workers=1)
+
+        append_times = []
+        merge_ms = None
+        for i in range(1, appends + 1):
+            export = write_export(tmp, f"2025010{i}_000000_results-survey42.csv", survey.iloc[:respondents + i * delta])
+            if merge_ms is None:
+                _, merge_ms = timed_ms(stream_merge, [export], os.path.join(tmp, "merged_full.xlsx"), quiet, workers=1)
+            output = os.path.join(tmp, f"merged_{i}.xlsx")
+            result, ms = timed_ms(stream_append, base, [export], output, quiet, workers=1)
+            assert (result["added"], result["updated"]) == (delta, 0), result
+            append_times.append(ms)
+            base = output
+
+        df, read_ms = timed_ms(read_table, base)
+        _, export_ms = timed_ms(export_merged, base)
+        return {
+            "respondents": respondents,
+            "columns": len(df.columns),
+            "delta": delta,
+            "appends": appends,
+            "merge_ms": merge_ms,
+            "append_ms": round(sum(append_times) / len(append_times), 2),
+            "append_ms_each": append_times,
+            "read_ms": read_ms,
+            "export_ms": export_ms,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--respondents", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--delta", type=int, default=10)
+    parser.add_argument("--appends", type=int, default=3)
+    parser.add_argument("--sections", type=int, default=12)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    results = [run(n, args.delta, args.appends, args.sections) for n in args.respondents]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
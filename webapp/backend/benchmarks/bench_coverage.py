@@ -0,0 +1,97 @@
+"""
+Copertura per file di un dataset unito largo con molte ondate.
+
+Scrive un dataset sintetico con la colonna `file_number` (ondate a rotazione),
+lo porta nella cache colonnare e misura:
+- `loop_ms`: il vecchio calcolo di `analyze_header.py`, un `notna().sum()` per
+  ogni coppia file × colonna sul frame intero;
+- `cold_ms`: `coverage_matrix` alla prima richiesta (maschere di validità e
+  somma per gruppi, risultato salvato in cache);
+- `cached_ms`: le richieste successive;
+- `group_ms`: una richiesta limitata a un gruppo di domande.
+`equal` indica se i conteggi coincidono con quelli del ciclo.
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.bench_coverage --respondents 20000 100000 --waves 30
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from .synthetic_survey import make_survey
+
+
+def timed_ms(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, round(1000 * (time.perf_counter() - t0), 2)
+
+
+def loop_coverage(path: str) -> dict:
+    """Il calcolo per cella di `analyze_header.py`"""
+    from app.columnar_cache import read_table
+
+    df = read_table(path)
+    counts = {}
+    for file_num, g in df.groupby("file_number", dropna=False):
+        for col in df.columns:
+            if col == "file_number":
+                continue
+            counts[(file_num, col)] = int(g[col].notna().sum())
+    return counts
+
+
+def run_size(respondents: int, waves: int, sections: int, folder: str) -> dict:
+    from app.columnar_cache import ensure_cached
+    from app.coverage import coverage_matrix
+    from app.survey_analyzer import SurveyAnalyzer
+
+    df = make_survey(respondents, sections=sections)
+    df["file_number"] = df.index % waves + 1
+    path = os.path.join(folder, "merged_bench.csv")
+    df.to_csv(path, index=False)
+    del df
+    ensure_cached(path)
+
+    reference, loop_ms = timed_ms(loop_coverage, path)
+    result, cold_ms = timed_ms(coverage_matrix, path)
+    _, cached_ms = timed_ms(coverage_matrix, path)
+    group, columns = next(iter(SurveyAnalyzer.group_columns(result["columns"]).items()))
+    _, group_ms = timed_ms(coverage_matrix, path, columns)
+
+    computed = {(f, c): result["non_null_count"][i][j]
+                for i, f in enumerate(result["files"]) for j, c in enumerate(result["columns"])}
+    return {
+        "respondents": respondents,
+        "waves": waves,
+        "columns": len(result["columns"]),
+        "loop_ms": loop_ms,
+        "cold_ms": cold_ms,
+        "cached_ms": cached_ms,
+        "group_ms": group_ms,
+        "group": group,
+        "equal": computed == reference,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--respondents", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--waves", type=int, default=30)
+    parser.add_argument("--sections", type=int, default=28)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    results = []
+    for n in args.respondents:
+        with tempfile.TemporaryDirectory(prefix="survey-bench-") as tmp:
+            results.append(run_size(n, args.waves, args.sections, tmp))
+            print(f"{n} rows: cold {results[-1]['cold_ms']} ms, loop {results[-1]['loop_ms']} ms", file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
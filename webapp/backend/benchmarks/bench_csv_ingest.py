@@ -0,0 +1,80 @@
+"""
+Tempo di acquisizione dello stesso export sintetico in Excel, CSV e CSV.gz.
+
+Per ogni dimensione scrive l'export (vedi `synthetic_survey`) nei tre formati,
+il CSV come lo produce LimeSurvey (separatore `;`, UTF-8 con BOM, campi tra
+virgolette), e misura:
+- `parse_ms`: lettura del sorgente in un DataFrame;
+- `cache_ms`: prima `read_table` a cache vuota (lettura + scrittura Parquet).
+`equal_to_excel` indica se il frame letto dal CSV coincide, tipi compresi, con
+quello letto dall'Excel.
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.bench_csv_ingest --respondents 1000 10000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from .synthetic_survey import make_survey, write_xlsx
+
+
+def timed_ms(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, round(1000 * (time.perf_counter() - t0), 2)
+
+
+def run_size(respondents: int, folder: str) -> dict:
+    from app.columnar_cache import _parse_source, invalidate, read_table
+
+    df = make_survey(respondents)
+    paths = {
+        "xlsx": os.path.join(folder, "results-survey100000.xlsx"),
+        "csv": os.path.join(folder, "results-survey100000.csv"),
+        "csv.gz": os.path.join(folder, "results-survey100000.csv.gz"),
+    }
+    write_xlsx(df, paths["xlsx"])
+    for fmt in ("csv", "csv.gz"):
+        df.to_csv(paths[fmt], sep=";", index=False, encoding="utf-8-sig", quoting=csv.QUOTE_ALL)
+
+    formats = {}
+    frames = {}
+    for fmt, path in paths.items():
+        frames[fmt], parse_ms = timed_ms(_parse_source, path)
+        invalidate(path)
+        _, cache_ms = timed_ms(read_table, path)
+        formats[fmt] = {"bytes": os.path.getsize(path), "parse_ms": parse_ms, "cache_ms": cache_ms}
+
+    for fmt in ("csv", "csv.gz"):
+        try:
+            pd.testing.assert_frame_equal(frames[fmt], frames["xlsx"])
+            formats[fmt]["equal_to_excel"] = True
+        except AssertionError as e:
+            formats[fmt]["equal_to_excel"] = False
+            formats[fmt]["difference"] = str(e).splitlines()[0]
+        formats[fmt]["speedup_vs_excel"] = round(formats["xlsx"]["parse_ms"] / max(formats[fmt]["parse_ms"], 1e-3), 1)
+    return {"respondents": respondents, "columns": len(df.columns), "formats": formats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--respondents", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    results = []
+    for n in args.respondents:
+        with tempfile.TemporaryDirectory(prefix="survey-bench-") as tmp:
+            results.append(run_size(n, tmp))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Latenza degli endpoint leggeri mentre un merge è in corso.
+
+Misura p50/p99 a riposo e durante un POST /projects/{id}/merge-files su export
+sintetici:
+- GET /chart-types, per verificare che il lavoro pandas/openpyxl non blocchi
+  l'event loop;
+- GET /projects/{id} dello stesso progetto, una lettura che passa dal pool e
+  non deve aspettare in coda dietro al merge (slot di lettura separati).
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.bench_event_loop --files 6 --rows 2000
+    SURVEY_EXECUTOR=process python -m benchmarks.bench_event_loop
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from .synthetic_survey import write_survey
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(1000 * statistics.median(ordered), 2),
+        "p99_ms": round(1000 * ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))], 2),
+        "max_ms": round(1000 * ordered[-1], 2),
+    }
+
+
+async def probe(client, stop: asyncio.Event, interval: float, path: str = "/chart-types") -> list:
+    samples = []
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        r = await client.get(path)
+        r.raise_for_status()
+        samples.append(time.perf_counter() - t0)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def run(args) -> dict:
+    import httpx
+    from app.main import app, executor, pm
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        r = await client.post("/projects", json={"name": "bench-event-loop"})
+        pid = r.json()["id"]
+        proj = pm.get(pid)
+        files = write_survey(proj.upload_dir, args.files, args.rows, sections=args.sections)
+
+        paths = ["/chart-types", f"/projects/{pid}"]
+        stop = asyncio.Event()
+        idle_tasks = [asyncio.create_task(probe(client, stop, args.interval, path)) for path in paths]
+        await asyncio.sleep(args.idle_seconds)
+        stop.set()
+        idle, project_idle = [await task for task in idle_tasks]
+
+        stop = asyncio.Event()
+        busy_tasks = [asyncio.create_task(probe(client, stop, args.interval, path)) for path in paths]
+        t0 = time.perf_counter()
+        r = await client.post(f"/projects/{pid}/merge-files", json={"file_paths": files})
+        merge_seconds = time.perf_counter() - t0
+        stop.set()
+        busy, project_busy = [await task for task in busy_tasks]
+        r.raise_for_status()
+
+    return {
+        "executor": executor.stats(),
+        "files": args.files,
+        "rows_per_file": args.rows,
+        "sections": args.sections,
+        "merge_seconds": round(merge_seconds, 3),
+        "idle": percentiles(idle),
+        "during_merge": percentiles(busy),
+        "project_idle": percentiles(project_idle),
+        "project_during_merge": percentiles(project_busy),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=6)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--sections", type=int, default=4, help="sezioni Likert per export")
+    parser.add_argument("--interval", type=float, default=0.005, help="pausa tra due probe (s)")
+    parser.add_argument("--idle-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="survey-bench-") as tmp:
+        os.environ["SURVEY_UPLOADS_DIR"] = tmp
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Analisi delle intestazioni di un export largo (circa 300 colonne): lettura
+completa del frame contro passaggio a blocchi di `header_scan`.
+
+Scrive un export CSV sintetico, lo porta nella cache colonnare e misura:
+- `header_ms`: modalità solo intestazioni, a cache vuota (prima riga del CSV) e piena;
+- `frame_ms`/`frame_peak_mb`: il vecchio calcolo, frame intero e passaggi
+  separati per colonna (`notna().sum()`, `isna().sum()`, `nunique()`, ...);
+- `scan_ms`/`scan_peak_mb`: `scan_headers`, un passaggio a blocchi di righe.
+I picchi di memoria sono misurati con tracemalloc. `mismatches` elenca i campi
+che differiscono tra i due calcoli (conteggi distinti solo dove sono esatti).
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.bench_header_scan --respondents 5000 20000 --sections 28
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .synthetic_survey import make_survey
+
+
+def frame_analysis(path: str, normalize) -> list:
+    """Il calcolo precedente: frame intero in memoria e più passaggi per colonna"""
+    from app.dataset_manifest import read_dataset
+
+    df = read_dataset(path)
+    rows = []
+    for c in df.columns:
+        s = df[c]
+        rows.append({
+            'original_name': c,
+            'normalized_name': normalize(c),
+            'dtype': str(s.dtype),
+            'row_count': len(df),
+            'non_null_count': int(s.notna().sum()),
+            'null_count': int(s.isna().sum()),
+            'non_null_pct': round(100 * s.notna().mean(), 2),
+            'unique_count_non_null': int(s.dropna().nunique()) if s.notna().any() else 0,
+            'sample_values': ', '.join(s.dropna().astype(str).unique()[:3])
+        })
+    return rows
+
+
+def measured(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn(*args)
+    elapsed = round(1000 * (time.perf_counter() - t0), 2)
+    peak = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def mismatches(reference: list, scanned: list) -> list:
+    found = []
+    for ref, row in zip(reference, scanned):
+        for key, value in ref.items():
+            if key == 'unique_count_non_null' and not row['unique_count_exact']:
+                continue
+            if row[key] != value:
+                found.append({"column": ref['original_name'], "field": key, "frame": value, "scan": row[key]})
+    if len(reference) != len(scanned):
+        found.append({"field": "columns", "frame": len(reference), "scan": len(scanned)})
+    return found
+
+
+def run_size(respondents: int, sections: int, folder: str) -> dict:
+    from app.columnar_cache import ensure_cached
+    from app.header_scan import header_only, scan_headers
+    from app.survey_analyzer import SurveyAnalyzer
+
+    normalize = SurveyAnalyzer().normalize_name
+    df = make_survey(respondents, sections=sections)
+    path = os.path.join(folder, f"results-survey{respondents}.csv")
+    df.to_csv(path, sep=";", index=False, encoding="utf-8-sig", quoting=csv.QUOTE_ALL)
+    del df
+
+    _, header_cold_ms, _ = measured(header_only, path, normalize)
+    ensure_cached(path)
+    _, header_cached_ms, _ = measured(header_only, path, normalize)
+
+    reference, frame_ms, frame_peak = measured(frame_analysis, path, normalize)
+    scanned, scan_ms, scan_peak = measured(scan_headers, path, normalize)
+    estimated = [r['original_name'] for r in scanned["headers"] if not r['unique_count_exact']]
+    return {
+        "respondents": respondents,
+        "columns": len(reference),
+        "header_ms": {"cold": header_cold_ms, "cached": header_cached_ms},
+        "frame_ms": frame_ms,
+        "frame_peak_mb": frame_peak,
+        "scan_ms": scan_ms,
+        "scan_peak_mb": scan_peak,
+        "estimated_distinct_columns": len(estimated),
+        "mismatches": mismatches(reference, scanned["headers"])[:10],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--respondents", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--sections", type=int, default=28)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    results = []
+    for n in args.respondents:
+        with tempfile.TemporaryDirectory(prefix="survey-bench-") as tmp:
+            results.append(run_size(n, args.sections, tmp))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Domanda a scelta multipla (una colonna "Sì"/"No" per opzione) con decine di
+migliaia di rispondenti: calcolo per coppie di colonne contro bitset.
+
+Per ogni dimensione costruisce un gruppo `--options` opzioni e misura:
+- `pairs_ms`: frequenze e co-occorrenze con un confronto di colonne per ogni
+  coppia di opzioni, combinazioni con `groupby` sulle tuple di scelte;
+- `encode_ms`: codifica in bitset (`MultiSelectBits.from_frame`);
+- `bits_ms`: frequenze, co-occorrenze e combinazioni dai bitset.
+`equal` indica se i risultati coincidono.
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.bench_multi_select --respondents 10000 50000 --options 12
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def timed_ms(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, round(1000 * (time.perf_counter() - t0), 2)
+
+
+def make_group(respondents: int, options: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rates = rng.uniform(0.05, 0.6, options)
+    chosen = rng.random((respondents, options)) < rates
+    values = np.where(chosen, "Sì", "No").astype(object)
+    values[rng.random(respondents) < 0.05] = None
+    return pd.DataFrame(values, columns=[f"1.4 Titoli posseduti: [opzione {j}]" for j in range(options)])
+
+
+def pairwise(df: pd.DataFrame) -> dict:
+    """Il calcolo per coppie: una colonna booleana per opzione e un AND per ogni coppia"""
+    answered = df.notna().any(axis=1)
+    selected = df[answered].eq("Sì")
+    cols = list(selected.columns)
+    matrix = [[int((selected[a] & selected[b]).sum()) for b in cols] for a in cols]
+    combos = selected.apply(lambda r: tuple(j for j, v in enumerate(r) if v), axis=1).value_counts()
+    return {"counts": [matrix[i][i] for i in range(len(cols))], "matrix": matrix,
+            "combinations": {k: int(v) for k, v in combos.items()}}
+
+
+def bitset(bits) -> dict:
+    top, _ = bits.combinations()
+    index = {o: j for j, o in enumerate(bits.options)}
+    return {"counts": bits.option_counts().tolist(), "matrix": bits.cooccurrence().tolist(),
+            "combinations": {tuple(index[o] for o in c["options"]): c["count"] for c in top}}
+
+
+def run_size(respondents: int, options: int) -> dict:
+    from app.multi_select import MultiSelectBits
+
+    df = make_group(respondents, options)
+    reference, pairs_ms = timed_ms(pairwise, df)
+    labels = [f"opzione {j}" for j in range(options)]
+    bits, encode_ms = timed_ms(MultiSelectBits.from_frame, df, list(df.columns), labels, [["Sì"]] * options)
+    result, bits_ms = timed_ms(bitset, bits)
+    return {
+        "respondents": respondents,
+        "options": options,
+        "pairs_ms": pairs_ms,
+        "encode_ms": encode_ms,
+        "bits_ms": bits_ms,
+        "packed_bytes": int(bits.by_respondent.nbytes + bits.by_option.nbytes),
+        "equal": result == reference,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--respondents", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--options", type=int, default=12)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    print(json.dumps([run_size(n, args.options) for n in args.respondents], indent=2))
+
+
+if __name__ == "__main__":
+    main()
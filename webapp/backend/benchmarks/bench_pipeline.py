@@ -0,0 +1,150 @@
+"""
+Tempi di ogni fase della pipeline e di ogni tipo di grafico al crescere dei rispondenti.
+
+Per ogni dimensione genera export sintetici (vedi `synthetic_survey`) e misura:
+- `merge_excel_files` degli export;
+- `analyze_headers` e `select_useful_columns` sul file unito, con scrittura del manifest del dataset;
+- `load_data` a freddo (conversione dell'Excel unito) e a caldo (dalla cache colonnare);
+- `analyze_question_group` su tutti i gruppi per ogni tipo di `/chart-types`,
+  a cache dei risultati vuota (`charts.<tipo>.total_ms`, media per gruppo e massimo).
+
+L'output è JSON (anche su file con `--output`), con versioni e commit per confrontare
+le esecuzioni nel tempo.
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 100000 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from .synthetic_survey import write_survey
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, round(1000 * (time.perf_counter() - t0), 2)
+
+
+def chart_types() -> list:
+    from app.main import get_chart_types
+    return [c["value"] for c in asyncio.run(get_chart_types())["chart_types"]]
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_size(respondents: int, args, folder: str, charts: list) -> dict:
+    from app.columnar_cache import invalidate
+    from app.dataset_manifest import available_columns, write_manifest
+    from app.survey_analyzer import SurveyAnalyzer
+
+    per_file = max(1, respondents // args.files)
+    t0 = time.perf_counter()
+    names = write_survey(folder, args.files, per_file, sections=args.sections,
+                         questions=args.questions, subquestions=args.subquestions)
+    generate_s = round(time.perf_counter() - t0, 2)
+    paths = [os.path.join(folder, n) for n in names]
+
+    analyzer = SurveyAnalyzer()
+    stages = {}
+    merged_path = os.path.join(folder, "merged_bench.xlsx")
+    merge, stages["merge_excel_files"] = timed(analyzer.merge_excel_files, paths, merged_path)
+    headers, stages["analyze_headers"] = timed(analyzer.analyze_headers, merged_path)
+
+    def select_columns() -> str:
+        # come /select-columns: colonne utili e manifest del dataset
+        useful = analyzer.select_useful_columns(headers["headers"])
+        present = set(available_columns(merged_path))
+        return write_manifest(folder, merged_path, [c for c in useful if c in present], headers["headers"])
+
+    dataset_path, stages["select_columns"] = timed(select_columns)
+    invalidate(merged_path)  # a freddo: riconversione dell'Excel unito
+    _, stages["load_data_cold"] = timed(analyzer.load_data, dataset_path)
+    warm = SurveyAnalyzer()
+    _, stages["load_data_warm"] = timed(warm.load_data, dataset_path)
+
+    groups = analyzer.group_keys()
+    chart_times = {}
+    for chart_type in charts:
+        analyzer.result_cache.clear()
+        per_group = []
+        for g in groups:
+            _, ms = timed(analyzer.analyze_question_group, g, chart_type)
+            per_group.append(ms)
+        chart_times[chart_type] = {
+            "total_ms": round(sum(per_group), 2),
+            "mean_group_ms": round(sum(per_group) / len(per_group), 2) if per_group else 0.0,
+            "max_group_ms": max(per_group, default=0.0),
+        }
+
+    for p in paths + [merged_path, dataset_path]:
+        os.remove(p)
+    return {
+        "respondents": per_file * args.files,
+        "files": args.files,
+        "merged_columns": merge.get("columns"),
+        "dataset_columns": len(analyzer.data.columns),
+        "groups": len(groups),
+        "generate_s": generate_s,
+        "stages_ms": stages,
+        "charts": chart_times,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="rispondenti totali")
+    parser.add_argument("--files", type=int, default=2, help="export in cui dividere i rispondenti")
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--questions", type=int, default=2)
+    parser.add_argument("--subquestions", type=int, default=5)
+    parser.add_argument("--output", help="scrive il JSON anche su questo file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="survey-bench-") as tmp:
+        os.environ["SURVEY_UPLOADS_DIR"] = tmp
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        charts = chart_types()
+        results = []
+        for size in args.sizes:
+            folder = os.path.join(tmp, f"size-{size}")
+            os.makedirs(folder)
+            results.append(run_size(size, args, folder, charts))
+            print(f"{size} rispondenti: fatto", file=sys.stderr)
+
+    report = {
+        "benchmark": "pipeline",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cpu_count": os.cpu_count(),
+        "layout": {"sections": args.sections, "questions": args.questions, "subquestions": args.subquestions},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Tempo di GET /projects al crescere del numero di progetti.
+
+Per ogni dimensione crea progetti con un merged_*.xlsx sintetico e misura:
+- `cold_ms`: prima lista (conteggio righe mai calcolato, indice vuoto);
+- `warm_ms`: liste successive nello stesso processo;
+- `restart_ms`: lista da un nuovo ProjectManager che rilegge solo metadata.json.
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.bench_project_listing --projects 10 25 50 --rows 500
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from .synthetic_survey import LIKERT
+
+
+def write_merged(folder: str, rows: int, questions: int) -> str:
+    data = {"ID risposta": list(range(rows))}
+    for q in range(questions):
+        data[f"2.{q // 5 + 1} Domanda {q // 5 + 1}: [voce {q % 5 + 1}]"] = [LIKERT[(i + q) % len(LIKERT)] for i in range(rows)]
+    name = "merged_bench.xlsx"
+    pd.DataFrame(data).to_excel(os.path.join(folder, name), index=False)
+    return name
+
+
+def timed(fn, repeat: int = 1) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return round(1000 * statistics.median(samples), 2)
+
+
+def run(args) -> list:
+    from app.main import ProjectManager, pm
+
+    results = []
+    for target in sorted(args.projects):
+        while len(pm.projects) < target:
+            proj = pm.create_project()
+            proj.merged_file = write_merged(proj.upload_dir, args.rows, args.questions)
+            proj._save_metadata()
+        cold = timed(pm.list_projects)
+        warm = timed(pm.list_projects, args.repeat)
+        restart = timed(lambda: ProjectManager().list_projects(), args.repeat)
+        results.append({"projects": target, "cold_ms": cold, "warm_ms": warm, "restart_ms": restart})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, nargs="+", default=[10, 25, 50])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="survey-bench-") as tmp:
+        os.environ["SURVEY_UPLOADS_DIR"] = tmp
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        result = run(args)
+    print(json.dumps({"rows_per_project": args.rows, "questions": args.questions, "listing": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
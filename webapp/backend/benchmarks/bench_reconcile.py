@@ -0,0 +1,97 @@
+"""
+Merge di più versioni dello stesso questionario con intestazioni leggermente
+diverse (accenti, punteggiatura, maiuscole), con e senza la riconciliazione
+delle colonne per nome normalizzato.
+
+Scrive `--waves` export CSV sintetici; nelle versioni pari le intestazioni delle
+domande perdono accenti e punteggiatura finale o cambiano maiuscole. Per le due
+modalità misura:
+- `columns`: larghezza del file unito;
+- `density`: quota di celle non vuote;
+- `merge_ms`: `stream_merge`;
+- `load_ms`: `SurveyAnalyzer.load_data` sul file unito (cache colonnare già pronta).
+`reconciled_columns` è il numero di varianti confluite nella colonna canonica.
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.bench_reconcile --respondents 2000 --waves 6
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import unicodedata
+
+from .synthetic_survey import make_survey
+
+
+def timed_ms(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, round(1000 * (time.perf_counter() - t0), 2)
+
+
+def variant(name: str, wave: int) -> str:
+    """Intestazione come la scriverebbe una versione successiva del questionario"""
+    if not name[:1].isdigit() or wave % 2:
+        return name
+    name = "".join(ch for ch in unicodedata.normalize("NFKD", name) if not unicodedata.combining(ch))
+    return name.rstrip("?]").lower() if wave % 4 == 0 else name.replace(" [", "  [")
+
+
+def write_waves(folder: str, respondents: int, waves: int, sections: int) -> list:
+    paths = []
+    for wave in range(1, waves + 1):
+        df = make_survey(respondents, sections=sections, seed=wave, start_id=(wave - 1) * respondents + 1)
+        df.columns = [variant(c, wave) for c in df.columns]
+        path = os.path.join(folder, f"results-survey{wave}.csv")
+        df.to_csv(path, sep=";", index=False, encoding="utf-8-sig", quoting=csv.QUOTE_ALL)
+        paths.append(path)
+    return paths
+
+
+def run_mode(paths: list, folder: str, normalize) -> dict:
+    from app.columnar_cache import read_table
+    from app.streaming_merge import stream_merge
+    from app.survey_analyzer import SurveyAnalyzer
+
+    output = os.path.join(folder, f"merged_{'reconciled' if normalize else 'plain'}.xlsx")
+    result, merge_ms = timed_ms(stream_merge, paths, output, lambda *a, **k: None, normalize=normalize)
+    df = read_table(output)
+    density = round(float(df.notna().to_numpy().mean()), 3)
+    del df
+    _, load_ms = timed_ms(SurveyAnalyzer().load_data, output)
+    return {
+        "columns": result["columns"],
+        "density": density,
+        "merge_ms": merge_ms,
+        "load_ms": load_ms,
+        "reconciled_columns": result["reconciliation"]["merged_columns"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--respondents", type=int, default=2000)
+    parser.add_argument("--waves", type=int, default=6)
+    parser.add_argument("--sections", type=int, default=12)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.survey_analyzer import SurveyAnalyzer
+
+    with tempfile.TemporaryDirectory(prefix="survey-bench-") as tmp:
+        paths = write_waves(tmp, args.respondents, args.waves, args.sections)
+        results = {
+            "respondents": args.respondents,
+            "waves": args.waves,
+            "plain": run_mode(paths, tmp, None),
+            "reconciled": run_mode(paths, tmp, SurveyAnalyzer().normalize_name),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
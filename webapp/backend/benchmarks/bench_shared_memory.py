@@ -0,0 +1,119 @@
+"""
+Memoria per processo quando N processi servono lo stesso dataset caricato.
+
+Carica un dataset sintetico e ne salva lo snapshot, poi avvia N processi che
+ripristinano l'analyzer dallo snapshot e leggono tutte le colonne (come farebbe
+una serie di analisi). Per ogni processo legge da `/proc/<pid>/smaps_rollup`:
+- `rss_mb`: pagine residenti, comprese quelle condivise;
+- `pss_mb`: pagine condivise divise per il numero di processi che le mappano;
+- `private_mb`: pagine solo di quel processo.
+Con `mapped` le matrici sono quelle mappate dai file `.npy` dello snapshot; con
+`copy` ogni processo ne fa una copia privata, come prima della mappatura.
+`data_private_mb` sottrae la memoria privata di un processo che importa solo i
+moduli (`baseline`), così resta quella dovuta al dataset.
+
+Solo Linux. Uso (dalla cartella webapp/backend):
+    python -m benchmarks.bench_shared_memory --rows 50000 --processes 1 2 4
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+
+from .synthetic_survey import write_survey
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def smaps_mb(pid: int) -> dict:
+    fields = {"Rss": "rss_mb", "Pss": "pss_mb", "Private_Clean": "private_mb", "Private_Dirty": "private_mb"}
+    result = {"rss_mb": 0.0, "pss_mb": 0.0, "private_mb": 0.0}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in fields:
+                result[fields[key]] += int(value.split()[0]) / 1024
+    return {k: round(v, 1) for k, v in result.items()}
+
+
+def serve(snapshot_path: str, dataset_path: str, mode: str, ready, done):
+    sys.path.insert(0, BACKEND_DIR)
+    from app.survey_analyzer import SurveyAnalyzer
+
+    if mode == "baseline":
+        ready.set()
+        done.wait()
+        return
+    analyzer = SurveyAnalyzer()
+    if not analyzer.load_snapshot(snapshot_path, dataset_path):
+        raise RuntimeError("snapshot not restored")
+    if mode == "copy":
+        analyzer.data = analyzer.data.copy(deep=True)
+    for col in analyzer.data.columns:
+        analyzer.data[col].value_counts(dropna=False)
+    ready.set()
+    done.wait()
+
+
+def measure(snapshot_path: str, dataset_path: str, mode: str, n: int, baseline_mb: float = 0.0) -> dict:
+    ctx = mp.get_context("spawn")
+    done = ctx.Event()
+    procs = []
+    for _ in range(n):
+        ready = ctx.Event()
+        p = ctx.Process(target=serve, args=(snapshot_path, dataset_path, mode, ready, done))
+        p.start()
+        procs.append((p, ready))
+    try:
+        for p, ready in procs:
+            if not ready.wait(timeout=300):
+                raise RuntimeError("worker did not restore the snapshot")
+        per_process = [smaps_mb(p.pid) for p, _ in procs]
+    finally:
+        done.set()
+        for p, _ in procs:
+            p.join(timeout=30)
+
+    def mean(key: str) -> float:
+        return round(sum(r[key] for r in per_process) / n, 1)
+
+    return {"mode": mode, "processes": n, "rss_mb": mean("rss_mb"), "pss_mb": mean("pss_mb"),
+            "private_mb": mean("private_mb"), "data_private_mb": round(mean("private_mb") - baseline_mb, 1),
+            "total_pss_mb": round(sum(r["pss_mb"] for r in per_process), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from app.survey_analyzer import SurveyAnalyzer
+
+    with tempfile.TemporaryDirectory(prefix="survey-bench-") as tmp:
+        dataset_path = os.path.join(tmp, write_survey(tmp, 1, args.rows, sections=args.sections)[0])
+        snapshot_path = os.path.join(tmp, ".cache", "analyzer.pickle")
+        analyzer = SurveyAnalyzer()
+        analyzer.load_data(dataset_path)
+        analyzer.save_snapshot(snapshot_path, dataset_path)
+        matrix_mb = round(sum(os.path.getsize(os.path.join(tmp, ".cache", name))
+                              for name in os.listdir(os.path.join(tmp, ".cache")) if name.endswith(".npy")) / 2**20, 1)
+        del analyzer
+
+        baseline_mb = measure(snapshot_path, dataset_path, "baseline", 1)["private_mb"]
+        results = []
+        for mode in ("copy", "mapped"):
+            for n in args.processes:
+                results.append(measure(snapshot_path, dataset_path, mode, n, baseline_mb))
+                print(f"{mode} x{n}: {results[-1]['data_private_mb']} MB private data per process", file=sys.stderr)
+
+    print(json.dumps({"rows": args.rows, "matrix_mb": matrix_mb, "baseline_private_mb": baseline_mb,
+                      "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
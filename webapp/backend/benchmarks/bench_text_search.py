@@ -0,0 +1,105 @@
+"""
+Ricerca nelle risposte aperte: scansione con `str.contains` contro indice invertito.
+
+Costruisce `--columns` colonne di testo aperto con risposte brevi (frasi di un
+vocabolario di qualche migliaio di parole, molte risposte ripetute come nei
+campi "Altro") e misura:
+- `build_ms`: costruzione di `TextIndex` (una volta, al caricamento);
+- `scan_ms`: per ogni ricerca, normalizzazione delle risposte e `str.contains`
+  con i confini di parola su tutte le colonne, come si farebbe senza indice;
+- `index_ms`: le stesse ricerche sull'indice.
+I tempi delle ricerche sono medie su `--queries` ricerche di una o due parole.
+`equal` indica se le righe trovate coincidono.
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.bench_text_search --respondents 10000 50000 --columns 20
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def timed_ms(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, round(1000 * (time.perf_counter() - t0), 3)
+
+
+def make_answers(respondents: int, columns: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"parola{i}" for i in range(3000)] + ["università", "scuola", "orientamento", "tutor"])
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    weights /= weights.sum()
+    # risposte ripetute: ogni colonna pesca da un migliaio di risposte tipiche
+    pool = [" ".join(rng.choice(vocabulary, rng.integers(2, 9), p=weights)).capitalize() for _ in range(1000)]
+    data = {}
+    for j in range(columns):
+        values = np.asarray(pool, dtype=object)[rng.integers(0, len(pool), respondents)]
+        values[rng.random(respondents) < 0.7] = None
+        data[f"3.{j + 1} Specificare [Altro]"] = values
+    return pd.DataFrame(data)
+
+
+def scan(df: pd.DataFrame, query: str, normalize) -> set:
+    """La ricerca senza indice: tutte le risposte normalizzate e confrontate a ogni ricerca"""
+    pattern = "".join(rf"(?=.*\b{re.escape(w)}\b)" for w in normalize(query).split())
+    found = set()
+    for c in df.columns:
+        s = df[c].dropna().astype(str).map(normalize)
+        found.update((c, int(r)) for r in s.index[s.str.contains(pattern, regex=True)])
+    return found
+
+
+def run_size(respondents: int, columns: int, queries: int) -> dict:
+    from app.survey_analyzer import SurveyAnalyzer
+    from app.text_index import TextIndex
+
+    normalize = SurveyAnalyzer().norm_txt
+    df = make_answers(respondents, columns)
+    index = TextIndex(list(df.columns))
+    _, build_ms = timed_ms(index.add, df, normalize)
+
+    rng = np.random.default_rng(0)
+    words = ["università", "scuola", "orientamento", "tutor"] + [f"parola{i}" for i in range(50)]
+    searches = [" ".join(rng.choice(words, rng.integers(1, 3), replace=False)) for _ in range(queries)]
+    scan_total = index_total = 0.0
+    equal = True
+    for q in searches:
+        expected, ms = timed_ms(scan, df, q, normalize)
+        scan_total += ms
+        result, ms = timed_ms(index.search, q, normalize, None, False, 50)
+        index_total += ms
+        full = index.search(q, normalize, limit=len(index))
+        equal &= {(r["column"], r["row"]) for r in full["results"]} == expected and result["total"] == len(expected)
+    return {
+        "respondents": respondents,
+        "columns": columns,
+        "answers": len(index),
+        "distinct_answers": len(index.texts),
+        "terms": len(index.terms),
+        "build_ms": build_ms,
+        "scan_ms": round(scan_total / queries, 3),
+        "index_ms": round(index_total / queries, 3),
+        "equal": bool(equal),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--respondents", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    print(json.dumps([run_size(n, args.columns, args.queries) for n in args.respondents], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Tempo alla prima analisi dopo un riavvio del server.
+
+Carica un dataset sintetico, poi simula un riavvio (nuovo ProjectManager, pool
+degli analyzer vuoto) e misura la prima POST /analyze-question:
+- `snapshot_ms`: stato ripristinato dal pickle dell'analyzer;
+- `reload_ms`: snapshot assente, dataset ricaricato (dalla cache colonnare).
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.bench_warm_restart --rows 20000 --sections 6
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from .synthetic_survey import write_survey
+
+
+async def first_analysis_ms(client, main, pid: str, group: str) -> float:
+    # riavvio simulato: progetti riletti da metadata.json, nessun analyzer in memoria
+    main.analyzer_pool.discard(pid)
+    main.pm = main.ProjectManager()
+    t0 = time.perf_counter()
+    r = await client.post(f"/projects/{pid}/analyze-question", data={"group_key": group, "chart_type": "bar"})
+    r.raise_for_status()
+    return round(1000 * (time.perf_counter() - t0), 2)
+
+
+async def run(args) -> dict:
+    import httpx
+    from app import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        r = await client.post("/projects", json={"name": "bench-warm-restart"})
+        pid = r.json()["id"]
+        proj = main.pm.get(pid)
+        dataset = write_survey(proj.upload_dir, 1, args.rows, sections=args.sections)[0]
+
+        t0 = time.perf_counter()
+        r = await client.post(f"/projects/{pid}/load-dataset", json={"file_path": dataset})
+        r.raise_for_status()
+        load_ms = round(1000 * (time.perf_counter() - t0), 2)
+        group = r.json()["groups"][0]
+
+        snapshot_ms = await first_analysis_ms(client, main, pid, group)
+        os.remove(main.pm.get(pid).snapshot_path)
+        reload_ms = await first_analysis_ms(client, main, pid, group)
+
+    return {
+        "rows": args.rows,
+        "sections": args.sections,
+        "load_dataset_ms": load_ms,
+        "snapshot_ms": snapshot_ms,
+        "reload_ms": reload_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--sections", type=int, default=6)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="survey-bench-") as tmp:
+        os.environ["SURVEY_UPLOADS_DIR"] = tmp
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Throughput di POST /analyze-question con 1..N worker uvicorn che condividono lo stato su disco.
+
+Prepara un progetto (export sintetico, merge, selezione colonne, caricamento) in
+una cartella temporanea, poi per ogni numero di worker avvia
+`uvicorn app.main:app --workers N` con `SURVEY_SHARED_STATE=1` e per `--duration`
+secondi invia richieste da `--concurrency` client, a rotazione su gruppi e tipi
+di grafico. Ogni worker ripristina l'analyzer dallo snapshot del progetto alla
+prima richiesta (fase di `--warmup`, non misurata).
+
+Senza `--cached` la cache dei risultati è disattivata (`SURVEY_RESULT_CACHE_SIZE=0`),
+così si misura il calcolo delle analisi e non la sola serializzazione.
+
+Uso (dalla cartella webapp/backend, richiede uvicorn):
+    python -m benchmarks.bench_workers --workers 1 2 4 --rows 5000 --duration 15
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .synthetic_survey import write_survey
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def prepare(args) -> dict:
+    """Progetto con dataset caricato, creato in-process nella cartella di SURVEY_UPLOADS_DIR"""
+    from app import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        pid = (await client.post("/projects", json={"name": "bench-workers"})).json()["id"]
+        proj = main.pm.get(pid)
+        names = write_survey(proj.upload_dir, 2, args.rows // 2, sections=args.sections)
+        r = await client.post(f"/projects/{pid}/merge-files", json={"file_paths": names})
+        merged = r.json()["merged_file"]
+        headers = (await client.post(f"/projects/{pid}/analyze-headers", json={"file_path": merged})).json()
+        r = await client.post(f"/projects/{pid}/select-columns",
+                              json={"file_path": merged, "headers_analysis": headers["headers"]})
+        r = await client.post(f"/projects/{pid}/load-dataset", json={"file_path": r.json()["dataset_file"]})
+        r.raise_for_status()
+        charts = [c["value"] for c in (await client.get("/chart-types")).json()["chart_types"]]
+        return {"project_id": pid, "groups": r.json()["groups"], "chart_types": charts}
+
+
+def start_server(workers: int, port: int, uploads: str, cached: bool) -> subprocess.Popen:
+    env = dict(os.environ, SURVEY_UPLOADS_DIR=uploads, SURVEY_SHARED_STATE="1")
+    if not cached:
+        env["SURVEY_RESULT_CACHE_SIZE"] = "0"
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        if proc.poll() is not None:
+            break
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"uvicorn with {workers} workers did not start")
+
+
+async def load(port: int, project: dict, concurrency: int, duration: float) -> dict:
+    requests = itertools.cycle(itertools.product(project["groups"], project["chart_types"]))
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits) as client:
+        async def client_loop():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                group, chart_type = next(requests)
+                t0 = time.perf_counter()
+                try:
+                    r = await client.post(f"/projects/{project['project_id']}/analyze-question",
+                                          data={"group_key": group, "chart_type": chart_type})
+                    ok = r.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - t0)
+                else:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return round(1000 * latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2) if latencies else 0.0
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cached", action="store_true", help="lascia attiva la cache dei risultati")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="survey-bench-") as tmp:
+        os.environ["SURVEY_UPLOADS_DIR"] = tmp
+        sys.path.insert(0, BACKEND_DIR)
+        project = asyncio.run(prepare(args))
+        results = []
+        for n in args.workers:
+            proc = start_server(n, args.port, tmp, args.cached)
+            try:
+                asyncio.run(load(args.port, project, args.concurrency, args.warmup))
+                result = asyncio.run(load(args.port, project, args.concurrency, args.duration))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+            results.append(dict(workers=n, **result))
+            print(f"{n} worker: {result['rps']} req/s", file=sys.stderr)
+
+    base = results[0]["rps"] or 1.0
+    for r in results:
+        r["speedup"] = round(r["rps"] / base, 2)
+    print(json.dumps({
+        "cpu_count": os.cpu_count(),
+        "rows": args.rows,
+        "concurrency": args.concurrency,
+        "cached": args.cached,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
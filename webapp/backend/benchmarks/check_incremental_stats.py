@@ -0,0 +1,144 @@
+"""
+Verifica che `SurveyAnalyzer.append_rows` dia esattamente lo stesso risultato
+di un caricamento completo, e ne misura il costo rispetto a `load_data`.
+
+Il dataset sintetico contiene gruppi Likert (con sinonimi, valori fuori scala e
+mancanti), domande a scelta chiusa, testo libero, colonne intere che ricevono
+mancanti solo nei blocchi accodati e un gruppo vuoto che diventa Likert.
+Per ogni colonna si confrontano conteggi (anche nell'ordine), mancanti,
+posizione dei mancanti e istogramma Likert; per ogni gruppo il risultato di
+`analyze_question_group` con tutti i tipi di grafico.
+
+La stessa verifica, su un dataset più piccolo, fa parte dei test
+(tests/test_incremental_stats.py), insieme all'aggiornamento del dataset caricato
+dopo un merge in modalità append.
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.check_incremental_stats --rows 5000 --batches 3 --batch-rows 500
+Esce con codice 1 se trova differenze.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from .synthetic_survey import LIKERT
+
+CHART_TYPES = ["bar", "likert_bar", "stacked_100", "box_multi", "heatmap_corr", "histogram"]
+
+
+def make_rows(rng: random.Random, start: int, rows: int, stage: int) -> pd.DataFrame:
+    """Righe start..start+rows del blocco `stage` (0 = dataset iniziale): dal primo blocco
+    accodato compaiono un'opzione nuova e i mancanti negli interi, dal secondo le prime
+    risposte del gruppo vuoto"""
+    likert = LIKERT + ["per niente", "Non so"]
+    data = {"ID risposta": list(range(start, start + rows))}
+    for q in range(1, 6):
+        data[f"2.1 Quanto ritiene utile: [voce {q}]"] = [
+            rng.choice(likert) if rng.random() > 0.1 else None for _ in range(rows)
+        ]
+    for q in range(1, 4):
+        options = ["Sì", "No", "Forse"] + (["Nuova opzione"] if stage else [])
+        data[f"3.1 Scelta: [opzione {q}]"] = [rng.choice(options) if rng.random() > 0.2 else None for _ in range(rows)]
+    data["4.1 Commenti liberi"] = [f"testo {rng.randrange(10 ** 6)}" if rng.random() > 0.5 else None for _ in range(rows)]
+    data["5.1 Anni di servizio"] = [
+        rng.randrange(40) if not stage or rng.random() > 0.1 else None for _ in range(rows)
+    ]
+    data["6.1 Gruppo vuoto: [voce 1]"] = [rng.choice(LIKERT) if stage > 1 else None for _ in range(rows)]
+    return pd.DataFrame(data)
+
+
+def stats_state(analyzer) -> dict:
+    return {
+        col: (list(s.counts.items()), s.n_rows, s.na_count, s.na_position,
+              None if s.likert_hist is None else s.likert_hist.tolist(), s.code_sum, s.code_sumsq)
+        for col, s in analyzer.column_stats.items()
+    }
+
+
+def results_state(analyzer) -> dict:
+    out = {}
+    for g in analyzer.group_keys():
+        for chart_type in CHART_TYPES:
+            for include_na in (False, True):
+                r = analyzer.analyze_question_group(g, chart_type, True, include_na)
+                out[f"{g}/{chart_type}/{include_na}"] = json.dumps(r, sort_keys=True, default=str)
+    return out
+
+
+def differences(a: dict, b: dict) -> list:
+    return sorted(k for k in set(a) | set(b) if a.get(k) != b.get(k))
+
+
+def run(args, folder: str) -> dict:
+    from app.columnar_cache import read_table
+    from app.survey_analyzer import SurveyAnalyzer
+
+    rng = random.Random(7)
+    base = make_rows(rng, 0, args.rows, 0)
+    batches = [make_rows(rng, args.rows + i * args.batch_rows, args.batch_rows, i + 1) for i in range(args.batches)]
+
+    # tutti i frame passano da Excel, come i dati reali
+    def roundtrip(name: str, df: pd.DataFrame) -> str:
+        path = os.path.join(folder, name)
+        df.to_excel(path, index=False)
+        return path
+
+    base_path = roundtrip("base.xlsx", base)
+    batch_frames = [read_table(roundtrip(f"batch{i}.xlsx", b)) for i, b in enumerate(batches)]
+    full_path = roundtrip("full.xlsx", pd.concat([base] + batches, ignore_index=True))
+
+    incremental = SurveyAnalyzer()
+    incremental.load_data(base_path)
+    append_ms = []
+    reports = []
+    for frame in batch_frames:
+        t0 = time.perf_counter()
+        reports.append(incremental.append_rows(frame))
+        append_ms.append(round(1000 * (time.perf_counter() - t0), 2))
+
+    full = SurveyAnalyzer()
+    read_table(full_path)  # la conversione Excel non fa parte del confronto
+    t0 = time.perf_counter()
+    full.load_data(full_path)
+    full_ms = round(1000 * (time.perf_counter() - t0), 2)
+
+    stats_diff = differences(stats_state(incremental), stats_state(full))
+    results_diff = differences(results_state(incremental), results_state(full))
+    return {
+        "rows": args.rows,
+        "batches": args.batches,
+        "batch_rows": args.batch_rows,
+        "append_ms": append_ms,
+        "full_load_ms": full_ms,
+        "appends": reports,
+        "families_equal": incremental._group_families == full._group_families,
+        "columns_compared": len(full.column_stats),
+        "stats_mismatches": stats_diff,
+        "results_compared": len(results_state(full)),
+        "results_mismatches": results_diff,
+        "equal": not stats_diff and not results_diff and incremental._group_families == full._group_families,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batches", type=int, default=3)
+    parser.add_argument("--batch-rows", type=int, default=500)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    with tempfile.TemporaryDirectory(prefix="survey-check-") as tmp:
+        result = run(args, tmp)
+    print(json.dumps(result, indent=2, default=str))
+    sys.exit(0 if result["equal"] else 1)
+
+
+if __name__ == "__main__":
+    main()
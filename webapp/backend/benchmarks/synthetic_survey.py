@@ -0,0 +1,156 @@
+"""
+Export LimeSurvey sintetici per i benchmark.
+
+`make_survey` costruisce il DataFrame di un export con la stessa forma di quelli
+reali:
+- le colonne meta di `SurveyAnalyzer.META_EXACT` (ID risposta, date, lingua, seme...);
+- `Tempo totale`, `Tempo per il gruppo di domande: ...` e `Tempo per la domanda: ...`;
+- una sezione 1 anagrafica a scelta singola (`1.1 Genere`, ...);
+- sezioni Likert `N.M Testo della domanda [voce K]`, a rotazione sulle famiglie
+  di `SurveyAnalyzer.LIKERT_FAMILIES`, con qualche sinonimo in minuscolo;
+- per ogni sezione un campo aperto `N.M Altro (specificare) [Altro]`, quasi sempre vuoto.
+
+`write_survey` scrive uno o più `results-survey<N>.xlsx` in una cartella.
+
+Uso (dalla cartella webapp/backend):
+    python -m benchmarks.synthetic_survey /tmp/export --respondents 10000 --files 2
+"""
+import argparse
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+LIKERT = ['Per nulla', 'Poco', 'Abbastanza', 'Molto', 'Moltissimo']
+
+DEMOGRAPHICS = {
+    "1.1 Genere": ["Femmina", "Maschio", "Preferisco non rispondere"],
+    "1.2 Fascia d'età": ["Meno di 30 anni", "30-39 anni", "40-49 anni", "50-59 anni", "60 anni o più"],
+    "1.3 Ruolo": ["Docente", "Dirigente", "Personale ATA", "Educatore", "Altro"],
+    "1.4 Anni di servizio": ["Meno di 5", "5-10", "11-20", "Più di 20"],
+}
+
+SUBJECTS = [
+    "Quanto ritiene utili le seguenti attività",
+    "Con quale frequenza svolge le seguenti attività",
+    "Quanto è d'accordo con le seguenti affermazioni",
+    "Come valuta i seguenti aspetti della formazione",
+    "In che misura le seguenti competenze sono presenti",
+]
+
+FREE_TEXT = ["corso di aggiornamento", "laboratorio", "tutoraggio", "progetto europeo", "nessuna"]
+
+
+def likert_families() -> Dict[str, dict]:
+    """Famiglie Likert dell'analizzatore, così i dati restano allineati alla configurazione"""
+    from app.survey_analyzer import SurveyAnalyzer
+    return SurveyAnalyzer().LIKERT_FAMILIES
+
+
+def _pick(rng: np.random.Generator, options: List[str], n: int, missing_rate: float) -> np.ndarray:
+    values = np.asarray(options, dtype=object)[rng.integers(0, len(options), n)]
+    values[rng.random(n) < missing_rate] = None
+    return values
+
+
+def _likert_values(rng: np.random.Generator, cfg: dict, n: int, missing_rate: float) -> np.ndarray:
+    order = list(cfg["order"])
+    # scale leggermente sbilanciate verso il centro, come nelle risposte reali
+    weights = np.array([1.0, 2.0, 3.0, 2.5, 1.5][:len(order)])
+    values = np.asarray(order, dtype=object)[rng.choice(len(order), n, p=weights / weights.sum())]
+    synonyms = [t for t, label in cfg["tokens"].items() if t != label.lower()]
+    if synonyms:
+        use = rng.random(n) < 0.03
+        values[use] = np.asarray(synonyms, dtype=object)[rng.integers(0, len(synonyms), int(use.sum()))]
+    values[rng.random(n) < missing_rate] = None
+    return values
+
+
+def make_survey(respondents: int, sections: int = 6, questions: int = 2, subquestions: int = 5,
+                families: Optional[List[str]] = None, seed: int = 42, start_id: int = 1,
+                missing_rate: float = 0.08) -> pd.DataFrame:
+    """Export di `respondents` risposte con `sections` sezioni Likert di `questions` domande
+    da `subquestions` voci ciascuna (più anagrafica, tempi e campi aperti)"""
+    rng = np.random.default_rng(seed)
+    all_families = likert_families()
+    families = families or list(all_families)
+    n = respondents
+
+    start = datetime(2024, 1, 8) + pd.to_timedelta(rng.integers(0, 90 * 24 * 3600, n), unit="s")
+    duration = pd.to_timedelta(rng.integers(300, 3600, n), unit="s")
+    data: Dict[str, object] = {
+        "ID risposta": np.arange(start_id, start_id + n),
+        "Data invio": start + duration,
+        "Ultima pagina": np.full(n, sections + 2),
+        "Lingua iniziale": np.full(n, "it", dtype=object),
+        "Seme": rng.integers(10 ** 8, 10 ** 9, n),
+        "Data di inizio": start,
+        "Data dellultima azione": start + duration,
+        "Tempo totale": duration.total_seconds().to_numpy().round(2),
+    }
+    for col, options in DEMOGRAPHICS.items():
+        data[col] = _pick(rng, options, n, missing_rate / 2)
+
+    timings: Dict[str, np.ndarray] = {}
+    for s in range(2, sections + 2):
+        cfg = all_families[families[(s - 2) % len(families)]]
+        subject = SUBJECTS[(s - 2) % len(SUBJECTS)]
+        timings[f"Tempo per il gruppo di domande: Sezione {s}"] = rng.gamma(2.0, 40.0, n).round(2)
+        for q in range(1, questions + 1):
+            for k in range(1, subquestions + 1):
+                data[f"{s}.{q} {subject} (area {q}): [voce {k}]"] = _likert_values(rng, cfg, n, missing_rate)
+            timings[f"Tempo per la domanda: {s}.{q}"] = rng.gamma(2.0, 15.0, n).round(2)
+        other = _pick(rng, FREE_TEXT, n, 0.0).astype(object)
+        other = np.array([f"{v} {i}" for i, v in zip(rng.integers(0, 10 ** 4, n), other)], dtype=object)
+        other[rng.random(n) > 0.05] = None
+        data[f"{s}.{questions + 1} Altre esperienze (specificare) [Altro]"] = other
+    data.update(timings)
+    return pd.DataFrame(data)
+
+
+def write_xlsx(df: pd.DataFrame, path: str):
+    """Scrive il frame con un workbook write-only (molto più rapido di to_excel sui file grandi)"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(list(df.columns))
+    values = df.astype(object).where(df.notna(), None)
+    for row in values.itertuples(index=False, name=None):
+        ws.append(row)
+    wb.save(path)
+
+
+def write_survey(folder: str, files: int = 1, respondents: int = 1000, seed: int = 42, **layout) -> List[str]:
+    """Scrive `files` export results-survey<N>.xlsx da `respondents` risposte ciascuno.
+    `layout` passa sections, questions, subquestions, families e missing_rate a `make_survey`."""
+    names = []
+    for i in range(files):
+        df = make_survey(respondents, seed=seed + i, start_id=1 + i * respondents, **layout)
+        name = f"results-survey{100000 + i}.xlsx"
+        write_xlsx(df, os.path.join(folder, name))
+        names.append(name)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder")
+    parser.add_argument("--respondents", type=int, default=1000)
+    parser.add_argument("--files", type=int, default=1)
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--questions", type=int, default=2, help="domande per sezione")
+    parser.add_argument("--subquestions", type=int, default=5, help="voci per domanda")
+    parser.add_argument("--families", nargs="*", help="famiglie Likert da usare, a rotazione")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.makedirs(args.folder, exist_ok=True)
+    names = write_survey(args.folder, args.files, args.respondents, args.seed, sections=args.sections,
+                         questions=args.questions, subquestions=args.subquestions, families=args.families)
+    print("\n".join(os.path.join(args.folder, n) for n in names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# i test importano il pacchetto `app` dalla cartella webapp/backend
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# progetti e upload dei test in una cartella temporanea, mai in backend/uploads
+# (va impostata prima del primo import di `app`, che crea il ProjectManager)
+os.environ.setdefault("SURVEY_UPLOADS_DIR", tempfile.mkdtemp(prefix="survey-tests-"))
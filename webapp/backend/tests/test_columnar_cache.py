@@ -0,0 +1,25 @@
+import os
+import time
+
+import pandas as pd
+
+from app.columnar_cache import cache_dir_for, ensure_cached, read_table
+
+
+def test_reparse_keeps_other_workers_temporary_files(tmp_path):
+    source = str(tmp_path / "results-survey1.xlsx")
+    pd.DataFrame({"ID risposta": [1, 2], "Età": [20, 30]}).to_excel(source, index=False)
+    meta = ensure_cached(source)
+    cdir = cache_dir_for(source)
+    # file in scrittura di un altro worker (CacheWriter o _write_entry)
+    foreign = os.path.join(cdir, f"{meta['data_file']}.99999.1.tmp")
+    with open(foreign, "wb") as f:
+        f.write(b"partial")
+
+    time.sleep(0.01)
+    pd.DataFrame({"ID risposta": [1, 2, 3], "Età": [20, 30, 40]}).to_excel(source, index=False)
+    assert read_table(source)["Età"].tolist() == [20, 30, 40]
+    assert os.path.exists(foreign)
+    assert os.path.exists(os.path.join(cdir, "results-survey1.xlsx.lock"))
+    # la voce precedente è stata eliminata
+    assert not os.path.exists(os.path.join(cdir, meta["data_file"]))
@@ -0,0 +1,86 @@
+import gzip
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from app import csv_source
+from app.csv_source import dedupe_columns, read_csv_header, read_csv_table
+
+DUPLICATED = (
+    '\ufeff"ID risposta";"Età";"Età";"Note";"Età.1";""\n'
+    '"1";"20";"21";"a";"x";"p"\n'
+    '"2";"30";"31";"";"y";"q"\n'
+)
+
+
+def write(tmp_path, name, text, encoding="utf-8"):
+    path = tmp_path / name
+    data = text.encode(encoding)
+    path.write_bytes(gzip.compress(data) if name.endswith(".gz") else data)
+    return str(path)
+
+
+def test_dedupe_columns_follows_read_excel():
+    assert dedupe_columns(["a", "a", "b", "a"]) == ["a", "a.1", "b", "a.2"]
+    # un nome già presente nell'intestazione non viene riusato
+    assert dedupe_columns(["a", "a.1", "a"]) == ["a", "a.1", "a.2"]
+    assert dedupe_columns(["a", "a", "a.1"]) == ["a", "a.2", "a.1"]
+    assert dedupe_columns(["a", "", None]) == ["a", "Unnamed: 1", "Unnamed: 2"]
+
+
+@pytest.mark.parametrize("name", ["results-survey1.csv", "results-survey1.csv.gz"])
+def test_duplicated_header(tmp_path, name):
+    path = write(tmp_path, name, DUPLICATED)
+    df = read_csv_table(path)
+    expected = ["ID risposta", "Età", "Età.2", "Note", "Età.1", "Unnamed: 5"]
+    assert list(df.columns) == expected
+    assert read_csv_header(path) == expected
+    assert df["Età"].tolist() == [20, 30]
+    assert df["Età.2"].tolist() == [21, 31]
+    assert df["Età.1"].tolist() == ["x", "y"]
+    assert df["Età"].dtype == "int64"
+
+
+def test_duplicated_header_without_pyarrow(tmp_path, monkeypatch):
+    path = write(tmp_path, "results-survey1.csv", DUPLICATED)
+    with_arrow = read_csv_table(path)
+    monkeypatch.setattr(csv_source, "pa_csv", None)
+    without = read_csv_table(path)
+    assert list(without.columns) == list(with_arrow.columns)
+    pd.testing.assert_frame_equal(without, with_arrow, check_dtype=False)
+
+
+def test_header_matches_table_cp1252(tmp_path):
+    path = write(tmp_path, "results-survey2.csv", "Città,Città,Voto\nRoma,Milano,5\n", encoding="cp1252")
+    assert read_csv_header(path) == list(read_csv_table(path).columns) == ["Città", "Città.1", "Voto"]
+
+
+def test_duplicated_header_matches_read_excel(tmp_path):
+    header = ["ID risposta", "Età", "Età", "Età.1", ""]
+    wb = Workbook()
+    wb.active.append([name or None for name in header])
+    wb.active.append([1, 20, 21, "x", "p"])
+    xlsx = tmp_path / "results-survey3.xlsx"
+    wb.save(xlsx)
+    path = write(tmp_path, "results-survey3.csv", ",".join(header) + "\n1,20,21,x,p\n")
+    assert read_csv_header(path) == list(read_csv_table(path).columns) == list(pd.read_excel(xlsx).columns)
+
+
+@pytest.mark.parametrize("arrow", [True, False])
+def test_null_tokens_match_read_excel(tmp_path, monkeypatch, arrow):
+    rows = [["ID risposta", "Risposta", "Voto"], [1, "NA", 5], [2, "N/A", "null"], [3, "null", 4],
+            [4, "nan", "NA"], [5, "None", 3], [6, "Sì", ""], [7, "", 2]]
+    wb = Workbook()
+    for r in rows:
+        wb.active.append([v if v != "" else None for v in r])
+    xlsx = tmp_path / "results-survey4.xlsx"
+    wb.save(xlsx)
+    path = write(tmp_path, "results-survey4.csv", "\n".join(",".join(str(v) for v in r) for r in rows) + "\n")
+    if not arrow:
+        monkeypatch.setattr(csv_source, "pa_csv", None)
+    df = read_csv_table(path)
+    expected = pd.read_excel(xlsx)
+    assert df["Risposta"].tolist()[5] == "Sì"
+    assert int(df["Risposta"].isna().sum()) == 6
+    pd.testing.assert_frame_equal(df, expected)
@@ -0,0 +1,26 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from app.dataset_manifest import (StaleDatasetError, dataset_exists, dataset_fingerprint, read_dataset,
+                                  write_manifest)
+
+
+def test_manifest_is_stale_after_source_changes(tmp_path):
+    source = os.path.join(tmp_path, "merged_20250101_000000.xlsx")
+    pd.DataFrame({"ID risposta": [1, 2], "Età": [20, 30], "Note": ["a", "b"]}).to_excel(source, index=False)
+    dataset = write_manifest(str(tmp_path), source, ["Età"])
+    assert read_dataset(dataset)["Età"].tolist() == [20, 30]
+
+    time.sleep(0.01)
+    pd.DataFrame({"ID risposta": [1, 2], "Età": [21, 31], "Note": ["a", "b"]}).to_excel(source, index=False)
+    with pytest.raises(StaleDatasetError):
+        read_dataset(dataset)
+    with pytest.raises(StaleDatasetError):
+        dataset_fingerprint(dataset)
+    # il manifest resta elencato (non viene cancellato come quelli senza sorgente)
+    assert dataset_exists(dataset)
+    # una nuova selezione sul sorgente cambiato è valida
+    assert read_dataset(write_manifest(str(tmp_path), source, ["Età"]))["Età"].tolist() == [21, 31]
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from app import main
+from app.survey_analyzer import SurveyAnalyzer
+from benchmarks.check_incremental_stats import differences, results_state, run, stats_state
+from benchmarks.synthetic_survey import make_survey
+
+
+def test_append_rows_matches_full_load(tmp_path):
+    result = run(SimpleNamespace(rows=600, batches=3, batch_rows=100), str(tmp_path))
+    assert result["families_equal"]
+    assert result["stats_mismatches"] == []
+    assert result["results_mismatches"] == []
+    # l'ultimo blocco dà le prime risposte al gruppo vuoto: analisi completa
+    assert [r["full_rebuild"] for r in result["appends"]] == [False, True, False]
+
+
+def merge_request(client, pid, name, append=False):
+    return client.post(f"/projects/{pid}/merge-files", json={"file_paths": [name], "append": append})
+
+
+async def append_to_loaded_selection():
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        pid = (await client.post("/projects", json={"name": "append"})).json()["id"]
+        folder = main.pm.get(pid).upload_dir
+        df = make_survey(300, sections=3, seed=3)
+        df.iloc[:250].to_excel(os.path.join(folder, "20250101_000000_results-survey42.xlsx"), index=False)
+        merged = (await merge_request(client, pid, "20250101_000000_results-survey42.xlsx")).json()["merged_file"]
+        headers = (await client.post(f"/projects/{pid}/analyze-headers", json={"file_path": merged})).json()["headers"]
+        dataset = (await client.post(f"/projects/{pid}/select-columns",
+                                     json={"file_path": merged, "headers_analysis": headers})).json()["dataset_file"]
+        assert (await client.post(f"/projects/{pid}/load-dataset", json={"file_path": dataset})).status_code == 200
+
+        # lo stesso export riscaricato il giorno dopo, con 50 risposte in più
+        time.sleep(1.1)  # nome del file unito diverso (timestamp al secondo)
+        df.to_excel(os.path.join(folder, "20250102_000000_results-survey42.xlsx"), index=False)
+        r = await merge_request(client, pid, "20250102_000000_results-survey42.xlsx", append=True)
+        return pid, r.json()
+
+
+def test_append_updates_loaded_dataset():
+    pid, result = asyncio.run(append_to_loaded_selection())
+    assert (result["added"], result["updated"], result["skipped"]) == (50, 0, 250)
+    assert result["loaded_dataset_append"]["rows"] == 300
+
+    proj = main.pm.get(pid)
+    assert proj.loaded_dataset == result["loaded_dataset"]
+    incremental = proj.analyzer
+    full = SurveyAnalyzer()
+    full.load_data(os.path.join(proj.upload_dir, proj.loaded_dataset))
+    assert differences(stats_state(incremental), stats_state(full)) == []
+    assert differences(results_state(incremental), results_state(full)) == []
+
+    # lo snapshot salvato vale per il nuovo dataset: nessun ricaricamento dopo un riavvio
+    restored = SurveyAnalyzer()
+    assert restored.load_snapshot(proj.snapshot_path, os.path.join(proj.upload_dir, proj.loaded_dataset))
+    assert len(restored.data) == 300
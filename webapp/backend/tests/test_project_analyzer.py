@@ -0,0 +1,43 @@
+import os
+import threading
+
+from app import main
+from app.dataset_manifest import dataset_fingerprint
+from app.survey_analyzer import SurveyAnalyzer
+from benchmarks.synthetic_survey import make_survey
+
+
+def test_rebuild_racing_a_load_keeps_the_new_dataset(monkeypatch):
+    proj = main.pm.create_project("race")
+    for name, seed in (("dataset_a.xlsx", 1), ("dataset_b.xlsx", 2)):
+        make_survey(40, sections=2, seed=seed).to_excel(os.path.join(proj.upload_dir, name), index=False)
+    proj.loaded_dataset = "dataset_a.xlsx"
+
+    # il rebuild di dataset_a resta fermo finché dataset_b non è stato caricato e scambiato
+    started, swapped = threading.Event(), threading.Event()
+    load_data = SurveyAnalyzer.load_data
+
+    def slow_load(self, path, *args, **kwargs):
+        if path.endswith("dataset_a.xlsx"):
+            started.set()
+            swapped.wait(10)
+        return load_data(self, path, *args, **kwargs)
+
+    monkeypatch.setattr(SurveyAnalyzer, "load_data", slow_load)
+    monkeypatch.setattr(SurveyAnalyzer, "load_snapshot", lambda self, *args: False)
+    rebuilt = {}
+    reader = threading.Thread(target=lambda: rebuilt.setdefault("analyzer", proj.analyzer))
+    reader.start()
+    assert started.wait(10)
+    main._load_dataset(proj, os.path.join(proj.upload_dir, "dataset_b.xlsx"))
+    swapped.set()
+    reader.join(10)
+
+    current = main.analyzer_pool.peek(proj.id)
+    assert proj.loaded_dataset == "dataset_b.xlsx"
+    assert rebuilt["analyzer"] is current
+    assert current.dataset_fingerprint == dataset_fingerprint(os.path.join(proj.upload_dir, "dataset_b.xlsx"))
+
+    # dopo la pulizia del progetto un rebuild non rimette in memoria il dataset cancellato
+    main._cleanup(proj)
+    assert proj.analyzer.data is None
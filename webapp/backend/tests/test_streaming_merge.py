@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+
+from app import streaming_merge
+from app.columnar_cache import ensure_cached, read_table
+from app.streaming_merge import export_merged, stream_append, stream_merge
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def test_append_reads_only_the_delta_and_writes_excel_on_export(tmp_path, monkeypatch):
+    export = pd.DataFrame({"ID risposta": range(1, 101), "Q1": [f"v{i % 5}" for i in range(100)],
+                           "Età": [20 + i % 30 for i in range(100)]})
+    first = str(tmp_path / "20250101_000000_results-survey42.xlsx")
+    export.iloc[:90].to_excel(first, index=False)
+    base = str(tmp_path / "merged_0.xlsx")
+    stream_merge([first], base, quiet, workers=1)
+
+    # il riscaricamento: 10 risposte nuove e una modificata
+    export.loc[4, "Q1"] = "cambiata"
+    second = str(tmp_path / "20250108_000000_results-survey42.xlsx")
+    export.to_excel(second, index=False)
+    reads = []
+    monkeypatch.setattr(streaming_merge, "read_table",
+                        lambda path, columns=None: reads.append((path, columns)) or read_table(path, columns))
+    output = str(tmp_path / "merged_1.xlsx")
+    result = stream_append(base, [second], output, quiet, workers=1)
+
+    assert (result["added"], result["updated"], result["skipped"], result["rows"]) == (10, 1, 89, 100)
+    # del dataset unito si leggono solo origine e file_number, mai le risposte
+    assert [columns for path, columns in reads if path == base] == [["source_file", "file_number"]]
+    assert not os.path.exists(output)
+    merged = read_table(output)
+    assert merged["Q1"].tolist() == export["Q1"].tolist()
+    assert merged["ID risposta"].tolist() == list(range(1, 101))
+
+    sha1 = ensure_cached(output)["sha1"]
+    assert export_merged(output)["sha1"] == sha1
+    pd.testing.assert_frame_equal(pd.read_excel(output), merged)
+    # un nuovo append parte dal risultato e non trova nulla da cambiare
+    assert stream_append(output, [second], str(tmp_path / "merged_2.xlsx"), quiet, workers=1)["unchanged"]
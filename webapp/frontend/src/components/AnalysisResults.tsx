@@ -21,6 +21,7 @@ import type {
   DatasetSummary,
   SubQuestion,
   ChartTypesResponse,
+  BoxSummary,
 } from '../types/api'
 
 // Simple color palette for multi-trace charts
@@ -30,6 +31,34 @@ const PlotlyColors = [
   '#2E86AB', '#A23B72', '#0B8457', '#EE6C4D', '#3D5A80',
 ]
 
+// Box plot from the quartiles computed by the backend, plus its outlier codes as markers
+const boxTraces = (box: BoxSummary, name: string, color: string): Data[] => {
+  const traces: Data[] = [{
+    type: 'box',
+    x: [name],
+    name,
+    q1: [box.q1],
+    median: [box.median],
+    q3: [box.q3],
+    lowerfence: [box.lowerfence],
+    upperfence: [box.upperfence],
+    mean: [box.mean],
+    marker: { color },
+  } as Data]
+  if (box.outliers.length) {
+    traces.push({
+      type: 'scatter',
+      mode: 'markers',
+      x: box.outliers.map(() => name),
+      y: box.outliers,
+      name,
+      showlegend: false,
+      marker: { color },
+    } as Data)
+  }
+  return traces
+}
+
 const RESPONSE_TYPE_LABEL: Record<ResponseCategorySummary['type'], string> = {
   yes_no: 'Sì / No',
   yes_partial: 'Sì / In parte',
@@ -62,6 +91,7 @@ export default function AnalysisResults({ dataset = null, isLoading = false }: A
   const [loading, setLoading] = useState(false)
   const [groupLabels, setGroupLabels] = useState<Record<string, string>>({})
   const [likertFamilies, setLikertFamilies] = useState<Record<string, string | null>>({})
+  const [multiSelectGroups, setMultiSelectGroups] = useState<string[]>([])
   const [selectedSubIdx, setSelectedSubIdx] = useState<number>(0)
   const [showPercentages, setShowPercentages] = useState<boolean>(true)
   const { projectId, projectName, setProject } = useProject()
@@ -254,6 +284,7 @@ export default function AnalysisResults({ dataset = null, isLoading = false }: A
       setQuestionGroups(response.data.groups)
       setGroupLabels(response.data.labels || {})
       setLikertFamilies(response.data.likert_families || {})
+      setMultiSelectGroups(response.data.multi_select_groups || [])
     } catch (err) {
       // Se è un progetto e il dataset non è caricato, prova auto-load con merged_file
       if (projectId) {
@@ -269,6 +300,7 @@ export default function AnalysisResults({ dataset = null, isLoading = false }: A
             setQuestionGroups(response2.data.groups)
             setGroupLabels(response2.data.labels || {})
             setLikertFamilies(response2.data.likert_families || {})
+            setMultiSelectGroups(response2.data.multi_select_groups || [])
             return
           }
         } catch (e) {
@@ -286,14 +318,16 @@ export default function AnalysisResults({ dataset = null, isLoading = false }: A
     return !!fam && fam !== 'non-likert'
   })()
 
+  const isMultiSelectGroup = !!selectedGroup && multiSelectGroups.includes(selectedGroup)
+
   // Auto-fallback if a disallowed chart type is active for a non-Likert group
   useEffect(() => {
     const disallowedForNonLikert = new Set(['histogram','gaussian','box_likert','stacked_100','heatmap_corr','box_multi'])
-    if (!isLikertGroup && disallowedForNonLikert.has(chartType)) {
+    if ((!isLikertGroup && disallowedForNonLikert.has(chartType)) || (!isMultiSelectGroup && chartType === 'multi_select')) {
       setChartType('bar')
     }
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [selectedGroup, isLikertGroup])
+  }, [selectedGroup, isLikertGroup, isMultiSelectGroup])
 
   const loadChartTypes = async () => {
     try {
@@ -969,10 +1003,11 @@ export default function AnalysisResults({ dataset = null, isLoading = false }: A
               >
                 {chartTypes.map((type, index) => {
                   const value = type.value
-                  const disabled = (!isLikertGroup && ['histogram','gaussian','box_likert','stacked_100','heatmap_corr','box_multi'].includes(value))
+                  const multiDisabled = value === 'multi_select' && !isMultiSelectGroup
+                  const disabled = multiDisabled || (!isLikertGroup && ['histogram','gaussian','box_likert','stacked_100','heatmap_corr','box_multi'].includes(value))
                   return (
                     <option key={index} value={value} disabled={disabled}>
-                      {type.label}{disabled ? ' • (solo Likert)' : ''}
+                      {type.label}{multiDisabled ? ' • (solo scelta multipla)' : disabled ? ' • (solo Likert)' : ''}
                     </option>
                   )
                 })}
@@ -984,7 +1019,7 @@ export default function AnalysisResults({ dataset = null, isLoading = false }: A
           </div>
 
           {/* Group-level charts for specific types */}
-          {analysisResult?.group_chart && (chartType === 'stacked_100' || chartType === 'heatmap_corr' || chartType === 'box_multi') && (
+          {analysisResult?.group_chart && (chartType === 'stacked_100' || chartType === 'heatmap_corr' || chartType === 'box_multi' || chartType === 'multi_select') && (
             <div className="bg-white rounded-lg border border-gray-200 p-4 mb-6">
               {(() => {
                 const gc = analysisResult.group_chart
@@ -1040,13 +1075,8 @@ export default function AnalysisResults({ dataset = null, isLoading = false }: A
                   )
                 }
                 if (gc && chartType === 'box_multi' && gc.chart_type === 'box_multi') {
-                  const traces: Data[] = gc.traces.map((t, idx: number) => ({
-                    type: 'box',
-                    y: t.y,
-                    name: t.name,
-                    boxpoints: 'outliers',
-                    marker: { color: PlotlyColors[idx % PlotlyColors.length] },
-                  }))
+                  const traces: Data[] = gc.traces.flatMap((t, idx: number) =>
+                    boxTraces(t.box, t.name, PlotlyColors[idx % PlotlyColors.length]))
                   return (
                     <Plot
                       data={traces}
@@ -1063,6 +1093,76 @@ export default function AnalysisResults({ dataset = null, isLoading = false }: A
                     />
                   )
                 }
+                if (gc && chartType === 'multi_select' && gc.chart_type === 'multi_select') {
+                  if (gc.error) {
+                    return <p className="text-sm text-gray-500">{gc.error}</p>
+                  }
+                  return (
+                    <div className="space-y-6">
+                      <Plot
+                        data={[{
+                          type: 'bar',
+                          x: gc.options,
+                          y: gc.option_percentages,
+                          text: gc.option_counts.map((c, i) => `${c} (${gc.option_percentages[i]}%)`),
+                          textposition: 'auto',
+                          marker: { color: gc.options.map((_, i) => PlotlyColors[i % PlotlyColors.length]) },
+                        }] as Data[]}
+                        layout={{
+                          title: { text: `${gc.title || 'Scelta multipla (gruppo)'} (${gc.respondents} rispondenti)` },
+                          margin: { l: 60, r: 40, t: 60, b: 120 },
+                          yaxis: { title: { text: '% dei rispondenti' }, range: [0, 100] },
+                          xaxis: { automargin: true },
+                        } as Partial<Layout>}
+                        config={{ displaylogo: false, responsive: true }}
+                        useResizeHandler
+                        style={{ width: '100%', height: '480px' }}
+                      />
+                      <Plot
+                        data={[{
+                          type: 'heatmap',
+                          z: gc.matrix,
+                          x: gc.labels,
+                          y: gc.labels,
+                          colorscale: 'Blues',
+                          colorbar: { title: { text: 'Rispondenti' } },
+                        }] as Data[]}
+                        layout={{
+                          title: { text: 'Co-occorrenze tra opzioni' },
+                          margin: { l: 160, r: 40, t: 60, b: 160 },
+                          xaxis: { automargin: true },
+                          yaxis: { automargin: true },
+                        } as Partial<Layout>}
+                        config={{ displaylogo: false, responsive: true }}
+                        useResizeHandler
+                        style={{ width: '100%', height: '560px' }}
+                      />
+                      <div>
+                        <h4 className="text-base font-medium text-gray-700 mb-2">
+                          Combinazioni più frequenti ({gc.distinct_combinations} distinte)
+                        </h4>
+                        <table className="min-w-full text-sm">
+                          <thead>
+                            <tr className="text-left text-gray-500">
+                              <th className="py-1 pr-4">Opzioni scelte</th>
+                              <th className="py-1 pr-4">Rispondenti</th>
+                              <th className="py-1">%</th>
+                            </tr>
+                          </thead>
+                          <tbody>
+                            {gc.combinations.map((combo, i) => (
+                              <tr key={i} className="border-t border-gray-100">
+                                <td className="py-1 pr-4">{combo.options.length ? combo.options.join(' + ') : '(nessuna)'}</td>
+                                <td className="py-1 pr-4">{combo.count}</td>
+                                <td className="py-1">{combo.percentage}%</td>
+                              </tr>
+                            ))}
+                          </tbody>
+                        </table>
+                      </div>
+                    </div>
+                  )
+                }
                 return null
               })()}
             </div>
@@ -1174,22 +1274,25 @@ export default function AnalysisResults({ dataset = null, isLoading = false }: A
                   } as Data]
                   layout = { ...layout, margin: { l: 40, r: 40, t: 60, b: 40 } }
                 } else if (ct === 'histogram' || ct === 'gaussian') {
-                  const x = chart?.numeric_data || []
-                  const bins = chart?.bins || undefined
+                  // One bar per Likert code: with unit-wide bins the density is the share of respondents
+                  const codes = chart?.likert_codes || []
+                  const counts = chart?.likert_counts || []
+                  const n = counts.reduce((a, b) => a + b, 0)
                   const traces: Data[] = [{
-                    type: 'histogram',
-                    x,
-                    nbinsx: bins,
-                    histnorm: 'probability density',
+                    type: 'bar',
+                    x: codes,
+                    y: counts.map((c) => (n ? c / n : 0)),
+                    width: 1,
                     marker: { color: colors[0] || '#4ECDC4' },
                     opacity: 0.6,
                   } as Data]
-                  if (ct === 'gaussian' && chart?.gaussian && x.length > 1) {
+                  const present = codes.filter((_, i) => counts[i] > 0)
+                  if (ct === 'gaussian' && chart?.gaussian && n > 1) {
                     const mean = chart.gaussian.mean
                     const std = chart.gaussian.std || 1
                     // Build a smooth PDF curve across the data range
-                    const minX = Math.min(...x)
-                    const maxX = Math.max(...x)
+                    const minX = Math.min(...present)
+                    const maxX = Math.max(...present)
                     const steps = 100
                     const xs: number[] = []
                     const ys: number[] = []
@@ -1211,14 +1314,7 @@ export default function AnalysisResults({ dataset = null, isLoading = false }: A
                   data = traces
                   layout = { ...layout, xaxis: { title: { text: chart?.x_label || 'Valore' } }, yaxis: { title: { text: 'Densità' } } }
                 } else if (ct === 'box_likert') {
-                  const y = chart?.numeric_data || []
-                  data = [{
-                    type: 'box',
-                    y,
-                    name: chart?.title || 'Distribuzione',
-                    boxpoints: 'outliers',
-                    marker: { color: colors[0] || '#4ECDC4' },
-                  } as Data]
+                  data = chart?.box ? boxTraces(chart.box, chart?.title || 'Distribuzione', colors[0] || '#4ECDC4') : []
                   layout = { ...layout, yaxis: { title: { text: chart?.y_label || 'Punteggio Likert' } } }
                 } else {
                   // bar, bar_h, likert_bar fall back to bar visuals
@@ -230,6 +230,14 @@ export default function Dashboard({ mergedFile = null, setDataset, projectLoadin
               <div><span className="font-medium">Creato il:</span> {projectDetails.created_at}</div>
               <div>
                 <span className="font-medium">Merged file:</span> {projectDetails.merged_file || '—'}
+                {projectDetails.merged_file && (
+                  <a
+                    href={`${API_BASE_URL}/projects/${projectId}/merged-file`}
+                    className="ml-2 text-blue-600 hover:underline"
+                  >
+                    Scarica Excel
+                  </a>
+                )}
               </div>
               <div>
                 <span className="font-medium">File caricati:</span>
@@ -281,7 +289,7 @@ export default function Dashboard({ mergedFile = null, setDataset, projectLoadin
                     <div className="text-sm text-gray-600">Colonne totali</div>
                   </div>
                   <div className="card">
-                    <div className="text-2xl font-bold text-gray-900">{headers?.total_rows ?? 0}</div>
+                    <div className="text-2xl font-bold text-gray-900">{headers.total_rows ?? '—'}</div>
                     <div className="text-sm text-gray-600">Righe totali</div>
                   </div>
                   <div className="card">
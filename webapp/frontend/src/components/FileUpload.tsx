@@ -85,7 +85,10 @@ export default function FileUpload({ uploadedFiles = [], setUploadedFiles, setMe
     onDrop,
     accept: {
       'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': ['.xlsx'],
-      'application/vnd.ms-excel': ['.xls']
+      'application/vnd.ms-excel': ['.xls'],
+      'text/csv': ['.csv'],
+      'application/gzip': ['.csv.gz'],
+      'application/x-gzip': ['.csv.gz']
     },
     multiple: true
   })
@@ -175,7 +178,7 @@ export default function FileUpload({ uploadedFiles = [], setUploadedFiles, setMe
           ) : (
             <div>
               <p className="text-gray-600 mb-2">Trascina qui i file Excel oppure clicca per selezionarli</p>
-              <p className="text-sm text-gray-500">Supporta file .xlsx e .xls</p>
+              <p className="text-sm text-gray-500">Supporta file .xlsx, .xls, .csv e .csv.gz</p>
             </div>
           )}
         </div>
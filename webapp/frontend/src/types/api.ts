@@ -29,24 +29,40 @@ export interface MergeResponse {
   columns: number
   files_processed: number
   merged_file: string
+  reconciliation?: ColumnReconciliation
+}
+
+// Columns of different files merged into one canonical column by normalized name
+export interface ColumnReconciliation {
+  columns_before: number
+  columns_after: number
+  merged_columns: number
+  groups: { canonical: string; variants: Record<string, string[]> }[]
 }
 
 // Header analysis
 export interface HeaderAnalysisRow {
   original_name: string
   normalized_name: string
-  dtype: string
-  row_count: number
-  non_null_count: number
-  null_count: number
-  non_null_pct: number
-  unique_count_non_null: number
-  sample_values: string
+  // the statistics below are missing in header-only mode (mode: 'header')
+  dtype?: string
+  row_count?: number
+  non_null_count?: number
+  null_count?: number
+  non_null_pct?: number
+  unique_count_non_null?: number
+  // false when the distinct count is an estimate (more than 1024 distinct values)
+  unique_count_exact?: boolean
+  is_duplicate_normalized?: boolean
+  sample_values?: string
 }
 
 export interface HeaderAnalysisResponse {
+  mode?: 'full' | 'header'
   headers: HeaderAnalysisRow[]
-  total_rows: number
+  duplicate_groups?: Record<string, string[]>
+  // null in header-only mode: the rows are not read
+  total_rows: number | null
   total_columns: number
 }
 
@@ -75,6 +91,7 @@ export interface QuestionGroupsResponse {
   groups: string[]
   labels: Record<string, string>
   likert_families: Record<string, string | null>
+  multi_select_groups?: string[]
 }
 
 export interface ChartTypeItem {
@@ -114,10 +131,25 @@ export interface ChartConfig {
   x_label?: string
   chart_type?: string
   hole?: number
-  // Numeric charts
-  numeric_data?: number[]
+  // Numeric charts (Likert): respondents per code, not one value per respondent
+  likert_codes?: number[]
+  likert_counts?: number[]
   bins?: number
   gaussian?: { mean: number; std: number }
+  box?: BoxSummary
+}
+
+// Box plot computed by the backend from the Likert histogram
+export interface BoxSummary {
+  n: number
+  q1: number
+  median: number
+  q3: number
+  lowerfence: number
+  upperfence: number
+  mean: number
+  // codes outside the whiskers
+  outliers: number[]
 }
 
 export interface SubQuestion {
@@ -147,11 +179,54 @@ export interface HeatmapCorrGroupChart {
 export interface BoxMultiGroupChart {
   chart_type: 'box_multi'
   title?: string
-  traces: { name: string; y: number[]; marker?: { color?: string } }[]
+  traces: { name: string; box: BoxSummary; marker?: { color?: string } }[]
   y_label?: string
 }
 
-export type GroupChart = Stacked100GroupChart | HeatmapCorrGroupChart | BoxMultiGroupChart
+export interface MultiSelectGroupChart {
+  chart_type: 'multi_select'
+  title?: string
+  error?: string
+  options: string[]
+  respondents: number
+  option_counts: number[]
+  option_percentages: number[]
+  combinations: { options: string[]; count: number; percentage: number }[]
+  distinct_combinations: number
+  selections_per_respondent: { selected: number; count: number }[]
+  // option × option co-occurrence counts (diagonal = option counts)
+  labels: string[]
+  matrix: number[][]
+}
+
+// Open-text answers (inverted index built when the dataset is loaded)
+export interface TextSearchResult {
+  column: string
+  row: number
+  response_id: number | string | null
+  text: string
+}
+
+export interface TextSearchResponse {
+  query: string
+  terms: string[]
+  total: number
+  by_column: Record<string, number>
+  results: TextSearchResult[]
+}
+
+export interface TextTermsColumn {
+  column: string
+  answers: number
+  distinct_answers: number
+  terms: { term: string; count: number; percentage: number }[]
+}
+
+export interface TextTermsResponse {
+  columns: TextTermsColumn[]
+}
+
+export type GroupChart = Stacked100GroupChart | HeatmapCorrGroupChart | BoxMultiGroupChart | MultiSelectGroupChart
 
 export interface AnalyzeQuestionResponse {
   group_key: string